@@ -1,12 +1,20 @@
 import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 import database, models, schemas
+import metrics
 
 # SECURITY CONFIG
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "b336599b50bf699dd95e54c8fe0eb0c5a0dfc05904fc4e797d02e6b025d57d76") # Use env vars in prod!
@@ -15,12 +23,210 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7 # 7 days
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+# PRINCIPAL CACHE
+# Resolved users are cached per token subject so polling clients do not cost a
+# users query per request; decoded tokens (and invalid ones) are cached too.
+AUTH_CACHE_TTL = float(os.getenv("AURA_AUTH_CACHE_TTL", "30"))
+AUTH_CACHE_SIZE = int(os.getenv("AURA_AUTH_CACHE_SIZE", "10000"))
+AUTH_NEGATIVE_TTL = float(os.getenv("AURA_AUTH_NEGATIVE_TTL", "5"))
+
+AUTH_CACHE_LOOKUPS = metrics.Counter(
+    "aura_auth_cache_lookups_total", "Principal cache lookups by cache and result (hit, negative_hit, miss).", ["cache", "result"]
+)
+
+class _TTLCache:
+    """ Bounded LRU mapping whose entries also expire after their own deadline """
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        metrics.Gauge(f"aura_auth_cache_{name}_entries", f"Entries in the {name} principal cache.").set_function(
+            lambda: {(): len(self._data)}
+        )
+
+    def get(self, key):
+        """ Returns (found, value); expired entries count as misses """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(key)
+                AUTH_CACHE_LOOKUPS.inc(self.name, "hit" if entry[0] is not None else "negative_hit")
+                return True, entry[0]
+            if entry is not None:
+                del self._data[key]
+        AUTH_CACHE_LOOKUPS.inc(self.name, "miss")
+        return False, None
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """ Remove the entry; returns its value, even if expired (None when absent) """
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+# token -> subject email (None for invalid tokens)
+_token_cache = _TTLCache("token", AUTH_CACHE_SIZE)
+# subject email -> detached User snapshot (None for unknown users)
+_user_cache = _TTLCache("user", AUTH_CACHE_SIZE)
+# user id -> subject email, so invalidate_user(user_id) can find the user entry
+_subject_cache = _TTLCache("subject", AUTH_CACHE_SIZE)
+
+def _snapshot(user: models.User) -> models.User:
+    """ Detached copy of the user's column values, safe to share across sessions and threads """
+    values = {attr.key: getattr(user, attr.key) for attr in sa_inspect(models.User).column_attrs}
+    snapshot = models.User(**values)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+def invalidate_user(user_id: Optional[str] = None, email: Optional[str] = None):
+    """ Drop a cached principal; call after changing credits, activation or anything else read from it """
+    if email is None and user_id is not None:
+        email = _subject_cache.pop(user_id)
+    if email is not None:
+        _user_cache.pop(email)
+
+# PASSWORD HASHING
+# bcrypt is deliberately slow; async endpoints hash on a small dedicated pool so
+# a burst of logins neither blocks the event loop nor takes every threadpool slot.
+BCRYPT_ROUNDS = int(os.getenv("AURA_BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("AURA_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes queued or running before new ones are refused with 503.
+HASH_MAX_PENDING = int(os.getenv("AURA_HASH_MAX_PENDING", str(HASH_WORKERS * 8)))
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="aura-bcrypt")
+_hash_slots = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+PASSWORD_HASH_SECONDS = metrics.Histogram(
+    "aura_password_hash_duration_seconds",
+    "bcrypt work per operation, excluding time queued for the hash pool.",
+    ["op"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+LOGIN_ATTEMPTS = metrics.Counter(
+    "aura_login_attempts_total", "Login attempts by outcome (success, invalid, throttled, busy).", ["outcome"]
+)
+
 def verify_password(plain_password, hashed_password):
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    with PASSWORD_HASH_SECONDS.time("verify"):
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def get_password_hash(password):
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    with PASSWORD_HASH_SECONDS.time("hash"):
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def needs_rehash(hashed_password: str) -> bool:
+    """ True when a stored hash was made with a different work factor than AURA_BCRYPT_ROUNDS """
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def _run_hash(func, *args):
+    if not _hash_slots.acquire(blocking=False):
+        LOGIN_ATTEMPTS.inc("busy")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_hash(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_hash(get_password_hash, password)
+
+# LOGIN THROTTLING
+# Failed logins are counted per client IP and per account over a sliding
+# window; once either limit is reached further attempts are refused with 429
+# before any bcrypt work is done. A successful login clears the account's count.
+LOGIN_WINDOW_SECONDS = float(os.getenv("AURA_LOGIN_WINDOW", "300"))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv("AURA_LOGIN_MAX_FAILURES_PER_IP", "30"))
+LOGIN_MAX_FAILURES_PER_ACCOUNT = int(os.getenv("AURA_LOGIN_MAX_FAILURES_PER_ACCOUNT", "5"))
+
+class LoginThrottle:
+    """ Sliding-window failure counter per key, bounded to the most recently seen keys """
+    def __init__(self, limit: int, window: float, maxkeys: int = 100000):
+        self.limit = limit
+        self.window = window
+        self.maxkeys = maxkeys
+        self._failures: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recent(self, key: str, now: float):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, key: str) -> float:
+        """ Seconds until key may try again, or 0 when it is not throttled """
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None or len(failures) < self.limit:
+                return 0.0
+            return failures[-self.limit] + self.window - now
+
+    def fail(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None:
+                failures = self._failures[key] = deque(maxlen=self.limit)
+            failures.append(now)
+            self._failures.move_to_end(key)
+            while len(self._failures) > self.maxkeys:
+                self._failures.popitem(last=False)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+
+ip_login_throttle = LoginThrottle(LOGIN_MAX_FAILURES_PER_IP, LOGIN_WINDOW_SECONDS)
+account_login_throttle = LoginThrottle(LOGIN_MAX_FAILURES_PER_ACCOUNT, LOGIN_WINDOW_SECONDS)
+
+def check_login_throttle(client_ip: str, account: str):
+    """ Raise 429 when the client IP or the account has too many recent failed logins """
+    wait = max(ip_login_throttle.retry_after(client_ip), account_login_throttle.retry_after(account))
+    if wait > 0:
+        LOGIN_ATTEMPTS.inc("throttled")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Please try again later.",
+            headers={"Retry-After": str(int(wait) + 1)},
+        )
+
+def record_login_failure(client_ip: str, account: str):
+    LOGIN_ATTEMPTS.inc("invalid")
+    ip_login_throttle.fail(client_ip)
+    account_login_throttle.fail(account)
+
+def record_login_success(account: str):
+    LOGIN_ATTEMPTS.inc("success")
+    account_login_throttle.reset(account)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -32,25 +238,48 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)):
+    """
+    Resolve the bearer token to a detached User carrying only column values.
+    Relationships are not loaded: routes that need them query them explicitly.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+    found, email = _token_cache.get(token)
+    if not found:
+        payload = {}
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email = payload.get("sub")
+        except JWTError:
+            email = None
         if email is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except JWTError:
+            _token_cache.set(token, None, AUTH_NEGATIVE_TTL)
+        else:
+            # Never cache a token past its own expiry.
+            ttl = min(AUTH_CACHE_TTL, payload["exp"] - time.time()) if "exp" in payload else AUTH_CACHE_TTL
+            _token_cache.set(token, email, max(ttl, 0))
+    if email is None:
         raise credentials_exception
-        
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
-    if user is None:
+    token_data = schemas.TokenData(email=email)
+
+    found, snapshot = _user_cache.get(token_data.email)
+    if not found:
+        result = await db.execute(select(models.User).where(models.User.email == token_data.email))
+        user = result.scalars().first()
+        if user is None:
+            _user_cache.set(token_data.email, None, AUTH_NEGATIVE_TTL)
+            raise credentials_exception
+        _subject_cache.set(user.id, user.email, AUTH_CACHE_TTL)
+        snapshot = _snapshot(user)
+        _user_cache.set(token_data.email, snapshot, AUTH_CACHE_TTL)
+    if snapshot is None:
         raise credentials_exception
-    return user
+    # A private copy per request, so no handler can mutate the cached one.
+    return _snapshot(snapshot)
 
 async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
     if not current_user.is_active:
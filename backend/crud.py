@@ -1,6 +1,11 @@
+import base64
+import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import and_, exists, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import models, schemas
-from auth import get_password_hash
+from auth import get_password_hash, invalidate_user
 
 def get_user(db: Session, user_id: str):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -11,25 +16,138 @@ def get_user_by_email(db: Session, email: str):
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
+    db.flush()
+    db.add(models.CreditLedger(user_id=db_user.id, amount=db_user.credit_balance, reason="signup"))
     db.commit()
     db.refresh(db_user)
     return db_user
 
-def update_user_credits(db: Session, user_id: str, amount: int):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if user:
-        user.credit_balance += amount
+# CREDITS
+# Every change is one conditional UPDATE of the materialized users.credit_balance
+# plus a ledger row, committed together. Debits only match while the balance
+# covers them, so concurrent runs cannot overdraw and no read-then-write race
+# exists between checking and charging. The ledger is the source of truth:
+# recompute_credit_balances() resets any balance that drifted from it.
+
+def _supports_update_returning(db) -> bool:
+    return db.get_bind().dialect.update_returning
+
+def _credit_update(user_id: str, amount: int):
+    stmt = update(models.User).where(models.User.id == user_id)
+    if amount < 0:
+        stmt = stmt.where(models.User.credit_balance >= -amount)
+    return stmt.values(credit_balance=models.User.credit_balance + amount).execution_options(synchronize_session=False)
+
+def adjust_credits(
+    db: Session, user_id: str, amount: int, reason: str, reference: Optional[str] = None, commit: bool = True
+) -> Optional[int]:
+    """
+    Atomically add `amount` (negative to debit) to a user's balance and record it in the ledger.
+    Returns the new balance, or None if the user does not exist or cannot cover a debit.
+    With commit=False the change stays in the open transaction; the caller
+    commits it and then calls invalidate_user. A refused debit then changes
+    nothing and leaves the transaction for the caller to continue or roll back.
+    """
+    stmt = _credit_update(user_id, amount)
+    if _supports_update_returning(db):
+        row = db.execute(stmt.returning(models.User.credit_balance)).first()
+        balance = row[0] if row else None
+    else:
+        result = db.execute(stmt)
+        balance = None
+        if result.rowcount:
+            balance = db.execute(select(models.User.credit_balance).where(models.User.id == user_id)).scalar_one()
+    if balance is None:
+        if commit:
+            db.rollback()
+        return None
+
+    db.add(models.CreditLedger(user_id=user_id, amount=amount, reason=reason, reference=reference))
+    if commit:
         db.commit()
-        db.refresh(user)
-    return user
+        invalidate_user(user_id=user_id)
+    else:
+        db.flush()
+    return balance
+
+def debit_credits(
+    db: Session, user_id: str, cost: int, reason: str, reference: Optional[str] = None, commit: bool = True
+) -> Optional[int]:
+    """ Charge `cost` credits if the balance covers it; returns the new balance or None when insufficient """
+    return adjust_credits(db, user_id, -cost, reason, reference, commit=commit)
+
+def add_ledger_entries(db: Session, entries: Iterable[dict]):
+    """ Append many ledger rows in one executemany INSERT; entries need user_id, amount and reason """
+    rows = [
+        {"reference": None, "created_at": datetime.datetime.utcnow(), **entry}
+        for entry in entries
+    ]
+    if rows:
+        db.execute(insert(models.CreditLedger), rows)
+    return len(rows)
+
+def open_credit_ledger(db: Session) -> int:
+    """
+    Give accounts that predate the ledger (no entries at all) one "opening"
+    entry for their current balance. Returns the entries written.
+    """
+    unledgered = db.execute(
+        select(models.User.id, models.User.credit_balance)
+        .where(~exists().where(models.CreditLedger.user_id == models.User.id))
+    ).all()
+    written = add_ledger_entries(
+        db, ({"user_id": user_id, "amount": balance, "reason": "opening"} for user_id, balance in unledgered)
+    )
+    db.commit()
+    return written
+
+def recompute_credit_balances(db: Session) -> int:
+    """
+    Reset every materialized balance that differs from its user's ledger sum
+    (manual edits, lost writes) to that sum, in one UPDATE. Users without
+    ledger entries are left alone; see open_credit_ledger. Returns the
+    balances corrected.
+    """
+    ledger_sum = (
+        select(func.sum(models.CreditLedger.amount))
+        .where(models.CreditLedger.user_id == models.User.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(models.User)
+        .where(exists().where(models.CreditLedger.user_id == models.User.id), models.User.credit_balance != ledger_sum)
+        .values(credit_balance=ledger_sum)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+def get_credit_ledger(db: Session, user_id: str, limit: int = 100):
+    return (
+        db.query(models.CreditLedger)
+        .filter(models.CreditLedger.user_id == user_id)
+        .order_by(models.CreditLedger.id.desc())
+        .limit(limit)
+        .all()
+    )
 
-def create_user_project(db: Session, project: schemas.ProjectCreate, user_id: str, job_id: str):
+def update_user_credits(db: Session, user_id: str, amount: int, reason: str = "adjustment", reference: Optional[str] = None):
+    """ Apply a credit change and return the refreshed user (None if the user does not exist) """
+    if adjust_credits(db, user_id, amount, reason, reference) is None:
+        return None
+    return get_user(db, user_id)
+
+def create_user_project(db: Session, project: schemas.ProjectCreate, user_id: str, job_id: str, commit: bool = True):
     db_project = models.Project(**project.model_dump(), user_id=user_id, id=job_id)
     db.add(db_project)
+    if not commit:
+        db.flush()
+        return db_project
     db.commit()
     db.refresh(db_project)
     return db_project
@@ -44,3 +162,103 @@ def update_project_status(db: Session, job_id: str, status: str):
 
 def get_user_projects(db: Session, user_id: str):
     return db.query(models.Project).filter(models.Project.user_id == user_id).order_by(models.Project.created_at.desc()).all()
+
+def get_user_project(db: Session, user_id: str, job_id: str):
+    """ The project if this user owns it, else None (primary key lookup) """
+    return db.query(models.Project).filter(models.Project.id == job_id, models.Project.user_id == user_id).first()
+
+def user_owns_project(db: Session, user_id: str, job_id: str) -> bool:
+    return db.execute(
+        select(exists().where(models.Project.id == job_id, models.Project.user_id == user_id))
+    ).scalar()
+
+# PROJECT LISTING
+# Keyset pagination over (created_at, id) descending, served by
+# ix_projects_user_id_created_at: each page is an index range scan no matter
+# how deep the client pages. The cursor is the last row's sort key.
+PROJECT_PREVIEW_CHARS = 200
+
+def encode_project_cursor(created_at: datetime.datetime, job_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{job_id}".encode()).decode().rstrip("=")
+
+def decode_project_cursor(cursor: str) -> Tuple[datetime.datetime, str]:
+    """ Raises ValueError for malformed cursors """
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    created_at, job_id = raw.split("|", 1)
+    return datetime.datetime.fromisoformat(created_at), job_id
+
+def _project_page_query(user_id: str, limit: int, cursor: Optional[str]):
+    stmt = (
+        select(
+            models.Project.id,
+            models.Project.status,
+            models.Project.created_at,
+            func.substr(models.Project.prompt_desc, 1, PROJECT_PREVIEW_CHARS).label("prompt_desc"),
+        )
+        .where(models.Project.user_id == user_id)
+        .order_by(models.Project.created_at.desc(), models.Project.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, job_id = decode_project_cursor(cursor)
+        stmt = stmt.where(or_(
+            models.Project.created_at < created_at,
+            and_(models.Project.created_at == created_at, models.Project.id < job_id),
+        ))
+    return stmt
+
+def _project_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_project_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+def list_user_projects_page(db: Session, user_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """ One page of a user's projects, newest first, with only the listed columns; returns (rows, next_cursor) """
+    return _project_page(db.execute(_project_page_query(user_id, limit, cursor)).all(), limit)
+
+# ASYNC VARIANTS
+# Used by async def routes with database.get_async_db, so their queries run on
+# the async driver instead of blocking the event loop. Same semantics as above.
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def create_user_async(db: AsyncSession, user: schemas.UserCreate, hashed_password: str):
+    db_user = models.User(email=user.email, hashed_password=hashed_password)
+    db.add(db_user)
+    await db.flush()
+    db.add(models.CreditLedger(user_id=db_user.id, amount=db_user.credit_balance, reason="signup"))
+    await db.commit()
+    return db_user
+
+async def update_password_hash_async(db: AsyncSession, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    await db.commit()
+    return user
+
+async def adjust_credits_async(db: AsyncSession, user_id: str, amount: int, reason: str, reference: Optional[str] = None) -> Optional[int]:
+    stmt = _credit_update(user_id, amount)
+    if _supports_update_returning(db):
+        row = (await db.execute(stmt.returning(models.User.credit_balance))).first()
+        balance = row[0] if row else None
+    else:
+        result = await db.execute(stmt)
+        balance = None
+        if result.rowcount:
+            balance = (await db.execute(select(models.User.credit_balance).where(models.User.id == user_id))).scalar_one()
+    if balance is None:
+        await db.rollback()
+        return None
+
+    db.add(models.CreditLedger(user_id=user_id, amount=amount, reason=reason, reference=reference))
+    await db.commit()
+    invalidate_user(user_id=user_id)
+    return balance
+
+async def list_user_projects_page_async(
+    db: AsyncSession, user_id: str, limit: int, cursor: Optional[str] = None
+) -> Tuple[List, Optional[str]]:
+    return _project_page((await db.execute(_project_page_query(user_id, limit, cursor))).all(), limit)
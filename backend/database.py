@@ -1,16 +1,82 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # Setup SQLite Database locally
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(PROJECT_ROOT, 'aura_saas.db')}")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
-)
+# SQLite tuning, applied to every new connection. WAL lets API reads proceed while
+# background jobs write; synchronous=NORMAL is durable across app crashes under WAL
+# and only risks the last commits on power loss; the busy timeout makes writers
+# wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("AURA_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("AURA_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("AURA_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("AURA_SQLITE_MMAP_SIZE", str(256 * 2**20))),
+}
+
+# Connection pool for server databases (Postgres, MySQL).
+DB_POOL_SIZE = int(os.getenv("AURA_DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("AURA_DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("AURA_DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("AURA_DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("AURA_DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no")
+
+# Async drivers used for the same database by the async routes.
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if "+" in parsed.drivername and parsed.get_driver_name() in _ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(SQLALCHEMY_DATABASE_URL)
+
+def _engine_options(is_async: bool = False):
+    if IS_SQLITE:
+        connect_args = {"timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000}
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        return {"connect_args": connect_args}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options())
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas=None):
+    """ Run the tuning PRAGMAs on a raw sqlite3 connection """
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if name == "journal_mode" and ":memory:" in SQLALCHEMY_DATABASE_URL:
+                continue  # in-memory databases cannot use WAL
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+# Async engine for async def routes, so their queries do not block the event loop.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(is_async=True))
+
+if IS_SQLITE:
+    event.listen(engine, "connect", lambda dbapi_connection, _record: apply_sqlite_pragmas(dbapi_connection))
+    event.listen(async_engine.sync_engine, "connect", lambda dbapi_connection, _record: apply_sqlite_pragmas(dbapi_connection))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: attributes of committed objects stay readable without an implicit (sync) refresh.
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -20,3 +86,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
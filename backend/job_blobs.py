@@ -0,0 +1,158 @@
+import os
+import gzip
+import time
+import uuid
+import shutil
+import threading
+from typing import Any, Dict, Optional
+
+# Large job fields (phase reports, the developer output) are written to
+# gzip-compressed per-job blobs so the in-memory jobs dict only holds small
+# SpilledText handles. The text is read back on demand, e.g. when /status is
+# asked for the field.
+#
+# Layout under AURA_JOB_BLOB_DIR:
+#   <job_id>/<field>-<random>.txt.gz   spilled fields
+#   <job_id>/project.zip               the generated project, when Supabase Storage is not configured
+#
+# Status published to other processes (state.enable_remote_status) names each
+# blob by that relative key, so any process that mounts the same directory
+# can load it. Elsewhere the text reads as a short placeholder string.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BASE_DIR = os.path.abspath(os.getenv("AURA_JOB_BLOB_DIR") or os.path.join(PROJECT_ROOT, "job_blobs"))
+
+# Strings longer than this many characters are spilled (0 disables spilling).
+SPILL_THRESHOLD = int(os.getenv("AURA_JOB_SPILL_CHARS", "2048"))
+# Blob directories untouched for this many days are pruned.
+BLOB_TTL_DAYS = float(os.getenv("AURA_JOB_BLOB_TTL_DAYS", "7"))
+_PRUNE_EVERY = 3600.0
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+class SpilledText:
+    """Handle to a string stored in a job blob."""
+
+    __slots__ = ("path", "chars", "stored_bytes")
+
+    def __init__(self, path: str, chars: int, stored_bytes: int):
+        self.path = path
+        self.chars = chars
+        self.stored_bytes = stored_bytes
+
+    def load(self) -> str:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def describe(self) -> Dict[str, Any]:
+        """What clients see instead of the text unless they ask for the field."""
+        return {"spilled": True, "chars": self.chars}
+
+    def reference(self) -> Dict[str, Any]:
+        """describe() plus the blob's key, for status published to other processes."""
+        key = os.path.relpath(self.path, _BASE_DIR).replace(os.sep, "/")
+        return {"spilled": True, "chars": self.chars, "blob": key}
+
+
+class _PublishedText(SpilledText):
+    """A blob named in another process's published status."""
+
+    __slots__ = ()
+
+    def load(self) -> str:
+        try:
+            return super().load()
+        except OSError:
+            # Written by a worker on another host whose blob directory is not shared with this one.
+            return f"[{self.chars} characters held by the worker that ran this job; not readable from this server]"
+
+
+def should_spill(value: Any) -> bool:
+    return SPILL_THRESHOLD > 0 and isinstance(value, str) and len(value) > SPILL_THRESHOLD
+
+
+def spill(job_id: str, field: str, text: str) -> SpilledText:
+    _maybe_prune()
+    job_dir = os.path.join(_BASE_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    path = os.path.join(job_dir, f"{field}-{uuid.uuid4().hex[:12]}.txt.gz")
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    # Level 6 is the gzip default trade-off; these are one-off writes of prose and code.
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return SpilledText(path, len(text), os.path.getsize(path))
+
+
+def materialize(value: Any) -> Any:
+    """The field's real value; a blob that has been pruned reads as None."""
+    if not isinstance(value, SpilledText):
+        return value
+    try:
+        return value.load()
+    except OSError:
+        return None
+
+
+def describe(value: Any) -> Any:
+    return value.describe() if isinstance(value, SpilledText) else value
+
+
+def reference(value: Any) -> Any:
+    return value.reference() if isinstance(value, SpilledText) else value
+
+
+def from_reference(value: Any) -> Any:
+    """A handle for a reference() read back from published status; other values pass through."""
+    if not (isinstance(value, dict) and value.get("spilled") and isinstance(value.get("blob"), str)):
+        return value
+    path = os.path.normpath(os.path.join(_BASE_DIR, value["blob"]))
+    if not path.startswith(os.path.join(_BASE_DIR, "")):
+        return value
+    return _PublishedText(path, int(value.get("chars") or 0), 0)
+
+
+def store_archive(job_id: str, zip_path: str) -> str:
+    """Move a job's project archive into its blob directory, where every node sharing it can serve downloads."""
+    job_dir = os.path.join(_BASE_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    path = os.path.join(job_dir, "project.zip")
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    shutil.move(zip_path, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def archive_path(job_id: str) -> Optional[str]:
+    """The job's stored project archive, if any."""
+    path = os.path.join(_BASE_DIR, job_id, "project.zip")
+    return path if os.path.exists(path) else None
+
+
+def prune(max_age_days: float = BLOB_TTL_DAYS) -> int:
+    """Remove blob directories of jobs idle longer than max_age_days; returns directories removed."""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for job_id in os.listdir(_BASE_DIR) if os.path.isdir(_BASE_DIR) else []:
+        path = os.path.join(_BASE_DIR, job_id)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def _maybe_prune() -> None:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < _PRUNE_EVERY and _last_prune:
+            return
+        _last_prune = time.monotonic()
+    try:
+        prune()
+    except OSError:
+        pass
@@ -0,0 +1,205 @@
+import json
+import os
+import datetime
+from typing import Optional, Tuple
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+
+# DURABLE JOB QUEUE
+# Pipeline runs are rows in job_queue instead of in-process BackgroundTasks.
+# A worker claims a row by leasing it for LEASE_SECONDS and keeps extending
+# the lease while the job runs. If the worker dies (restart, deploy, OOM) the
+# lease lapses and the next worker claims the job again and resumes it from
+# its phase checkpoints, up to MAX_ATTEMPTS times.
+#
+# A failed attempt is only retried when its error may pass (quota, provider
+# outages, a lost worker); failures that repeat on every attempt, such as a
+# model that does not exist, fail the job at once.
+#
+# Claims are a select of the oldest claimable row followed by an UPDATE that
+# repeats the claimability condition, so two workers racing for the same row
+# cannot both win on SQLite or Postgres.
+
+LEASE_SECONDS = float(os.getenv("AURA_JOB_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("AURA_JOB_MAX_ATTEMPTS", "3"))
+# Seconds before a failed attempt is retried, multiplied by the attempt number.
+RETRY_DELAY_SECONDS = float(os.getenv("AURA_JOB_RETRY_DELAY", "30"))
+
+QUEUED, LEASED, DONE, FAILED, CANCELLED = "queued", "leased", "done", "failed", "cancelled"
+
+# Lower-cased error fragments of failures that no retry can fix.
+PERMANENT_ERRORS = (
+    "model_not_found", "invalid api key", "api key not valid", "invalid_api_key", "unauthorized",
+    "permission denied", "invalid_argument", "bad request", "cannot identify image file",
+)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def is_retryable(error: Optional[str]) -> bool:
+    """ False for failures that would repeat on every attempt """
+    message = (error or "").lower()
+    return not any(fragment in message for fragment in PERMANENT_ERRORS)
+
+
+def enqueue(
+    db: Session, job_id: str, user_id: str, payload: dict, commit: bool = True, sketch: Optional[bytes] = None
+) -> models.JobQueue:
+    """
+    Queue a job (or re-queue it, e.g. for a resume) for the next free worker.
+    The uploaded sketch is stored with the row, so workers on any node can
+    read it; a re-queue without one keeps the stored sketch. With
+    commit=False the job is only claimable once the caller commits.
+    """
+    now = _now()
+    entry = db.get(models.JobQueue, job_id)
+    if entry is None:
+        entry = models.JobQueue(id=job_id, user_id=user_id, created_at=now)
+        db.add(entry)
+    entry.payload = json.dumps(payload)
+    if sketch is not None:
+        entry.sketch = sketch
+    entry.status = QUEUED
+    entry.attempts = 0
+    entry.max_attempts = MAX_ATTEMPTS
+    entry.available_at = now
+    entry.lease_owner = None
+    entry.lease_expires_at = None
+    entry.cancel_requested = False
+    entry.last_error = None
+    entry.updated_at = now
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+    return entry
+
+
+def _claimable(now: datetime.datetime):
+    return or_(
+        and_(models.JobQueue.status == QUEUED, models.JobQueue.available_at <= now),
+        and_(models.JobQueue.status == LEASED, models.JobQueue.lease_expires_at < now),
+    )
+
+
+def claim(db: Session, worker_id: str) -> Optional[models.JobQueue]:
+    """
+    Lease the oldest runnable job (queued, or leased by a worker whose lease
+    expired) to worker_id. Jobs that already used every attempt are marked
+    failed instead. Returns None when nothing is runnable.
+    """
+    while True:
+        now = _now()
+        job_id = db.execute(
+            select(models.JobQueue.id).where(_claimable(now)).order_by(models.JobQueue.available_at).limit(1)
+        ).scalar()
+        if job_id is None:
+            return None
+        result = db.execute(
+            update(models.JobQueue)
+            .where(models.JobQueue.id == job_id, _claimable(now))
+            .values(
+                status=LEASED,
+                lease_owner=worker_id,
+                lease_expires_at=now + datetime.timedelta(seconds=LEASE_SECONDS),
+                attempts=models.JobQueue.attempts + 1,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount != 1:
+            continue  # another worker won the race; try the next row
+        entry = db.get(models.JobQueue, job_id, populate_existing=True)
+        if entry.attempts > entry.max_attempts:
+            finish(db, job_id, worker_id, FAILED, error=entry.last_error or "Worker lease expired on every attempt")
+            continue
+        return entry
+
+
+def heartbeat(db: Session, job_id: str, worker_id: str) -> Tuple[bool, bool]:
+    """ Extend the lease; returns (still owned, cancellation requested) """
+    result = db.execute(
+        update(models.JobQueue)
+        .where(models.JobQueue.id == job_id, models.JobQueue.lease_owner == worker_id, models.JobQueue.status == LEASED)
+        .values(lease_expires_at=_now() + datetime.timedelta(seconds=LEASE_SECONDS), updated_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:
+        return False, False
+    cancel_requested = db.execute(
+        select(models.JobQueue.cancel_requested).where(models.JobQueue.id == job_id)
+    ).scalar()
+    return True, bool(cancel_requested)
+
+
+def finish(db: Session, job_id: str, worker_id: str, outcome: str, error: Optional[str] = None) -> bool:
+    """
+    Record the end of an attempt. A FAILED attempt is re-queued with a delay
+    while attempts remain and its error is retryable. Ignored (returns False)
+    if the lease has passed to another worker.
+    """
+    entry = db.get(models.JobQueue, job_id, populate_existing=True)
+    if entry is None or entry.lease_owner != worker_id or entry.status != LEASED:
+        return False
+    now = _now()
+    if outcome == FAILED and entry.attempts < entry.max_attempts and not entry.cancel_requested and is_retryable(error):
+        entry.status = QUEUED
+        entry.available_at = now + datetime.timedelta(seconds=RETRY_DELAY_SECONDS * entry.attempts)
+    else:
+        entry.status = outcome
+    if entry.status == DONE:
+        entry.sketch = None  # a completed job cannot be resumed
+    entry.lease_owner = None
+    entry.lease_expires_at = None
+    entry.last_error = error
+    entry.updated_at = now
+    db.commit()
+    if entry.status in (QUEUED, FAILED):
+        project = db.get(models.Project, job_id)
+        if project is not None and project.status not in ("Completed", "Cancelled"):
+            project.status = "Pending" if entry.status == QUEUED else "Failed"
+            db.commit()
+    return True
+
+
+def request_cancel(db: Session, job_id: str) -> Optional[str]:
+    """
+    Cancel a queued job outright, or flag a leased one so its worker stops it
+    at the next heartbeat. Returns "cancelled", "requested" or None if the job
+    is not pending.
+    """
+    now = _now()
+    result = db.execute(
+        update(models.JobQueue)
+        .where(models.JobQueue.id == job_id, models.JobQueue.status == QUEUED)
+        .values(status=CANCELLED, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        db.commit()
+        return "cancelled"
+    result = db.execute(
+        update(models.JobQueue)
+        .where(models.JobQueue.id == job_id, models.JobQueue.status == LEASED)
+        .values(cancel_requested=True, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return "requested" if result.rowcount else None
+
+
+async def get_entry_async(db: AsyncSession, job_id: str) -> Optional[models.JobQueue]:
+    """ The job's queue row, for status endpoints on nodes that are not running it """
+    return await db.get(models.JobQueue, job_id)
+
+
+def is_pending(db: Session, job_id: str) -> bool:
+    """ True while the job is queued or leased to a worker """
+    status = db.execute(select(models.JobQueue.status).where(models.JobQueue.id == job_id)).scalar()
+    return status in (QUEUED, LEASED)
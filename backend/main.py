@@ -1,19 +1,32 @@
-from fastapi import FastAPI, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from starlette.routing import Match
 import os
 import sys
+import time
 import asyncio
 
 # SaaS Modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from routers import auth_router, billing_router, project_router
-import database, models
-from state import connected_clients
-from logger_config import log_queue
+import database, models, crud, worker
+from state import connected_clients, jobs
+from logger_config import log_queue, add_subscriber, remove_subscriber, get_replay, log_queue_stats, set_remote_sink
+import metrics
+import pubsub
+import state
 
 # Initialize DB
 models.Base.metadata.create_all(bind=database.engine)
+# create_all skips tables that already exist, so add indexes introduced since.
+for _index in models.Project.__table__.indexes:
+    _index.create(bind=database.engine, checkfirst=True)
+with database.SessionLocal() as _db:
+    # Accounts created before the credit ledger get an opening entry; balances follow the ledger.
+    crud.open_credit_ledger(_db)
+    crud.recompute_credit_balances(_db)
 
 app = FastAPI(title="Aura-IDE Backend (SaaS Edition)")
 
@@ -23,6 +36,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Modular Routers
@@ -30,12 +44,135 @@ app.include_router(auth_router.router)
 app.include_router(billing_router.router)
 app.include_router(project_router.router)
 
+# Observability
+HTTP_LATENCY = metrics.Histogram(
+    "aura_http_request_duration_seconds",
+    "API request latency per route.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+metrics.Gauge("aura_jobs", "Jobs tracked in memory by state.", ["state"]).set_function(
+    lambda: {
+        ("running",): sum(1 for j in list(jobs.values()) if j.get("is_running")),
+        ("total",): len(jobs),
+    }
+)
+metrics.Gauge("aura_log_queue_depth", "Lines waiting in the WebSocket log queue.").set_function(
+    lambda: {(): log_queue.qsize()}
+)
+metrics.Counter("aura_log_queue_lines_total", "WebSocket log lines by outcome.", ["outcome"]).set_function(
+    lambda: {
+        (outcome,): value
+        for outcome, value in log_queue_stats().items()
+        if outcome in ("enqueued", "dropped", "skipped_no_subscriber")
+    }
+)
+metrics.Gauge("aura_websocket_clients", "Connected WebSocket log viewers.").set_function(
+    lambda: {(): sum(len(c) for c in list(connected_clients.values()))}
+)
+# With a remote broker each viewer has its own relay queue (see
+# _relay_broker_logs). In-process viewers are fed from log_queue, whose depth
+# is aura_log_queue_depth above.
+metrics.Gauge(
+    "aura_websocket_send_queue_depth", "Log lines waiting to be sent to WebSocket viewers, by queue.", ["queue"]
+).set_function(
+    lambda: {("relay",): sum(q.qsize() for q in list(_relay_queues))}
+)
+metrics.Gauge(
+    "aura_websocket_send_queue_max_depth", "Deepest single viewer relay queue (the slowest viewer)."
+).set_function(
+    lambda: {(): max((q.qsize() for q in list(_relay_queues)), default=0)}
+)
+
+def _route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    for candidate in app.router.routes:
+        match, _ = candidate.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", "unmatched")
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_LATENCY.observe(time.perf_counter() - started, request.method, _route_template(request), str(status_code))
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(content=metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
+
+# Cross-worker fan-out: with a remote AURA_PUBSUB_URL, log lines and job state
+# changes are published to the broker and every WebSocket subscribes to its
+# job's channel there, instead of relying on this process's log_queue.
+broker = pubsub.get_broker()
+if broker.remote:
+    set_remote_sink(lambda job_id, line: broker.publish(pubsub.log_channel(job_id), line))
+    state.enable_remote_status(broker)
+
+# Lines buffered per remote WebSocket before the slowest viewers start losing lines.
+WS_SEND_BUFFER = 1000
+# Send queues of the open relays, for the send-queue gauges.
+_relay_queues = set()
+
+async def _relay_broker_logs(websocket: WebSocket, job_id: str):
+    loop = asyncio.get_running_loop()
+    lines: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_BUFFER)
+    _relay_queues.add(lines)
+
+    def deliver(_channel, line):
+        def put():
+            try:
+                lines.put_nowait(line)
+            except asyncio.QueueFull:
+                pass
+        loop.call_soon_threadsafe(put)
+
+    if job_id == "global":
+        unsubscribe = broker.psubscribe(pubsub.ALL_LOGS_PATTERN, deliver)
+    else:
+        unsubscribe = broker.subscribe(pubsub.log_channel(job_id), deliver)
+
+    async def forward():
+        while True:
+            await websocket.send_text(await lines.get())
+
+    sender = asyncio.create_task(forward())
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        unsubscribe()
+        sender.cancel()
+        _relay_queues.discard(lines)
+
 @app.websocket("/api/ws/logs/{job_id}")
 async def websocket_logs(websocket: WebSocket, job_id: str):
     await websocket.accept()
+    for line in get_replay(job_id):
+        await websocket.send_text(line)
+    if broker.remote:
+        connected_clients.setdefault(job_id, []).append(websocket)
+        try:
+            await _relay_broker_logs(websocket, job_id)
+        finally:
+            connected_clients[job_id].remove(websocket)
+            if not connected_clients[job_id]:
+                del connected_clients[job_id]
+        return
     if job_id not in connected_clients:
         connected_clients[job_id] = []
     connected_clients[job_id].append(websocket)
+    add_subscriber(job_id)
     try:
         while True:
             await websocket.receive_text()
@@ -43,6 +180,8 @@ async def websocket_logs(websocket: WebSocket, job_id: str):
         connected_clients[job_id].remove(websocket)
         if not connected_clients[job_id]:
             del connected_clients[job_id]
+    finally:
+        remove_subscriber(job_id)
 
 async def log_pump():
     while True:
@@ -74,6 +213,8 @@ async def log_pump():
 @app.on_event("startup")
 async def startup_event():
     asyncio.create_task(log_pump())
+    # Also picks up jobs whose worker died mid-run once their lease lapses.
+    worker.start_workers(worker.INPROCESS_WORKERS)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,5 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Index, LargeBinary, Text
+from sqlalchemy.orm import deferred, relationship
 import datetime
 import uuid
 
@@ -19,6 +19,7 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     projects = relationship("Project", back_populates="owner")
+    credit_entries = relationship("CreditLedger", back_populates="user")
 
 class Project(Base):
     __tablename__ = "projects"
@@ -30,3 +31,44 @@ class Project(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     
     owner = relationship("User", back_populates="projects")
+
+    __table_args__ = (
+        # Serves the per-user listing (ORDER BY created_at DESC, id DESC) and ownership lookups.
+        Index("ix_projects_user_id_created_at", "user_id", "created_at", "id"),
+    )
+
+class CreditLedger(Base):
+    """ Append-only record of every credit change; users.credit_balance is its materialized sum """
+    __tablename__ = "credit_ledger"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String, ForeignKey("users.id"), index=True, nullable=False)
+    amount = Column(Integer, nullable=False) # Positive for grants/purchases, negative for debits
+    reason = Column(String, nullable=False) # signup, run, purchase, adjustment, opening
+    reference = Column(String, nullable=True) # job_id, checkout session id, ...
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    user = relationship("User", back_populates="credit_entries")
+
+class JobQueue(Base):
+    """ Durable queue of pipeline runs; see job_queue.py for the lease protocol """
+    __tablename__ = "job_queue"
+
+    id = Column(String, ForeignKey("projects.id"), primary_key=True) # job_id
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    payload = Column(Text, nullable=False) # JSON arguments of run_aura_background
+    sketch = deferred(Column(LargeBinary, nullable=True)) # uploaded image, so any worker node can run Vision
+    status = Column(String, nullable=False, default="queued") # queued, leased, done, failed, cancelled
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow) # not claimable before this
+    lease_owner = Column(String, nullable=True) # worker id holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_job_queue_status_available_at", "status", "available_at"),
+    )
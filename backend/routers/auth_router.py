@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 import database, schemas, crud, auth, models
 
@@ -9,25 +10,45 @@ router = APIRouter(
     tags=["Authentication"],
 )
 
+# Projects embedded in /me; the rest are paged through /api/projects.
+ME_PROJECTS_LIMIT = 50
+
 @router.post("/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_async_db)):
+    db_user = await crud.get_user_by_email_async(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db=db, user=user)
+    hashed_password = await auth.get_password_hash_async(user.password)
+    db_user = await crud.create_user_async(db=db, user=user, hashed_password=hashed_password)
+    set_committed_value(db_user, "projects", [])
+    return db_user
 
 @router.post("/token")
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
-    user = crud.get_user_by_email(db, email=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(database.get_async_db)):
+    client_ip = request.client.host if request.client else "unknown"
+    account = form_data.username.strip().lower()
+    auth.check_login_throttle(client_ip, account)
+
+    user = await crud.get_user_by_email_async(db, email=form_data.username)
+    if not user or not await auth.verify_password_async(form_data.password, user.hashed_password):
+        auth.record_login_failure(client_ip, account)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    auth.record_login_success(account)
+    if auth.needs_rehash(user.hashed_password):
+        # Upgrade hashes made with an older work factor while we have the plaintext.
+        await crud.update_password_hash_async(db, user, await auth.get_password_hash_async(form_data.password))
     access_token = auth.create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=schemas.User)
-async def read_users_me(current_user: models.User = Depends(auth.get_current_active_user)):
+async def read_users_me(response: Response, current_user: models.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(database.get_async_db)):
+    """ The account with its newest projects; when more exist, X-Next-Cursor continues at /api/projects?cursor= """
+    rows, next_cursor = await crud.list_user_projects_page_async(db, current_user.id, ME_PROJECTS_LIMIT)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    set_committed_value(current_user, "projects", rows)
     return current_user
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
 import stripe
 import os
 
@@ -20,12 +19,9 @@ async def create_checkout_session(current_user: models.User = Depends(auth.get_c
     if stripe.api_key == "sk_test_placeholder":
         # MOCK SYSTEM FOR DEVELOPMENT
         # Automatically add credits if no real Stripe keys are configured
-        db = database.SessionLocal()
-        try:
-            crud.update_user_credits(db, current_user.id, 50)
-            return {"url": "http://localhost:5173/dashboard?mock_payment=success"}
-        finally:
-            db.close()
+        async with database.AsyncSessionLocal() as db:
+            await crud.adjust_credits_async(db, current_user.id, 50, reason="purchase", reference="mock_checkout")
+        return {"url": "http://localhost:5173/dashboard?mock_payment=success"}
             
     try:
         session = stripe.checkout.Session.create(
@@ -74,10 +70,7 @@ async def stripe_webhook(request: Request):
         
         user_id = session.get("client_reference_id")
         if user_id:
-            db = database.SessionLocal()
-            try:
-                crud.update_user_credits(db, user_id, 50)
-            finally:
-                db.close()
+            async with database.AsyncSessionLocal() as db:
+                await crud.adjust_credits_async(db, user_id, 50, reason="purchase", reference=session.get("id"))
 
     return {"status": "success"}
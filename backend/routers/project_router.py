@@ -1,18 +1,27 @@
 import os
+import json
 import uuid
 import base64
+import binascii
+import asyncio
 import shutil
 import tempfile
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 # Internal Modules
-import database, models, auth, crud
-from state import jobs
+import database, models, schemas, auth, crud, job_queue, job_blobs
+from state import jobs, JobState
 from direct_flow import run_direct_flow
+from memory_store import release_job
+from tracing import span, has_trace, export_chrome_trace
+import checkpoints
+import cancellation
+import pubsub
+from cancellation import JobCancelled
 
 router = APIRouter(
     prefix="/api",
@@ -26,20 +35,34 @@ class RunRequest(BaseModel):
     voice_reqs: str
     model_id: str
     image_data: Optional[str] = None
+    # Reuse phase checkpoints from your earlier runs with identical upstream inputs
+    reuse_checkpoints: bool = False
 
-def run_aura_background(job_id, user_id, image_path, user_desc, voice_reqs, model_id):
+def run_aura_background(job_id, user_id, image_path, user_desc, voice_reqs, model_id, resume=False, reuse_checkpoints=False):
+    """ Run one pipeline job to the end; returns the outcome: "done", "cancelled" or "failed" (see worker.py) """
+    cancel_token = cancellation.start(job_id)
     jobs[job_id]["is_running"] = True
     db = database.SessionLocal()
+    outcome = job_queue.FAILED
     try:
-        for update in run_direct_flow(image_path, user_desc, voice_reqs, model_id, job_id=job_id):
-            for k, v in update.items():
-                jobs[job_id][k] = v
+        with span("job.pipeline", job_id=job_id, model=model_id, resume=resume):
+            for update in run_direct_flow(
+                image_path, user_desc, voice_reqs, model_id, job_id=job_id,
+                resume=resume, checkpoint_scope=user_id if reuse_checkpoints else None,
+            ):
+                for k, v in update.items():
+                    jobs[job_id][k] = v
+                if "error" in update:
+                    # The flow reports a failed phase by yielding it and stopping; its checkpoints stay for resume.
+                    raise RuntimeError(update["error"])
+                cancel_token.raise_if_cancelled()
                 
         # Compress and Upload to Supabase Storage
         job_dir = os.path.join(PROJECT_ROOT, "jobs", job_id, "generated_project")
         if os.path.exists(job_dir):
             temp_zip = os.path.join(tempfile.gettempdir(), f"aura_{job_id}")
-            shutil.make_archive(temp_zip, 'zip', job_dir)
+            with span("job.archive", job_id=job_id):
+                shutil.make_archive(temp_zip, 'zip', job_dir)
             
             url = os.environ.get("SUPABASE_URL")
             key = os.environ.get("SUPABASE_KEY")
@@ -50,7 +73,7 @@ def run_aura_background(job_id, user_id, image_path, user_desc, voice_reqs, mode
                 try: supabase_client.storage.create_bucket("artifacts")
                 except Exception: pass
                 
-                with open(f"{temp_zip}.zip", "rb") as f:
+                with span("job.upload", job_id=job_id), open(f"{temp_zip}.zip", "rb") as f:
                     supabase_client.storage.from_("artifacts").upload(
                         path=f"{job_id}.zip",
                         file=f.read(),
@@ -58,63 +81,414 @@ def run_aura_background(job_id, user_id, image_path, user_desc, voice_reqs, mode
                     )
                 # Clean up local un-tracked HDD state
                 shutil.rmtree(os.path.join(PROJECT_ROOT, "jobs", job_id), ignore_errors=True)
+            else:
+                # The job may have run on a worker node; downloads are served from the shared blob directory.
+                job_blobs.store_archive(job_id, f"{temp_zip}.zip")
 
         crud.update_project_status(db, job_id, "Completed")
+        outcome = job_queue.DONE
+    except JobCancelled as e:
+        jobs[job_id]["status"] = str(e) or "Cancelled"
+        jobs[job_id]["cancelled"] = True
+        crud.update_project_status(db, job_id, "Cancelled")
+        outcome = job_queue.CANCELLED
+        # Checkpoints are kept, so the job can still be resumed later.
+        shutil.rmtree(os.path.join(PROJECT_ROOT, "jobs", job_id), ignore_errors=True)
     except Exception as e:
         jobs[job_id]["error"] = str(e)
         crud.update_project_status(db, job_id, "Failed")
     finally:
         jobs[job_id]["is_running"] = False
+        jobs[job_id]["done"] = True
+        release_job(job_id)
+        cancellation.release(job_id)
         db.close()
+    return outcome
 
 @router.post("/run")
 def run_aura(
     req: RunRequest, 
-    background_tasks: BackgroundTasks, 
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     CREDIT_COST = 10
-    if current_user.credit_balance < CREDIT_COST:
-        raise HTTPException(status_code=402, detail="Insufficient Aura Credits. Please recharge.")
-
     job_id = str(uuid.uuid4())
-    jobs[job_id] = {
-        "status": "Initializing Engine...",
+
+    image_bytes = None
+    if req.image_data:
+        header, encoded = req.image_data.split(",", 1) if "," in req.image_data else ("", req.image_data)
+        try:
+            image_bytes = base64.b64decode(encoded, validate=True)
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail="image_data is not valid base64.")
+
+    # The charge, the project and the queued job commit together: nothing that
+    # fails along the way can take the credits without starting the run.
+    try:
+        # Check and charge in one conditional UPDATE so concurrent runs cannot overdraw.
+        remaining_credits = crud.debit_credits(db, current_user.id, CREDIT_COST, reason="run", reference=job_id, commit=False)
+        if remaining_credits is None:
+            raise HTTPException(status_code=402, detail="Insufficient Aura Credits. Please recharge.")
+        crud.create_user_project(db, schemas.ProjectCreate(prompt_desc=req.user_desc), current_user.id, job_id, commit=False)
+        # Picked up by the next free queue worker (in this process or a worker node); the sketch travels in the row.
+        job_queue.enqueue(db, job_id, current_user.id, {
+            "user_desc": req.user_desc, "voice_reqs": req.voice_reqs,
+            "model_id": req.model_id, "resume": False, "reuse_checkpoints": req.reuse_checkpoints,
+        }, commit=False, sketch=image_bytes)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        auth.invalidate_user(user_id=current_user.id)
+    return {"message": "Started execution", "job_id": job_id, "remaining_credits": remaining_credits}
+
+@router.post("/projects/{job_id}/resume")
+def resume_project(
+    job_id: str,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """ Restart a failed or interrupted job from its first incomplete phase, without charging credits again """
+    project = crud.get_user_project(db, current_user.id, job_id)
+    if project is None:
+        raise HTTPException(status_code=403, detail="You do not own this project.")
+    if project.status == "Completed":
+        raise HTTPException(status_code=409, detail="Project already completed.")
+    if jobs.get(job_id, {}).get("is_running") or job_queue.is_pending(db, job_id):
+        raise HTTPException(status_code=409, detail="Job is still running.")
+    record = checkpoints.load_job(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="No checkpoints recorded for this job.")
+
+    inputs = record["inputs"]
+    resume_from = checkpoints.first_incomplete_phase(job_id)
+    crud.update_project_status(db, job_id, "Pending")
+    # The sketch stored with the job's queue row is kept.
+    job_queue.enqueue(db, job_id, current_user.id, {
+        "user_desc": inputs["user_desc"], "voice_reqs": inputs["voice_reqs"],
+        "model_id": inputs["model_id"], "resume": True, "reuse_checkpoints": bool(record.get("scope")),
+    })
+    return {"message": "Resumed execution", "job_id": job_id, "resume_from": resume_from}
+
+@router.post("/projects/{job_id}/cancel")
+def cancel_project(
+    job_id: str,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """ Stop a queued or running job: provider calls and backoff sleeps abort within seconds and the job directory is removed """
+    project = crud.get_user_project(db, current_user.id, job_id)
+    if project is None:
+        raise HTTPException(status_code=403, detail="You do not own this project.")
+    if project.status in ("Completed", "Failed", "Cancelled"):
+        raise HTTPException(status_code=409, detail="Job is not running.")
+    job = jobs.get(job_id)
+    queued = job_queue.request_cancel(db, job_id)
+    if queued == "cancelled":
+        # Never started: no worker will pick it up now.
+        crud.update_project_status(db, job_id, "Cancelled")
+        if job is not None:
+            job.update({"status": "Cancelled", "cancelled": True, "done": True})
+        return {"message": "Cancelled before start", "job_id": job_id}
+    if queued is None and not (job and job.get("is_running")):
+        raise HTTPException(status_code=409, detail="Job is not running.")
+    # A worker in this process stops right away; one on another node at its next lease heartbeat.
+    if job is not None and job.get("is_running"):
+        cancellation.cancel_job(job_id)
+    if job is not None:
+        job["status"] = "Cancelling..."
+    return {"message": "Cancellation requested", "job_id": job_id}
+
+@router.get("/projects", response_model=List[schemas.ProjectSummary])
+def list_projects(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """ Newest projects first; when more exist, pass the X-Next-Cursor response header back as ?cursor= """
+    try:
+        rows, next_cursor = crud.list_user_projects_page(db, current_user.id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+# STATUS
+# Every change to jobs[job_id] gets a new version (see state.JobState). Clients
+# can revalidate with ETag/If-None-Match, long-poll with ?wait= until the
+# version moves, fetch only the fields changed since a version, or subscribe
+# to an SSE stream of field-level patches. Jobs that no worker reports on to
+# this process are read from the broker snapshot or their job_queue row.
+MAX_STATUS_WAIT = 30.0
+SSE_HEARTBEAT_SECONDS = 15.0
+# How often an SSE stream of a queued job checks whether a worker picked it up.
+QUEUE_STATUS_POLL_SECONDS = 1.0
+
+def _published_fields(fields: dict) -> dict:
+    """ Fields from another worker's published status, with spilled blob references as loadable handles """
+    return {k: job_blobs.from_reference(v) for k, v in fields.items()}
+
+async def _remote_snapshot(job_id: str) -> Optional[dict]:
+    """ {"version", "fields"} last published by the worker running the job (multi-worker deployments) """
+    broker = pubsub.get_broker()
+    if not broker.remote:
+        return None
+    raw = await asyncio.to_thread(broker.get, pubsub.status_snapshot_key(job_id))
+    if not raw:
+        return None
+    snapshot = json.loads(raw)
+    snapshot["fields"] = _published_fields(snapshot["fields"])
+    return snapshot
+
+async def _queue_entry(job_id: str) -> Optional[models.JobQueue]:
+    async with database.AsyncSessionLocal() as db:
+        return await job_queue.get_entry_async(db, job_id)
+
+def _queued_fields(entry: models.JobQueue) -> dict:
+    """ Job state as far as the queue row tells it, for jobs no worker reports on to this process """
+    if entry.status == job_queue.QUEUED:
+        resume = json.loads(entry.payload).get("resume")
+        status = f"Waiting to retry (attempt {entry.attempts + 1} of {entry.max_attempts})..." if entry.attempts else (
+            "Queued to resume..." if resume else "Queued..."
+        )
+    else:
+        status = {
+            job_queue.LEASED: "Running on another worker...",
+            job_queue.DONE: "Completed",
+            job_queue.FAILED: "Failed",
+            job_queue.CANCELLED: "Cancelled",
+        }.get(entry.status, entry.status)
+    fields = {
+        "status": status,
         "progress": 0,
-        "is_running": False
+        "is_running": entry.status == job_queue.LEASED,
+        "queue_status": entry.status,
+        "done": entry.status in (job_queue.DONE, job_queue.FAILED, job_queue.CANCELLED),
     }
-    
-    image_path = None
-    if req.image_data:
-        image_path = os.path.join(PROJECT_ROOT, "backend", f"temp_sketch_{job_id}.png")
-        with open(image_path, "wb") as f:
-            header, encoded = req.image_data.split(",", 1) if "," in req.image_data else ("", req.image_data)
-            f.write(base64.b64decode(encoded))
-            
-    # Deduct credits and save project
-    crud.update_user_credits(db, current_user.id, -CREDIT_COST)
-    
-    proj_create = schemas.ProjectCreate(prompt_desc=req.user_desc) if 'schemas' in globals() else type("MockCreate", (object,), {"prompt_desc": req.user_desc})()
-    if not isinstance(proj_create, dict):
-        # Hotfix for imports inside modularity
-        import schemas
-        proj_create = schemas.ProjectCreate(prompt_desc=req.user_desc)
+    if entry.last_error:
+        fields["error"] = entry.last_error
+    if entry.status == job_queue.CANCELLED:
+        fields["cancelled"] = True
+    return fields
+
+async def _status_source(job_id: str):
+    """
+    Where the job's state is read from: ("local", JobState) while this process
+    runs it or holds its latest run, ("remote", {"version", "fields"}) when a
+    worker elsewhere publishes it, or ("queue", fields) from the queue row
+    while it waits for a worker (or no published state is available).
+    """
+    state = jobs.get(job_id)
+    if state is not None and not state.get("done"):
+        return "local", state
+    entry = await _queue_entry(job_id)
+    pending = entry is not None and entry.status in (job_queue.QUEUED, job_queue.LEASED)
+    if state is not None and not pending:
+        return "local", state
+    if entry is None or entry.status != job_queue.QUEUED:
+        # Queued jobs have no live state anywhere; a snapshot would be from an earlier run.
+        remote = await _remote_snapshot(job_id)
+        if remote is not None:
+            return "remote", remote
+    if entry is not None:
+        return "queue", _queued_fields(entry)
+    raise HTTPException(status_code=404, detail="Job not found in active running engine context")
+
+def _etag(version: int) -> str:
+    return f'W/"{version}"'
 
-    crud.create_user_project(db, proj_create, current_user.id, job_id)
+def _field_set(fields: Optional[str]) -> Optional[set]:
+    return {f.strip() for f in fields.split(",") if f.strip()} if fields else None
 
-    background_tasks.add_task(run_aura_background, job_id, current_user.id, image_path, req.user_desc, req.voice_reqs, req.model_id)
-    return {"message": "Started execution", "job_id": job_id, "remaining_credits": current_user.credit_balance - CREDIT_COST}
+async def _render(fields: dict, wanted: Optional[set]) -> dict:
+    """ Project to `wanted` (None = every field) and load the spilled ones it names from disk """
+    if wanted is not None and "*" not in wanted:
+        fields = {k: v for k, v in fields.items() if k in wanted}
+    if not wanted:
+        return JobState.view(fields)
+    return await asyncio.to_thread(JobState.view, fields, wanted)
 
-@router.get("/projects")
-def list_projects(db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_active_user)):
-    return crud.get_user_projects(db, current_user.id)
+def _version_from_etag(header: Optional[str]) -> Optional[int]:
+    if not header:
+        return None
+    try:
+        return int(header.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        return None
 
 @router.get("/status/{job_id}")
-def get_status(job_id: str):
-    if job_id not in jobs:
-        raise HTTPException(status_code=404, detail="Job not found in active running engine context")
-    return jobs[job_id]
+async def get_status(
+    job_id: str, request: Request, wait: float = Query(0, ge=0, le=MAX_STATUS_WAIT), fields: Optional[str] = None
+):
+    """
+    Job state with an ETag. With If-None-Match set to the current ETag the
+    answer is 304, after waiting up to `wait` seconds for a newer version.
+    Large fields are returned as {"spilled": true, "chars": n} unless named
+    in `fields` (comma separated, "*" for all), which also limits the response
+    to those fields.
+    """
+    known = _version_from_etag(request.headers.get("if-none-match"))
+    source, state = await _status_source(job_id)
+    if source == "queue":
+        # Not versioned until a worker picks the job up: no ETag, no long-poll.
+        body = {**await _render(state, _field_set(fields)), "version": 0}
+        return Response(json.dumps(body, default=str), media_type="application/json", headers={"Cache-Control": "no-cache"})
+    if source == "remote":
+        # Running on another worker: serve its last published snapshot (no long-poll).
+        headers = {"ETag": _etag(state["version"]), "Cache-Control": "no-cache"}
+        if known is not None and known >= state["version"]:
+            return Response(status_code=304, headers=headers)
+        body = {**await _render(state["fields"], _field_set(fields)), "version": state["version"]}
+        return Response(json.dumps(body, default=str), media_type="application/json", headers=headers)
+    if known is not None and known >= state.version and wait:
+        await state.wait_for_change(known, wait)
+    version, snapshot = state.snapshot()
+    headers = {"ETag": _etag(version), "Cache-Control": "no-cache"}
+    if known is not None and known >= version:
+        return Response(status_code=304, headers=headers)
+    body = {**await _render(snapshot, _field_set(fields)), "version": version}
+    return Response(json.dumps(body, default=str), media_type="application/json", headers=headers)
+
+@router.get("/status/{job_id}/changes")
+async def get_status_changes(
+    job_id: str, since: int = 0, wait: float = Query(0, ge=0, le=MAX_STATUS_WAIT), fields: Optional[str] = None
+):
+    """ Only the fields written after version `since`, waiting up to `wait` seconds for one; `fields` as for /status """
+    source, state = await _status_source(job_id)
+    if source == "queue":
+        return {"version": 0, "changes": await _render(state, _field_set(fields))}
+    if source == "remote":
+        changes = state["fields"] if state["version"] > since else {}
+        return {"version": state["version"], "changes": await _render(changes, _field_set(fields))}
+    if wait:
+        await state.wait_for_change(since, wait)
+    version, changes = state.changes_since(since)
+    return {"version": version, "changes": await _render(changes, _field_set(fields))}
+
+@router.get("/status/{job_id}/events")
+async def stream_status(job_id: str, request: Request, fields: Optional[str] = None):
+    """
+    Server-Sent Events: a `snapshot` of the job, then a `patch` event with the
+    changed fields after every update. Event ids are versions, so a reconnecting
+    EventSource resumes from Last-Event-ID. Ends after the job is done.
+    `fields` as for /status.
+    """
+    wanted = _field_set(fields)
+    since = _version_from_etag(request.headers.get("last-event-id"))
+    source, state = await _status_source(job_id)
+    if source == "local":
+        events = _local_events(job_id, state, request, wanted, since)
+    elif source == "remote":
+        events = _relay_remote_status(job_id, request, wanted, since or 0)
+    else:
+        events = _queued_events(job_id, state, request, wanted)
+    return StreamingResponse(
+        events, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _local_events(job_id: str, state: JobState, request: Request, wanted: Optional[set], since: Optional[int]):
+    """ SSE events for a job whose state lives in this process """
+    version = since or 0
+    event = "patch" if since else "snapshot"
+    while True:
+        if event == "snapshot":
+            version, changed = state.snapshot()
+        else:
+            version, changed = state.changes_since(version)
+        changed = await _render(changed, wanted)
+        if changed:
+            yield f"id: {version}\nevent: {event}\ndata: {json.dumps(changed, default=str)}\n\n"
+        event = "patch"
+        if state.get("done") or jobs.get(job_id) is not state:
+            yield "event: end\ndata: {}\n\n"
+            return
+        if await request.is_disconnected():
+            return
+        if not await state.wait_for_change(version, SSE_HEARTBEAT_SECONDS):
+            yield ": keep-alive\n\n"
+
+async def _queued_events(job_id: str, fields: dict, request: Request, wanted: Optional[set]):
+    """ SSE events for a job waiting in the queue: its queue state, then the picking worker's events """
+    yield f"event: snapshot\ndata: {json.dumps(await _render(fields, wanted), default=str)}\n\n"
+    idle = 0.0
+    while not fields.get("done"):
+        if await request.is_disconnected():
+            return
+        await asyncio.sleep(QUEUE_STATUS_POLL_SECONDS)
+        source, state = await _status_source(job_id)
+        if source == "local":
+            async for chunk in _local_events(job_id, state, request, wanted, None):
+                yield chunk
+            return
+        if source == "remote":
+            async for chunk in _relay_remote_status(job_id, request, wanted, 0):
+                yield chunk
+            return
+        changed = {k: v for k, v in state.items() if fields.get(k) != v}
+        fields = state
+        if changed:
+            idle = 0.0
+            yield f"event: patch\ndata: {json.dumps(await _render(changed, wanted), default=str)}\n\n"
+        else:
+            idle += QUEUE_STATUS_POLL_SECONDS
+            if idle >= SSE_HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+    yield "event: end\ndata: {}\n\n"
+
+async def _relay_remote_status(job_id: str, request: Request, wanted: Optional[set], since: int):
+    """ SSE events for a job running on another worker, from its broker snapshot and status channel """
+    loop = asyncio.get_running_loop()
+    patches: asyncio.Queue = asyncio.Queue()
+    # Subscribe before reading the snapshot so no patch falls in between.
+    unsubscribe = pubsub.get_broker().subscribe(
+        pubsub.status_channel(job_id), lambda _channel, message: loop.call_soon_threadsafe(patches.put_nowait, message)
+    )
+    try:
+        remote = await _remote_snapshot(job_id)
+        if remote is None:
+            yield "event: end\ndata: {}\n\n"
+            return
+        version = since
+        if remote["version"] > version:
+            version = remote["version"]
+            event = "patch" if since else "snapshot"
+            yield f"id: {version}\nevent: {event}\ndata: {json.dumps(await _render(remote['fields'], wanted), default=str)}\n\n"
+        done = bool(remote["fields"].get("done"))
+        while not done:
+            if await request.is_disconnected():
+                return
+            try:
+                patch = json.loads(await asyncio.wait_for(patches.get(), SSE_HEARTBEAT_SECONDS))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            done = bool(patch["changes"].get("done"))
+            if patch["version"] <= version:
+                continue
+            version = patch["version"]
+            changed = await _render(_published_fields(patch["changes"]), wanted)
+            if changed:
+                yield f"id: {version}\nevent: patch\ndata: {json.dumps(changed, default=str)}\n\n"
+        yield "event: end\ndata: {}\n\n"
+    finally:
+        unsubscribe()
+
+@router.get("/trace/{job_id}")
+def get_trace(job_id: str):
+    """ Timeline of the job's phases, provider calls, backoff sleeps and archive/upload steps as Chrome trace-event JSON """
+    if has_trace(job_id):
+        return export_chrome_trace(job_id)
+    # Run by a worker on another node: the trace it published when the job ended.
+    broker = pubsub.get_broker()
+    published = broker.get(pubsub.trace_key(job_id)) if broker.remote else None
+    if published is None:
+        raise HTTPException(status_code=404, detail="No trace recorded for this job in the active engine context")
+    return Response(published, media_type="application/json")
 
 @router.get("/projects/{job_id}/download")
 def download_project(
@@ -123,14 +497,17 @@ def download_project(
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     # Verify ownership
-    project = crud.get_user_projects(db, current_user.id)
-    if not any(p.id == job_id for p in project):
+    if not crud.user_owns_project(db, current_user.id, job_id):
         raise HTTPException(status_code=403, detail="You do not own this project.")
     
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_KEY")
     if not (url and key):
-        raise HTTPException(status_code=500, detail="Supabase Storage not configured.")
+        # Without Supabase the worker that ran the job stored the archive in the shared blob directory.
+        archive = job_blobs.archive_path(job_id)
+        if archive is None:
+            raise HTTPException(status_code=500, detail="Supabase Storage not configured.")
+        return FileResponse(archive, media_type='application/zip', filename=f"AuraProject_{job_id[:8]}.zip")
         
     try:
         from supabase import create_client
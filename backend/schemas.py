@@ -26,6 +26,16 @@ class Project(ProjectBase):
     class Config:
         from_attributes = True
 
+class ProjectSummary(BaseModel):
+    """ Row of the paginated project listing; prompt_desc is truncated to a preview """
+    id: str
+    status: str
+    created_at: datetime.datetime
+    prompt_desc: str
+
+    class Config:
+        from_attributes = True
+
 # --- User Schemas ---
 class UserBase(BaseModel):
     email: EmailStr
@@ -38,7 +48,8 @@ class User(UserBase):
     credit_balance: int
     is_active: bool
     created_at: datetime.datetime
-    projects: List[Project] = []
+    # Newest page only; /api/projects?cursor= continues from the X-Next-Cursor header
+    projects: List[ProjectSummary] = []
 
     class Config:
         from_attributes = True
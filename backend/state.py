@@ -1,6 +1,136 @@
-from typing import Dict, List
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import WebSocket
+import job_blobs
+import pubsub
 
 # Shared in-memory state decoupled from main.py to prevent circular imports
-jobs: Dict[str, dict] = {}
+
+# Versions come from one process-wide counter, so a job recreated under the
+# same id (resume) only ever moves forward and stale ETags/cursors never match.
+_versions = itertools.count(1)
+_versions_lock = threading.Lock()
+
+def _next_version() -> int:
+    with _versions_lock:
+        return next(_versions)
+
+# Set by enable_remote_status() when API workers share a pub/sub broker.
+_status_broker: Optional[pubsub.Broker] = None
+# Seconds a finished job's last published snapshot stays readable by other workers.
+STATUS_SNAPSHOT_TTL = 24 * 3600
+
+def enable_remote_status(broker: pubsub.Broker) -> None:
+    """ Publish every job state change, so /status and SSE on other workers can serve the job """
+    global _status_broker
+    _status_broker = broker
+
+def _publish_change(state: "JobState", version: int, key: str, value: Any) -> None:
+    broker = _status_broker
+    if broker is None or state.job_id is None:
+        return
+    # Spilled fields go out as blob references; readers turn them back into handles with job_blobs.from_reference.
+    patch = {"version": version, "changes": {key: job_blobs.reference(value)}}
+    broker.publish(pubsub.status_channel(state.job_id), json.dumps(patch, default=str))
+    snapshot_version, fields = state.snapshot()
+    snapshot = {"version": snapshot_version, "fields": {k: job_blobs.reference(v) for k, v in fields.items()}}
+    broker.set(pubsub.status_snapshot_key(state.job_id), json.dumps(snapshot, default=str), ttl=STATUS_SNAPSHOT_TTL)
+
+class JobState(dict):
+    """
+    A job's status dict that records a version for every change. Writers keep
+    using plain item assignment (from the pipeline's worker thread); readers
+    take consistent snapshots, diffs since a version, or await the next change.
+    Long strings are spilled to job_blobs and held as SpilledText handles.
+    """
+
+    def __init__(self, values: Optional[dict] = None, job_id: Optional[str] = None):
+        super().__init__()
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self.version = _next_version()
+        self._field_versions: Dict[str, int] = {}
+        self.update(values or {})
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self.job_id and job_blobs.should_spill(value):
+            value = job_blobs.spill(self.job_id, key, value)
+        with self._lock:
+            # Unchanged scalars are not a change; containers may have been mutated in place.
+            if key in self and isinstance(value, (str, int, float, bool, type(None))) and dict.__getitem__(self, key) == value:
+                return
+            super().__setitem__(key, value)
+            self.version = self._field_versions[key] = version = _next_version()
+            waiters, self._waiters = self._waiters, []
+        _publish_change(self, version, key, value)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # the waiting request's loop has closed
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            return self.version, dict(self)
+
+    def changes_since(self, version: int) -> Tuple[int, Dict[str, Any]]:
+        """ (current version, fields written after `version`) """
+        with self._lock:
+            return self.version, {key: self[key] for key, v in self._field_versions.items() if v > version}
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """ Wait until the state is newer than `version`; False on timeout """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._lock:
+            if self.version > version:
+                return True
+            self._waiters.append((loop, event))
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self.version > version
+        finally:
+            with self._lock:
+                if (loop, event) in self._waiters:
+                    self._waiters.remove((loop, event))
+
+    @staticmethod
+    def view(fields: Dict[str, Any], include: Optional[set] = None) -> Dict[str, Any]:
+        """
+        JSON-ready copy of snapshot/changes output. Spilled fields are loaded
+        from disk when named in `include` ("*" loads all) and otherwise shown
+        as small {"spilled": true, "chars": n} handles.
+        """
+        include = include or set()
+        load_all = "*" in include
+        return {
+            key: job_blobs.materialize(value) if load_all or key in include else job_blobs.describe(value)
+            for key, value in fields.items()
+        }
+
+class JobStore(dict):
+    """ jobs[job_id] = {...} stores the dict as a versioned JobState """
+
+    def __setitem__(self, job_id: str, value: dict) -> None:
+        super().__setitem__(job_id, value if isinstance(value, JobState) else JobState(value, job_id=job_id))
+
+    def get_state(self, job_id: str) -> Optional[JobState]:
+        return self.get(job_id)
+
+jobs: Dict[str, JobState] = JobStore()
 connected_clients: Dict[str, List[WebSocket]] = {}
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import socket
+import tempfile
+import itertools
+import threading
+
+# Standalone use (python backend/worker.py) needs the same import paths as main.py.
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database, crud, job_queue, job_blobs
+import state
+from state import jobs
+from routers.project_router import run_aura_background
+from logger_config import get_logger, job_id_var
+from tracing import has_trace, export_chrome_trace
+import cancellation
+import pubsub
+
+# QUEUE WORKERS
+# Each QueueWorker thread claims one job at a time from job_queue and runs it
+# with run_aura_background. The API process starts AURA_INPROCESS_WORKERS of
+# them; dedicated worker nodes run `python backend/worker.py` against the same
+# database. While a job runs, a heartbeat extends its lease every third of
+# LEASE_SECONDS and picks up cancellations requested through other nodes.
+# The sketch comes from the queue row and is written to a local temp file for
+# the run; with a remote broker the job's trace is published when it ends.
+
+POLL_INTERVAL = float(os.getenv("AURA_QUEUE_POLL_INTERVAL", "1"))
+INPROCESS_WORKERS = int(os.getenv("AURA_INPROCESS_WORKERS", "4"))
+
+logger = get_logger("aura_worker")
+_worker_ids = itertools.count(1)
+
+
+class QueueWorker(threading.Thread):
+    def __init__(self, stop_event: threading.Event = None):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{next(_worker_ids)}"
+        super().__init__(name=f"queue-worker-{self.worker_id}", daemon=True)
+        self.stop_event = stop_event or threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                ran = self.run_once()
+            except Exception as e:
+                logger.error(f"Queue worker {self.worker_id} failed to poll: {e}")
+                ran = False
+            if not ran:
+                self.stop_event.wait(POLL_INTERVAL)
+
+    def run_once(self) -> bool:
+        """ Claim and run one job; False when the queue had nothing runnable """
+        with database.SessionLocal() as db:
+            entry = job_queue.claim(db, self.worker_id)
+            if entry is None:
+                return False
+            job_id, user_id, attempt = entry.id, entry.user_id, entry.attempts
+            payload = json.loads(entry.payload)
+            sketch = entry.sketch
+            crud.update_project_status(db, job_id, "Running")
+
+        self._prepare_state(job_id, attempt)
+        # An earlier attempt may have completed phases before its worker died.
+        resume = bool(payload.get("resume")) or attempt > 1
+        logger.info(f"Worker {self.worker_id} running job {job_id} (attempt {attempt}, resume={resume})")
+
+        image_path = self._write_sketch(job_id, sketch) if sketch else None
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stop_heartbeat), daemon=True)
+        heartbeat.start()
+        outcome, error = job_queue.FAILED, None
+        # The pipeline sets job_id_var in this thread; put it back so the next claim starts clean.
+        context = job_id_var.set(job_id)
+        try:
+            outcome = run_aura_background(
+                job_id, user_id, image_path, payload["user_desc"], payload.get("voice_reqs"),
+                payload["model_id"], resume=resume, reuse_checkpoints=bool(payload.get("reuse_checkpoints")),
+            )
+            if outcome == job_queue.FAILED:
+                # A long error is held as a SpilledText handle; last_error stores the text.
+                error = job_blobs.materialize(jobs[job_id].get("error"))
+        except Exception as e:
+            error = str(e)
+        finally:
+            job_id_var.reset(context)
+            stop_heartbeat.set()
+            heartbeat.join()
+            if image_path:
+                try:
+                    os.remove(image_path)
+                except OSError:
+                    pass
+            self._publish_trace(job_id)
+            with database.SessionLocal() as db:
+                if not job_queue.finish(db, job_id, self.worker_id, outcome, error=error):
+                    logger.warning(f"Worker {self.worker_id} lost the lease on job {job_id}; result not recorded")
+        return True
+
+    def _prepare_state(self, job_id: str, attempt: int) -> None:
+        # Recovered or remotely queued jobs have no entry in this process yet.
+        status = "Initializing Engine..." if attempt == 1 else f"Retrying (attempt {attempt})..."
+        if job_id not in jobs or jobs[job_id].get("done"):
+            jobs[job_id] = {"status": status, "progress": 0, "is_running": False}
+
+    def _write_sketch(self, job_id: str, sketch: bytes) -> str:
+        path = os.path.join(tempfile.gettempdir(), f"aura_sketch_{job_id}_{self.worker_id}.png")
+        with open(path, "wb") as f:
+            f.write(sketch)
+        return path
+
+    def _publish_trace(self, job_id: str) -> None:
+        # Lets /api/trace on the API nodes serve jobs run here.
+        broker = pubsub.get_broker()
+        if broker.remote and has_trace(job_id):
+            broker.set(pubsub.trace_key(job_id), json.dumps(export_chrome_trace(job_id)), ttl=state.STATUS_SNAPSHOT_TTL)
+
+    def _heartbeat(self, job_id: str, stop: threading.Event) -> None:
+        while not stop.wait(job_queue.LEASE_SECONDS / 3):
+            try:
+                with database.SessionLocal() as db:
+                    owned, cancel_requested = job_queue.heartbeat(db, job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+                continue
+            if not owned:
+                # Another worker may already be rerunning it; this attempt's result will be discarded.
+                logger.warning(f"Worker {self.worker_id} no longer holds the lease on job {job_id}")
+                return
+            if cancel_requested:
+                cancellation.cancel_job(job_id)
+
+
+def start_workers(count: int = INPROCESS_WORKERS, stop_event: threading.Event = None) -> list:
+    """ Start `count` queue worker threads sharing one stop event """
+    stop_event = stop_event or threading.Event()
+    workers = [QueueWorker(stop_event) for _ in range(count)]
+    for w in workers:
+        w.start()
+    return workers
+
+
+if __name__ == "__main__":
+    import argparse
+    import models
+    from logger_config import set_remote_sink
+
+    parser = argparse.ArgumentParser(description="Run Aura pipeline jobs from the shared job queue")
+    parser.add_argument("--workers", type=int, default=INPROCESS_WORKERS, help="Concurrent jobs on this node")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=database.engine)
+    broker = pubsub.get_broker()
+    if broker.remote:
+        # Lets the API nodes stream this node's logs and job status.
+        set_remote_sink(lambda job_id, line: broker.publish(pubsub.log_channel(job_id), line))
+        state.enable_remote_status(broker)
+
+    stop = threading.Event()
+    workers = start_workers(args.workers, stop)
+    logger.info(f"Started {len(workers)} queue workers")
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+        # Running jobs are abandoned; their leases lapse and another worker resumes them.
@@ -0,0 +1,119 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+from logger_config import job_id_var
+
+# Cooperative cancellation for pipeline jobs. Each run registers a fresh token
+# with start() and drops it with release(); the API cancels the registered one;
+# run_direct_flow checks it between phases, before every provider attempt and
+# while sleeping through backoffs, and registered abort callbacks (e.g. closing
+# the job's HTTP clients) interrupt provider requests already in flight.
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a cancelled job. Derives from BaseException, like
+    asyncio.CancelledError, so the pipeline's broad `except Exception`
+    retry and fallback handlers do not swallow it.
+    """
+
+
+class CancelToken:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Cancelled by user") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled(self.reason)
+
+    def sleep(self, seconds: float) -> None:
+        """time.sleep that wakes up and raises JobCancelled as soon as the job is cancelled."""
+        if self._event.wait(seconds):
+            raise JobCancelled(self.reason)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run callback when the job is cancelled (immediately if it already is).
+        Returns a function that unregisters it again.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+
+_TOKENS: Dict[str, CancelToken] = {}
+_TOKENS_LOCK = threading.Lock()
+
+
+def start(job_id: str) -> CancelToken:
+    """Register a fresh token for a run that is starting, replacing one left over from an earlier run."""
+    with _TOKENS_LOCK:
+        token = _TOKENS[job_id] = CancelToken(job_id)
+        return token
+
+
+def token_for(job_id: str) -> CancelToken:
+    """
+    The token of the job's registered run. Ids without one ("global", crew
+    flows, finished jobs) get a fresh unregistered token that nothing can
+    cancel, so lookups never grow the registry.
+    """
+    with _TOKENS_LOCK:
+        token = _TOKENS.get(job_id)
+    return token if token is not None else CancelToken(job_id)
+
+
+def current_token() -> CancelToken:
+    """Token of the job in the current context (see logger_config.job_id_var)."""
+    return token_for(job_id_var.get())
+
+
+def cancel_job(job_id: str, reason: str = "Cancelled by user") -> bool:
+    """
+    Cancel the job's registered run. A no-op returning False when none is
+    registered, so a late cancel cannot leave a cancelled token behind for
+    the job's next run.
+    """
+    with _TOKENS_LOCK:
+        token = _TOKENS.get(job_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+
+def release(job_id: str) -> None:
+    """Forget a finished job's token."""
+    with _TOKENS_LOCK:
+        _TOKENS.pop(job_id, None)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Phase checkpoints for run_direct_flow. Every completed phase's output is
+# persisted so that a failed or interrupted job can resume from its first
+# incomplete phase, and a new run with identical inputs can reuse upstream
+# phases instead of paying for them again.
+#
+# Layout under AURA_CHECKPOINT_DIR:
+#   jobs/<job_id>/job.json        inputs of the job and its reuse scope
+#   jobs/<job_id>/<phase>.json    {"phase", "input_hash", "output", "ts"}
+#   index/<scope>/<phase>-<input_hash>.json -> {"job_id"} of a job holding that checkpoint
+#
+# A phase's input hash covers the phase name and every value its prompt is
+# built from, so upstream outputs chain into downstream keys: a checkpoint
+# only matches when everything it was derived from is identical.
+
+PHASES = ("vision", "architect", "developer", "debug", "optimization", "cognitive", "sustainability")
+
+_BASE_DIR = os.getenv("AURA_CHECKPOINT_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints")
+
+# Checkpoints of jobs untouched for this many days are pruned.
+CHECKPOINT_TTL_DAYS = float(os.getenv("AURA_CHECKPOINT_TTL_DAYS", "7"))
+_PRUNE_EVERY = 3600.0
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def _job_dir(job_id: str) -> str:
+    return os.path.join(_BASE_DIR, "jobs", job_id)
+
+
+def _index_path(scope: str, phase: str, input_hash: str) -> str:
+    return os.path.join(_BASE_DIR, "index", scope, f"{phase}-{input_hash}.json")
+
+
+def _write_json(path: str, payload: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def file_digest(path: Optional[str]) -> str:
+    """sha256 of a file's bytes, or "" when there is no file."""
+    if not path or not os.path.exists(path):
+        return ""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_hash(phase: str, *inputs: str) -> str:
+    digest = hashlib.sha256(phase.encode("utf-8"))
+    for value in inputs:
+        data = (value or "").encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """The inputs recorded for a job by PhaseCheckpoints, or None."""
+    return _read_json(os.path.join(_job_dir(job_id), "job.json"))
+
+
+def completed_phases(job_id: str) -> Dict[str, str]:
+    """{phase: input_hash} of every checkpoint stored for a job."""
+    phases: Dict[str, str] = {}
+    try:
+        names = os.listdir(_job_dir(job_id))
+    except OSError:
+        return phases
+    for name in names:
+        if name.endswith(".json") and name != "job.json":
+            record = _read_json(os.path.join(_job_dir(job_id), name))
+            if record:
+                phases[record["phase"]] = record["input_hash"]
+    return phases
+
+
+def first_incomplete_phase(job_id: str) -> Optional[str]:
+    """The phase a resume of this job starts at, or None when every phase is checkpointed."""
+    done = completed_phases(job_id)
+    for phase in PHASES:
+        if phase not in done:
+            return phase
+    return None
+
+
+def prune(max_age_days: float = CHECKPOINT_TTL_DAYS) -> int:
+    """Remove job checkpoints and index entries older than max_age_days; returns jobs removed."""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    jobs_dir = os.path.join(_BASE_DIR, "jobs")
+    for job_id in os.listdir(jobs_dir) if os.path.isdir(jobs_dir) else []:
+        path = os.path.join(jobs_dir, job_id)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    index_dir = os.path.join(_BASE_DIR, "index")
+    for root, _, files in os.walk(index_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            pointer = _read_json(path)
+            if pointer is None or not os.path.isdir(_job_dir(pointer.get("job_id", ""))):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    return removed
+
+
+def _maybe_prune() -> None:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < _PRUNE_EVERY and _last_prune:
+            return
+        _last_prune = time.monotonic()
+    try:
+        prune()
+    except OSError:
+        pass
+
+
+class PhaseCheckpoints:
+    """
+    Checkpoint store for one run of run_direct_flow.
+
+    With resume=True, phases already checkpointed by this job are reused.
+    With a scope (e.g. the owning user's id), checkpoints written by other
+    jobs in the same scope are reused too; scopes keep users' outputs apart.
+    Without either, checkpoints are only written, never read.
+    """
+
+    def __init__(self, job_id: str, inputs: Dict[str, Any], resume: bool = False, scope: Optional[str] = None):
+        self.job_id = job_id
+        self.resume = resume
+        self.scope = scope
+        self.enabled = job_id != "global"
+        if self.enabled:
+            _maybe_prune()
+            record = load_job(job_id) or {}
+            record.update({"inputs": inputs, "scope": scope, "updated": time.time()})
+            _write_json(os.path.join(_job_dir(job_id), "job.json"), record)
+
+    def load(self, phase: str, key: str) -> Optional[str]:
+        """Return the stored output of `phase` for input hash `key`, if it may be reused."""
+        if not self.enabled:
+            return None
+        if self.resume:
+            record = _read_json(os.path.join(_job_dir(self.job_id), f"{phase}.json"))
+            if record and record.get("input_hash") == key:
+                return record["output"]
+        if self.scope:
+            pointer = _read_json(_index_path(self.scope, phase, key))
+            if pointer:
+                record = _read_json(os.path.join(_job_dir(pointer["job_id"]), f"{phase}.json"))
+                if record and record.get("input_hash") == key:
+                    if pointer["job_id"] != self.job_id:
+                        # Copy into this job so its own resume does not depend on the other job.
+                        self.save(phase, key, record["output"])
+                    return record["output"]
+        return None
+
+    def save(self, phase: str, key: str, output: str) -> None:
+        if not self.enabled:
+            return
+        _write_json(
+            os.path.join(_job_dir(self.job_id), f"{phase}.json"),
+            {"phase": phase, "input_hash": key, "output": output, "ts": time.time()},
+        )
+        if self.scope:
+            _write_json(_index_path(self.scope, phase, key), {"job_id": self.job_id})
@@ -0,0 +1,81 @@
+import os
+import sys
+import uuid
+import tempfile
+import pytest
+
+# Backend tests run against a throwaway SQLite database and state directories;
+# these must be set before any backend module is imported.
+_TMP = tempfile.mkdtemp(prefix="aura_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'aura_saas.db')}"
+os.environ["AURA_CHECKPOINT_DIR"] = os.path.join(_TMP, "checkpoints")
+os.environ["AURA_JOB_BLOB_DIR"] = os.path.join(_TMP, "job_blobs")
+os.environ["AURA_MEMORY_DIR"] = os.path.join(_TMP, "memory")
+os.environ["AURA_INPROCESS_WORKERS"] = "0"  # tests drive QueueWorker.run_once themselves
+os.environ["AURA_BCRYPT_ROUNDS"] = "4"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def user():
+    """ A fresh account with the signup credit balance """
+    import crud, database, models, schemas
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        return crud.create_user(db, schemas.UserCreate(email=f"{uuid.uuid4().hex[:12]}@example.com", password="hunter22"))
+
+
+@pytest.fixture
+def auth_headers(user):
+    import auth
+    return {"Authorization": f"Bearer {auth.create_access_token(data={'sub': user.email})}"}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    """
+    Replaces provider calls with canned per-phase answers. Returns the list of
+    agent roles called; add a role to fake_llm.failing to make its phase fail.
+    """
+    import direct_flow
+    monkeypatch.chdir(tmp_path)  # run_direct_flow writes jobs/<id>/ relative to the cwd
+
+    class Calls(list):
+        pass
+
+    calls = Calls()
+    calls.failing = set()
+
+    def generate(client, model_id, prompt, *args, **kwargs):
+        role = prompt.split("ROLE:", 1)[1].splitlines()[0].strip()
+        calls.append(role)
+        if role in calls.failing:
+            raise RuntimeError(f"{role} provider unavailable")
+        if role == "Developer Agent":
+            return "---FILE_START---\napp.py|print('hello')\n---FILE_END---"
+        return f"{role} report"
+
+    monkeypatch.setattr(direct_flow, "safe_generate", generate)
+    return calls
+
+
+@pytest.fixture(autouse=True)
+def empty_job_queue():
+    """ Jobs left queued by one test must not be claimed by the next test's worker """
+    yield
+    if "job_queue" in sys.modules:
+        import database, models
+        models.Base.metadata.create_all(bind=database.engine)
+        with database.SessionLocal() as db:
+            db.query(models.JobQueue).delete()
+            db.commit()
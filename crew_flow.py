@@ -112,6 +112,7 @@ def run_aura_crew(image_path, user_desc, voice_reqs, model_choice=None, status_o
             "summary": f"New Aura-Dev run started for goal='{user_desc}'",
             "image_path": image_path,
         },
+        shared=True,
     )
 
     yield {"status": "🚀 CrewAI: Orchestrating multi-agent Aura-Dev workflow...", "progress": 5}
@@ -150,6 +151,7 @@ def run_aura_crew(image_path, user_desc, voice_reqs, model_choice=None, status_o
                 "kind": "run_complete",
                 "summary": f"Aura-Dev run completed for goal='{user_desc}'",
             },
+            shared=True,
         )
 
         final_update = {
@@ -181,5 +183,6 @@ def run_aura_crew(image_path, user_desc, voice_reqs, model_choice=None, status_o
                 "kind": "run_error",
                 "summary": f"CrewAI workflow failed: {str(e)}",
             },
+            shared=True,
         )
         yield {"error": f"CrewAI Workflow failed: {str(e)}\n\nTraceback:\n{err_trace}"}
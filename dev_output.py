@@ -0,0 +1,330 @@
+import hashlib
+import os
+import re
+import uuid
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# Single-pass parser for the Developer Agent's output format:
+#
+#   ---FILE_START---
+#   path/to/file.py|```python
+#   ...code...
+#   ```
+#   ---FILE_END---
+#
+# The parser consumes a string or a stream of chunks, finds markers with
+# str.find from a moving position (no split copies of the whole output) and
+# hands each file body to a sink as it goes, so files can be streamed to disk.
+
+FILE_START = "---FILE_START---"
+FILE_END = "---FILE_END---"
+# Characters held back between feeds in case a marker straddles two chunks.
+_HOLDBACK = max(len(FILE_START), len(FILE_END)) - 1
+# Longest header (text between FILE_START and '|') accepted as a path.
+MAX_HEADER_CHARS = 1024
+
+_OPEN_FENCE = re.compile(r"^[ \t]*(`{3,}|~{3,})[^`\n]*$")
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    offset: int  # byte offset of the raw file body in the developer output
+    length: int  # byte length of the raw body
+    size: int  # bytes written after the wrapping fence is removed
+    sha256: str
+
+
+def _byte_len(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class _FenceStripper:
+    """
+    Removes the code fence wrapping a file body while it streams through.
+    Only the outer fence is removed: the opening line must be a fence, and the
+    closing fence is the last non-blank line, so fences nested inside the file
+    (e.g. a README's ```bash blocks) are kept. Trailing whitespace is trimmed
+    and a single final newline written.
+    """
+
+    def __init__(self, emit):
+        self._emit = emit
+        self._started = False
+        self._fence: Optional[str] = None
+        self._pending = ""
+
+    def write(self, text: str) -> None:
+        data = self._pending + text if self._pending else text
+        if not self._started:
+            stripped = data.lstrip()
+            newline = stripped.find("\n")
+            if newline == -1:
+                self._pending = data
+                return
+            self._started = True
+            match = _OPEN_FENCE.match(stripped[:newline])
+            if match:
+                self._fence = match.group(1)
+                data = stripped[newline + 1:]
+            else:
+                data = data.lstrip("\r\n")
+        # Hold back the last non-blank line and what follows it: it may be the closing fence.
+        cut = len(data)
+        while True:
+            nl = data.rfind("\n", 0, cut)
+            if nl == -1 or data[nl + 1:cut].strip():
+                break
+            cut = nl
+        if nl == -1:
+            self._pending = data
+            return
+        # Blank lines before it are held back too, so they can be trimmed if they end the file.
+        end = len(data[:nl + 1].rstrip())
+        if not end:
+            self._pending = data
+            return
+        end = data.index("\n", end) + 1
+        self._emit(data[:end])
+        self._pending = data[end:]
+
+    def close(self) -> None:
+        tail = self._pending.rstrip()
+        if not self._started:
+            tail = tail.lstrip()
+            newline = tail.find("\n")
+            first = tail if newline == -1 else tail[:newline]
+            match = _OPEN_FENCE.match(first)
+            if match:
+                self._fence = match.group(1)
+                tail = "" if newline == -1 else tail[newline + 1:].rstrip()
+        if self._fence and tail.endswith(self._fence):
+            # Closing fence on its own line, or glued to the last line of code.
+            tail = tail.rstrip(self._fence[0]).rstrip()
+        if tail:
+            self._emit(tail + "\n")
+        self._pending = ""
+
+
+class MemorySink:
+    """Collects parsed files in memory as (path, content) pairs."""
+
+    def __init__(self):
+        self.files: List[Tuple[str, str]] = []
+        self._path: Optional[str] = None
+        self._parts: List[str] = []
+        self._size = 0
+        self._hash = None
+
+    def begin(self, path: str) -> bool:
+        self._path, self._parts, self._size, self._hash = path, [], 0, hashlib.sha256()
+        return True
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._size += len(data)
+        self._parts.append(text)
+
+    def commit(self) -> Tuple[int, str]:
+        self.files.append((self._path, "".join(self._parts)))
+        self._parts = []
+        return self._size, self._hash.hexdigest()
+
+    def abort(self) -> None:
+        self._parts = []
+
+
+class AtomicFileSink:
+    """
+    Streams each file to a temporary file next to its target and renames it
+    into place on commit, so readers never see a half-written file. Paths
+    that would escape the project directory are refused.
+    """
+
+    def __init__(self, project_dir: str):
+        self.base_dir = os.path.abspath(project_dir)
+        self._tmp = None
+        self._target = None
+        self._size = 0
+        self._hash = None
+
+    def begin(self, path: str) -> bool:
+        target = os.path.abspath(os.path.join(self.base_dir, path))
+        if not path or not target.startswith(self.base_dir + os.sep):
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # os.open rather than mkstemp so the file gets the usual umask-based mode.
+        tmp_path = os.path.join(os.path.dirname(target), f".aura_tmp_{uuid.uuid4().hex}")
+        self._tmp = os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), "wb")
+        self._tmp_path, self._target = tmp_path, target
+        self._size, self._hash = 0, hashlib.sha256()
+        return True
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._size += len(data)
+        self._tmp.write(data)
+
+    def commit(self) -> Tuple[int, str]:
+        self._tmp.close()
+        self._tmp = None
+        os.replace(self._tmp_path, self._target)
+        return self._size, self._hash.hexdigest()
+
+    def abort(self) -> None:
+        if self._tmp is not None:
+            self._tmp.close()
+            self._tmp = None
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+
+
+_OUTSIDE, _HEADER, _BODY = range(3)
+
+
+class DevOutputParser:
+    """
+    Incremental FILE_START/FILE_END parser. Call feed() with chunks (or once
+    with the whole output) and close() at the end; completed files are listed
+    in `manifest`. Blocks without a '|' separator or without FILE_END are
+    skipped, and a FILE_START inside an unterminated block starts a new one.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.manifest: List[ManifestEntry] = []
+        self._buf = ""
+        self._pos = 0
+        self._offset = 0  # bytes of output before self._pos
+        self._state = _OUTSIDE
+        self._header: List[str] = []
+        self._header_len = 0
+        self._path: Optional[str] = None
+        self._body_offset = 0
+        self._stripper: Optional[_FenceStripper] = None
+
+    def _advance(self, to: int) -> str:
+        text = self._buf[self._pos:to]
+        self._offset += _byte_len(text)
+        self._pos = to
+        return text
+
+    def feed(self, chunk: str) -> None:
+        if self._pos:
+            self._buf = self._buf[self._pos:] + chunk
+            self._pos = 0
+        else:
+            self._buf += chunk
+        self._parse(final=False)
+
+    def close(self) -> List[ManifestEntry]:
+        self._parse(final=True)
+        if self._state == _BODY and self._stripper is not None:
+            self.sink.abort()
+        self._state = _OUTSIDE
+        self._buf, self._pos = "", 0
+        return self.manifest
+
+    def _parse(self, final: bool) -> None:
+        buf = self._buf
+        safe = len(buf) if final else max(self._pos, len(buf) - _HOLDBACK)
+        while True:
+            pos = self._pos
+            stop = max(pos, safe)
+            if self._state == _OUTSIDE:
+                start = buf.find(FILE_START, pos)
+                if start == -1:
+                    self._advance(stop)
+                    return
+                self._advance(start + len(FILE_START))
+                self._state, self._header, self._header_len = _HEADER, [], 0
+
+            elif self._state == _HEADER:
+                bar = buf.find("|", pos)
+                end = buf.find(FILE_END, pos, bar if bar != -1 else len(buf))
+                restart = buf.find(FILE_START, pos, bar if bar != -1 else len(buf))
+                if restart != -1 and (end == -1 or restart < end):
+                    self._advance(restart)
+                    self._state = _OUTSIDE
+                elif end != -1:
+                    self._advance(end + len(FILE_END))
+                    self._state = _OUTSIDE
+                elif bar != -1:
+                    self._header.append(self._advance(bar))
+                    self._advance(bar + 1)
+                    self._begin_file("".join(self._header).strip().strip("`").strip())
+                else:
+                    piece = self._advance(stop)
+                    self._header.append(piece)
+                    self._header_len += len(piece)
+                    if self._header_len > MAX_HEADER_CHARS:
+                        self._state = _OUTSIDE
+                    return
+
+            else:
+                end = buf.find(FILE_END, pos)
+                restart = buf.find(FILE_START, pos, end if end != -1 else len(buf))
+                if restart != -1:
+                    # Unterminated block: drop it and start over at the new marker.
+                    self._advance(restart)
+                    if self._stripper is not None:
+                        self.sink.abort()
+                        self._stripper = None
+                    self._state = _OUTSIDE
+                elif end != -1:
+                    self._write_body(end)
+                    self._finish_file()
+                    self._advance(end + len(FILE_END))
+                    self._state = _OUTSIDE
+                else:
+                    self._write_body(stop)
+                    return
+
+    def _begin_file(self, path: str) -> None:
+        self._path = path
+        self._body_offset = self._offset
+        self._stripper = _FenceStripper(self.sink.write) if self.sink.begin(path) else None
+        self._state = _BODY
+
+    def _write_body(self, to: int) -> None:
+        text = self._advance(to)
+        if text and self._stripper is not None:
+            self._stripper.write(text)
+
+    def _finish_file(self) -> None:
+        if self._stripper is None:
+            return
+        self._stripper.close()
+        size, digest = self.sink.commit()
+        self.manifest.append(
+            ManifestEntry(self._path, self._body_offset, self._offset - self._body_offset, size, digest)
+        )
+        self._stripper = None
+
+
+def parse_dev_output(dev_output: Union[str, Iterable[str]]) -> List[Tuple[str, str]]:
+    """Parse developer output (a string or an iterable of chunks) into (filename, code) pairs."""
+    sink = MemorySink()
+    _run(DevOutputParser(sink), dev_output)
+    return sink.files
+
+
+def write_dev_output(dev_output: Union[str, Iterable[str]], project_dir: str) -> List[ManifestEntry]:
+    """Parse developer output and write every file atomically under project_dir; returns the manifest."""
+    return _run(DevOutputParser(AtomicFileSink(project_dir)), dev_output)
+
+
+def _run(parser: DevOutputParser, dev_output: Union[str, Iterable[str]]) -> List[ManifestEntry]:
+    try:
+        if isinstance(dev_output, str):
+            parser.feed(dev_output)
+        else:
+            for chunk in dev_output:
+                parser.feed(chunk)
+        return parser.close()
+    finally:
+        # No-op after a clean close; otherwise removes the half-written temp file.
+        parser.sink.abort()
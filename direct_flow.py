@@ -9,9 +9,21 @@ from openai import OpenAI
 from PIL import Image
 from dotenv import load_dotenv
 import shutil
+from contextlib import nullcontext
+from metrics import PHASE_DURATION, LLM_LATENCY, LLM_REQUESTS, classify_llm_error
+from tracing import span
+from dev_output import write_dev_output
+from checkpoints import PhaseCheckpoints, file_digest, input_hash
+from cancellation import JobCancelled, current_token
 
 load_dotenv()
 
+# Provider endpoints and backoff delays. Overridable so the pipeline can be
+# pointed at scripts/mock_llm_server.py for offline benchmarks.
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+GOOGLE_API_ENDPOINT = os.getenv("GOOGLE_API_ENDPOINT")
+RETRY_BASE_DELAY = float(os.getenv("AURA_RETRY_BASE_DELAY", "10"))
+FAILOVER_DELAY = float(os.getenv("AURA_FAILOVER_DELAY", "3"))
 
 # High-resilience key and model rotation
 VISION_MODELS = [
@@ -32,18 +44,27 @@ def encode_image(image_path):
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode('utf-8')
 
-def safe_generate(client, model_id, prompt, is_openai, image_path=None, api_key=None):
+def safe_generate(client, model_id, prompt, is_openai, image_path=None, api_key=None, provider="google", key_label="-"):
     """
     Helper to generate content with built-in retry logic and fallback signaling.
     Now hardened with Nuclear-Tier error detection (503s, 500s, 429s).
+    provider/key_label only label the latency and error metrics of each call.
+    Honours the current job's cancel token: OpenAI-compatible requests in flight
+    are aborted by closing the client, and backoff sleeps wake up immediately.
     """
+    token = current_token()
     if not is_openai and api_key:
-        genai.configure(api_key=api_key)
+        if GOOGLE_API_ENDPOINT:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GOOGLE_API_ENDPOINT})
+        else:
+            genai.configure(api_key=api_key)
 
     max_retries = 3
-    retry_delay = 10 # Initial stable delay
+    retry_delay = RETRY_BASE_DELAY # Initial stable delay
 
     for attempt in range(max_retries):
+        token.raise_if_cancelled()
+        call_started = time.perf_counter()
         try:
             if is_openai:
                 if image_path:
@@ -60,17 +81,33 @@ def safe_generate(client, model_id, prompt, is_openai, image_path=None, api_key=
                 else:
                     messages = [{"role": "user", "content": prompt}]
                 
-                response = client.chat.completions.create(model=model_id, messages=messages)
+                unregister = token.on_cancel(client.close)
+                try:
+                    with span("llm.call", provider=provider, model=model_id, key=key_label, attempt=attempt + 1):
+                        response = client.chat.completions.create(model=model_id, messages=messages)
+                finally:
+                    unregister()
+                LLM_LATENCY.observe(time.perf_counter() - call_started, "direct_flow", provider, model_id, key_label)
+                LLM_REQUESTS.inc("direct_flow", provider, model_id, key_label, "ok")
                 return response.choices[0].message.content
             else:
                 model = genai.GenerativeModel(model_id)
-                if image_path:
-                    img = Image.open(image_path)
-                    response = model.generate_content([prompt, img])
-                else:
-                    response = model.generate_content(prompt)
+                with span("llm.call", provider=provider, model=model_id, key=key_label, attempt=attempt + 1):
+                    if image_path:
+                        img = Image.open(image_path)
+                        response = model.generate_content([prompt, img])
+                    else:
+                        response = model.generate_content(prompt)
+                # The Gemini SDK call cannot be interrupted; drop its result if the job was cancelled meanwhile.
+                token.raise_if_cancelled()
+                LLM_LATENCY.observe(time.perf_counter() - call_started, "direct_flow", provider, model_id, key_label)
+                LLM_REQUESTS.inc("direct_flow", provider, model_id, key_label, "ok")
                 return response.text
         except Exception as e:
+            if token.cancelled:
+                LLM_REQUESTS.inc("direct_flow", provider, model_id, key_label, "cancelled")
+                raise JobCancelled(token.reason) from e
+            LLM_REQUESTS.inc("direct_flow", provider, model_id, key_label, classify_llm_error(e))
             err_msg = str(e).lower()
             
             # 1. Critical Failures (Model Missing/Unsupported)
@@ -85,16 +122,20 @@ def safe_generate(client, model_id, prompt, is_openai, image_path=None, api_key=
                 if attempt < max_retries - 1:
                     wait_time = retry_delay * (attempt + 1)
                     logger.info(f"[RETRY] {model_id} hit transient error: {err_msg[:50]}... Waiting {wait_time}s")
-                    time.sleep(wait_time)
+                    with span("backoff.sleep", reason="retry", model=model_id, seconds=wait_time):
+                        token.sleep(wait_time)
                     continue
                 raise RuntimeError(f"QUOTA_EXHAUSTED: {model_id}")
             
             # Default fallback for unhandled exceptions
             raise e
 
-def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flash", job_id="global"):
+def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flash", job_id="global", resume=False, checkpoint_scope=None):
     """
     Executes a 7-phase agentic flow with robust multi-key fallback.
+    Each completed phase is checkpointed; with resume=True the job's own
+    checkpoints are reused, and with a checkpoint_scope (the owner's id)
+    checkpoints of earlier runs with identical upstream inputs are reused too.
     """
     set_job_id(job_id)
     google_keys = [
@@ -132,7 +173,9 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
             current_model = TEXT_MODELS[0]
 
         attempts = 0
+        token = current_token()
         while attempts < 12: # Aligned with resilient_engine
+            token.raise_if_cancelled()
             is_openai = "gpt" in current_model.lower()
             is_openrouter = "openrouter" in current_model.lower()
             client = openai_client if (is_openai or is_openrouter) else None
@@ -143,10 +186,10 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
                     logger.info(f"[OPENROUTER] Trying {raw_model}...")
                     # Manual OpenRouter Call via OpenAI Client
                     router_client = OpenAI(
-                        base_url="https://openrouter.ai/api/v1",
+                        base_url=OPENROUTER_BASE_URL,
                         api_key=os.getenv("OPENROUTER_API_KEY")
                     )
-                    return safe_generate(router_client, raw_model, prompt, True, image_path if has_image else None)
+                    return safe_generate(router_client, raw_model, prompt, True, image_path if has_image else None, provider="openrouter")
                 except Exception as e:
                     if "402" in str(e) or "quota" in str(e).lower():
                         logger.info(f"[QUOTA] OpenRouter limit reached. Rotating...")
@@ -157,8 +200,8 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
                 for key in keys_to_try:
                     k_idx = google_keys.index(key) + 1
                     try:
-                        logger.info(f"[ROTATION] {current_model} | Key {k_idx}/8...")
-                        res = safe_generate(client, current_model, prompt, is_openai, image_path if has_image else None, api_key=key)
+                        logger.info(f"[ROTATION] {current_model} | Key {k_idx}/8...", extra={"rate_limit": f"rotation:{current_model}"})
+                        res = safe_generate(client, current_model, prompt, is_openai, image_path if has_image else None, api_key=key, key_label=str(k_idx))
                         current_key_idx = google_keys.index(key) 
                         return res
                     except Exception as e:
@@ -166,25 +209,26 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
                             logger.info(f"[ERROR] Model {current_model} NOT FOUND. Skipping all keys...")
                             break # Go immediately to next model fallback
                         if "QUOTA_EXHAUSTED" in str(e):
-                            logger.info(f"[QUOTA] Key {k_idx} hit limit for {current_model}. Rotating key...")
+                            logger.info(f"[QUOTA] Key {k_idx} hit limit for {current_model}. Rotating key...", extra={"rate_limit": f"quota:{current_model}"})
                             continue 
                         raise e
             else:
                 try:
                     logger.info(f"[OPENAI] Trying OpenAI model {current_model}...")
-                    return safe_generate(client, current_model, prompt, is_openai, image_path if has_image else None)
+                    return safe_generate(client, current_model, prompt, is_openai, image_path if has_image else None, provider="openai")
                 except Exception as e:
                     if "QUOTA_EXHAUSTED" not in str(e):
                         raise e
             
             # If all keys failed for this model, fallback to next model
             next_model = get_next_model(current_model, is_vision=has_image)
-            wait_time = 3 
+            wait_time = FAILOVER_DELAY
             logger.info(f"[NUCLEAR_FAILOVER] Exhausted {current_model}. Falling back to {next_model} in {wait_time}s...")
             current_model = next_model
             current_key_idx = 0
             attempts += 1
-            time.sleep(wait_time)
+            with span("backoff.sleep", reason="failover", model=next_model, seconds=wait_time):
+                token.sleep(wait_time)
             
         raise RuntimeError("CRITICAL FAILURE: Complete resource exhaustion after exhaustive Nuclear-Tier rotation.")
 
@@ -194,6 +238,14 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
         shutil.rmtree(project_dir)
     os.makedirs(project_dir)
 
+    ckpt = PhaseCheckpoints(
+        job_id,
+        {"image_path": image_path, "user_desc": user_desc, "voice_reqs": voice_reqs, "model_id": model_id},
+        resume=resume,
+        scope=checkpoint_scope,
+    )
+    image_hash = file_digest(image_path)
+
     # PHASE 1: VISION AGENT
     yield {"status": f"Phase 1: Vision Agent Analyzing Sketch (Resilience Active)...", "progress": 5}
     vision_prompt = f"""
@@ -203,8 +255,15 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
     OUTPUT: Detailed visual context and structural wireframe description.
     """
     try:
-        vision_context = execute_with_fallback(vision_prompt, has_image=True)
-        yield {"status": "Vision Analysis Complete!", "vision": vision_context, "progress": 15}
+        key = input_hash("vision", user_desc, voice_reqs, image_hash)
+        vision_context = ckpt.load("vision", key)
+        if vision_context is None:
+            with PHASE_DURATION.time("vision"), span("phase.vision"):
+                vision_context = execute_with_fallback(vision_prompt, has_image=True)
+            ckpt.save("vision", key, vision_context)
+            yield {"status": "Vision Analysis Complete!", "vision": vision_context, "progress": 15}
+        else:
+            yield {"status": "Vision Analysis restored from checkpoint.", "vision": vision_context, "progress": 15}
     except Exception as e:
         yield {"error": f"Vision Phase failed: {str(e)}"}
         return
@@ -219,8 +278,15 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
     Include a Mermaid.js diagram for the architecture.
     """
     try:
-        blueprint = execute_with_fallback(arch_prompt)
-        yield {"status": "Architectural Blueprint Created!", "blueprint": blueprint, "progress": 40}
+        key = input_hash("architect", vision_context)
+        blueprint = ckpt.load("architect", key)
+        if blueprint is None:
+            with PHASE_DURATION.time("architect"), span("phase.architect"):
+                blueprint = execute_with_fallback(arch_prompt)
+            ckpt.save("architect", key, blueprint)
+            yield {"status": "Architectural Blueprint Created!", "blueprint": blueprint, "progress": 40}
+        else:
+            yield {"status": "Architectural Blueprint restored from checkpoint.", "blueprint": blueprint, "progress": 40}
     except Exception as e:
         yield {"error": f"Architectural Phase failed: {str(e)}"}
         return
@@ -235,29 +301,27 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
     Format: filename|content
     """
     try:
-        dev_output = execute_with_fallback(dev_prompt)
+        key = input_hash("developer", blueprint)
+        dev_output = ckpt.load("developer", key)
+        restored = dev_output is not None
+        with (nullcontext() if restored else PHASE_DURATION.time("developer")), span("phase.developer", restored=restored):
+            if not restored:
+                dev_output = execute_with_fallback(dev_prompt)
+                ckpt.save("developer", key, dev_output)
         
-        # Robust Parsing
-        files_created = []
-        if "---FILE_START---" in dev_output:
-            file_blocks = dev_output.split("---FILE_START---")[1:]
-            for block in file_blocks:
-                if "---FILE_END---" in block:
-                    content_block = block.split("---FILE_END---")[0].strip()
-                    if "|" in content_block:
-                        filename, code = content_block.split("|", 1)
-                        filename = filename.strip("`").strip()
-                        if code.startswith("```"):
-                            lines = code.splitlines()
-                            if len(lines) > 2: code = "\n".join(lines[1:-1])
-                        
-                        filepath = os.path.join(project_dir, filename)
-                        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                        with open(filepath, "w", encoding="utf-8") as f:
-                            f.write(code)
-                        files_created.append(filename)
+            with span("files.write") as write_span:
+                # Single-pass parse, each file streamed to disk and renamed into place
+                manifest = write_dev_output(dev_output, project_dir)
+                files_created = [entry.path for entry in manifest]
+                write_span["files"] = len(files_created)
+                write_span["bytes"] = sum(entry.size for entry in manifest)
         
-        yield {"status": f"Developed {len(files_created)} files!", "files": files_created, "progress": 70}
+        yield {
+            "status": f"Developed {len(files_created)} files!" + (" (restored from checkpoint)" if restored else ""),
+            "files": files_created,
+            "manifest": [entry._asdict() for entry in manifest],
+            "progress": 70,
+        }
     except Exception as e:
         yield {"error": f"Development Phase failed: {str(e)}"}
         return
@@ -271,9 +335,15 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
     OUTPUT: Detailed debug report and refactored snippets.
     """
     try:
-        debug_report = execute_with_fallback(debug_prompt)
-        with open(os.path.join(project_dir, "debug_report.md"), "w", encoding="utf-8") as f:
-            f.write(debug_report)
+        key = input_hash("debug", dev_output)
+        debug_report = ckpt.load("debug", key)
+        restored = debug_report is not None
+        with (nullcontext() if restored else PHASE_DURATION.time("debug")), span("phase.debug", restored=restored):
+            if not restored:
+                debug_report = execute_with_fallback(debug_prompt)
+                ckpt.save("debug", key, debug_report)
+            with open(os.path.join(project_dir, "debug_report.md"), "w", encoding="utf-8") as f:
+                f.write(debug_report)
         yield {"status": "Debug & Healing Complete!", "debug": debug_report, "progress": 82}
     except Exception as e:
         yield {"error": f"Debug Phase failed: {str(e)}"}
@@ -288,7 +358,12 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
     OUTPUT: Lightweight code structure and optimization report.
     """
     try:
-        opt_report = execute_with_fallback(opt_prompt)
+        key = input_hash("optimization", dev_output)
+        opt_report = ckpt.load("optimization", key)
+        if opt_report is None:
+            with PHASE_DURATION.time("optimization"), span("phase.optimization"):
+                opt_report = execute_with_fallback(opt_prompt)
+            ckpt.save("optimization", key, opt_report)
         yield {"status": "Optimization Analysis Complete!", "optimization": opt_report, "progress": 88}
     except Exception as e:
         yield {"error": f"Optimization Phase failed: {str(e)}"}
@@ -316,7 +391,12 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
     - Mentorship Style Guidance
     """
     try:
-        cog_report = execute_with_fallback(cog_prompt)
+        key = input_hash("cognitive", user_desc, blueprint, dev_output)
+        cog_report = ckpt.load("cognitive", key)
+        if cog_report is None:
+            with PHASE_DURATION.time("cognitive"), span("phase.cognitive"):
+                cog_report = execute_with_fallback(cog_prompt)
+            ckpt.save("cognitive", key, cog_report)
         yield {"status": "Cognitive & DX Audit Complete!", "cognitive_load": cog_report, "progress": 92}
     except Exception as e:
         yield {"error": f"Cognitive Phase failed: {str(e)}"}
@@ -331,7 +411,12 @@ def run_direct_flow(image_path, user_desc, voice_reqs, model_id="gemini-2.0-flas
     OUTPUT: Green-AI Audit score and exclusivity/inclusivity report.
     """
     try:
-        audit_report = execute_with_fallback(audit_prompt)
+        key = input_hash("sustainability", blueprint, dev_output)
+        audit_report = ckpt.load("sustainability", key)
+        if audit_report is None:
+            with PHASE_DURATION.time("sustainability"), span("phase.sustainability"):
+                audit_report = execute_with_fallback(audit_prompt)
+            ckpt.save("sustainability", key, audit_report)
         yield {
             "status": "Aura-Dev 7-Agent Workflow Complete!", 
             "audit": audit_report, 
@@ -8,6 +8,10 @@ import {
 } from 'lucide-react';
 
 const API_BASE = 'http://localhost:8000';
+const STATUS_FIELDS = [
+  'status', 'progress', 'is_running', 'done', 'error', 'cancelled', 'logs', 'phases', 'started_at', 'updated_at',
+  'current_phase', 'phase_timings', 'errors', 'files', 'vision', 'blueprint', 'debug_report', 'opt_report', 'cog_report', 'audit',
+].join(',');
 
 function AuraIDE() {
   const navigate = useNavigate();
@@ -41,8 +45,17 @@ function AuraIDE() {
   }, [activeJobId, token]);
 
   useEffect(() => {
-    const interval = setInterval(fetchStatus, 2000);
-    return () => clearInterval(interval);
+    if (!activeJobId) return;
+    // Server-Sent Events: one full snapshot, then only the fields that changed.
+    // Long reports are spilled server-side; name the ones rendered here so they are sent in full.
+    const events = new EventSource(`${API_BASE}/api/status/${activeJobId}/events?fields=${STATUS_FIELDS}`);
+    events.addEventListener('snapshot', (event) => setAuraStatus(JSON.parse(event.data)));
+    events.addEventListener('patch', (event) => setAuraStatus(prev => ({ ...prev, ...JSON.parse(event.data) })));
+    events.addEventListener('end', () => events.close());
+    events.onerror = () => {
+      if (events.readyState === EventSource.CLOSED) fetchStatus();
+    };
+    return () => events.close();
   }, [activeJobId]);
 
   const formatDuration = (seconds) => {
@@ -57,7 +70,7 @@ function AuraIDE() {
   const fetchStatus = async () => {
     if (!activeJobId) return;
     try {
-      const res = await axios.get(`${API_BASE}/api/status/${activeJobId}`);
+      const res = await axios.get(`${API_BASE}/api/status/${activeJobId}`, { params: { fields: STATUS_FIELDS } });
       setAuraStatus(res.data);
     } catch (err) {}
   };
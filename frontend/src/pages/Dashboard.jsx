@@ -8,16 +8,19 @@ export default function Dashboard() {
     const { user, logout } = useContext(AuthContext);
     const navigate = useNavigate();
     const [projects, setProjects] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+
+    const fetchProjects = async (cursor = null) => {
+        try {
+            const res = await axios.get('http://localhost:8000/api/projects', { params: cursor ? { cursor } : {} });
+            setProjects(prev => cursor ? [...prev, ...res.data] : res.data);
+            setNextCursor(res.headers['x-next-cursor'] || null);
+        } catch (err) {
+            console.error("Failed to fetch projects");
+        }
+    };
 
     useEffect(() => {
-        const fetchProjects = async () => {
-            try {
-                const res = await axios.get('http://localhost:8000/api/projects');
-                setProjects(res.data);
-            } catch (err) {
-                console.error("Failed to fetch projects");
-            }
-        };
         fetchProjects();
     }, []);
 
@@ -103,6 +106,11 @@ export default function Dashboard() {
                             </div>
                         ))
                     )}
+                    {nextCursor && (
+                        <button className="btn-secondary" onClick={() => fetchProjects(nextCursor)} style={{justifySelf: 'center'}}>
+                            Load more
+                        </button>
+                    )}
                 </div>
             </main>
         </div>
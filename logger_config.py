@@ -1,48 +1,231 @@
+import atexit
+import collections
 import logging
+import logging.handlers
 import os
 import queue
+import threading
+import time
 import contextvars
 from logging.handlers import RotatingFileHandler
 
-log_queue = queue.Queue()
+# WebSocket log queue drained by backend/main.py:log_pump. Bounded so that
+# jobs nobody is watching cannot pile up formatted lines in memory.
+LOG_QUEUE_MAXSIZE = int(os.getenv("AURA_LOG_QUEUE_MAXSIZE", "10000"))
+# What to do when log_queue is full: "drop_newest" discards the incoming line,
+# "drop_oldest" evicts the oldest queued line to make room.
+LOG_QUEUE_OVERFLOW = os.getenv("AURA_LOG_QUEUE_OVERFLOW", "drop_newest")
+# Lines kept per job for viewers who connect after the job started (0 = off).
+LOG_REPLAY_LINES = int(os.getenv("AURA_LOG_REPLAY_LINES", "0"))
+# Jobs whose replay buffers are kept; the least recently written is evicted first.
+LOG_REPLAY_JOBS = 100
+
+log_queue = queue.Queue(maxsize=LOG_QUEUE_MAXSIZE)
 job_id_var = contextvars.ContextVar('job_id', default='global')
 
+# Live WebSocket subscriber counts per job id, maintained by the backend.
+_subscribers = {}
+_replay = collections.OrderedDict()
+_stats = {"enqueued": 0, "dropped": 0, "skipped_no_subscriber": 0}
+_state_lock = threading.Lock()
+
+# When set (multi-worker deployments, see pubsub.py), formatted lines go to
+# this callable as (job_id, line) instead of log_queue, so viewers connected
+# to any worker receive them.
+_remote_sink = None
+
+# Records from every named logger go through this queue to a single listener
+# thread, which owns the rotating file, the console and the WebSocket log_queue.
+_record_queue = queue.SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+
 def set_job_id(job_id: str):
     job_id_var.set(job_id)
 
+def add_subscriber(job_id: str):
+    with _state_lock:
+        _subscribers[job_id] = _subscribers.get(job_id, 0) + 1
+
+def remove_subscriber(job_id: str):
+    with _state_lock:
+        remaining = _subscribers.get(job_id, 0) - 1
+        if remaining > 0:
+            _subscribers[job_id] = remaining
+        else:
+            _subscribers.pop(job_id, None)
+
+def set_remote_sink(sink):
+    """Send every WebSocket log line to sink(job_id, line) instead of the in-process log_queue (None to undo)."""
+    global _remote_sink
+    _remote_sink = sink
+
+def _is_watched(job_id):
+    # Plain dict lookups; cheap enough for the producer thread without taking _state_lock.
+    # Viewers on other workers are not counted here, so a remote sink gets every line.
+    return _remote_sink is not None or job_id in _subscribers or "global" in _subscribers
+
+def get_replay(job_id: str):
+    """Recent lines buffered for a job (empty unless AURA_LOG_REPLAY_LINES is set)."""
+    with _state_lock:
+        return list(_replay.get(job_id, ()))
+
+def log_queue_stats():
+    """Counters for the WebSocket log queue: depth, capacity, enqueued, dropped and skipped lines."""
+    with _state_lock:
+        stats = dict(_stats)
+    stats["depth"] = log_queue.qsize()
+    stats["maxsize"] = LOG_QUEUE_MAXSIZE
+    return stats
+
 class QueueHandler(logging.Handler):
     def emit(self, record):
         try:
+            # Records are emitted on the listener thread, so use the job id
+            # captured by the producer rather than this thread's context.
+            job_id = getattr(record, "job_id", None) or job_id_var.get()
+            sink = _remote_sink
+            # Decided by the producer when the line was logged.
+            watched = getattr(record, "watched", None)
+            if watched is None:
+                watched = _is_watched(job_id)
+            if not watched and not LOG_REPLAY_LINES:
+                # Nobody would ever read this line: skip formatting it.
+                with _state_lock:
+                    _stats["skipped_no_subscriber"] += 1
+                return
             msg = self.format(record)
-            job_id = job_id_var.get()
-            log_queue.put_nowait((job_id, msg))
+            if LOG_REPLAY_LINES:
+                with _state_lock:
+                    buf = _replay.get(job_id)
+                    if buf is None:
+                        buf = _replay[job_id] = collections.deque(maxlen=LOG_REPLAY_LINES)
+                        while len(_replay) > LOG_REPLAY_JOBS:
+                            _replay.popitem(last=False)
+                    else:
+                        _replay.move_to_end(job_id)
+                    buf.append(msg)
+                if not watched:
+                    return
+            if sink is not None:
+                sink(job_id, msg)
+                return
+            self._enqueue((job_id, msg))
         except Exception:
             self.handleError(record)
 
-def get_logger(name="aura_engine"):
-    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir, exist_ok=True)
-        
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    if not logger.handlers:
+    def _enqueue(self, item):
+        try:
+            log_queue.put_nowait(item)
+        except queue.Full:
+            if LOG_QUEUE_OVERFLOW == "drop_oldest":
+                try:
+                    log_queue.get_nowait()
+                    log_queue.put_nowait(item)
+                except (queue.Empty, queue.Full):
+                    pass
+            with _state_lock:
+                _stats["dropped"] += 1
+            return
+        with _state_lock:
+            _stats["enqueued"] += 1
+
+class _ProducerHandler(logging.handlers.QueueHandler):
+    """
+    Cheap enqueue on the caller's thread: tags each record with the active job
+    id and whether anyone watches that job. Formatting (including tracebacks)
+    is left to the listener thread; the base class would format here.
+    """
+    def prepare(self, record):
+        job_id = job_id_var.get()
+        record.job_id = job_id
+        record.watched = _is_watched(job_id)
+        if record.args:
+            # Merge now: args may be mutated by the caller before the listener runs.
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """
+    Throttles records logged with extra={"rate_limit": key}: at most one record
+    per key and job every `interval` seconds. The next record let through for a key
+    reports how many were suppressed. Records without the attribute pass.
+    """
+    def __init__(self, interval: float = 5.0):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "rate_limit", None)
+        if key is None:
+            return True
+        key = (job_id_var.get(), key)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} (+{suppressed} similar suppressed)"
+            record.args = None
+        return True
+
+rate_limit_filter = RateLimitFilter(float(os.getenv("AURA_LOG_RATE_LIMIT_INTERVAL", "5")))
+
+def _start_listener(log_dir):
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+
         # File handler
         log_file = os.path.join(log_dir, "aura_engine.log")
         file_handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=5, encoding="utf-8")
-        file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-        
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-        logger.addHandler(console_handler)
-        
+
         # Queue handler for WebSocket streaming
         queue_handler = QueueHandler()
         queue_handler.setFormatter(logging.Formatter('[%(name)s] %(message)s'))
-        logger.addHandler(queue_handler)
-        
+
+        _listener = logging.handlers.QueueListener(
+            _record_queue, file_handler, console_handler, queue_handler, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_logging)
+
+def stop_logging():
+    """Drain pending records and stop the listener thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+
+def get_logger(name="aura_engine"):
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+
+    _start_listener(log_dir)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+
+    if not logger.handlers:
+        producer = _ProducerHandler(_record_queue)
+        producer.addFilter(rate_limit_filter)
+        logger.addHandler(producer)
+
     return logger
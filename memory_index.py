@@ -0,0 +1,81 @@
+import collections
+import math
+import re
+from typing import Any, Counter, Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Small in-process Okapi BM25 inverted index over memory entry summaries.
+    Documents are added incrementally; once max_docs is exceeded the oldest
+    documents are evicted so the index stays bounded like the streams it mirrors.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_docs: int = 50000):
+        self.k1 = k1
+        self.b = b
+        self.max_docs = max_docs
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._docs: "collections.OrderedDict[int, Tuple[Counter[str], int, Any]]" = collections.OrderedDict()
+        self._total_len = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, text: str, payload: Any) -> Optional[int]:
+        """Index text and attach payload to it. Returns the doc id, or None if nothing was indexable."""
+        terms = collections.Counter(tokenize(text))
+        if not terms:
+            return None
+        doc_id = self._next_id
+        self._next_id += 1
+        length = sum(terms.values())
+        self._docs[doc_id] = (terms, length, payload)
+        self._total_len += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        while len(self._docs) > self.max_docs:
+            self._evict_oldest()
+        return doc_id
+
+    def _evict_oldest(self) -> None:
+        doc_id, (terms, length, _) = self._docs.popitem(last=False)
+        self._total_len -= length
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self._postings[term]
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[float, Any]]:
+        """Return up to top_k (score, payload) pairs, best first. Ties favour newer documents."""
+        n = len(self._docs)
+        if n == 0 or top_k <= 0:
+            return []
+        avgdl = self._total_len / n
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, tf in posting.items():
+                dl = self._docs[doc_id][1]
+                denom = tf + self.k1 * (1 - self.b + self.b * dl / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / denom
+        best = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)[:top_k]
+        return [(score, self._docs[doc_id][2]) for doc_id, score in best]
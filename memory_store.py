@@ -1,70 +1,847 @@
+import atexit
+import collections
 import datetime
+import gzip
 import json
 import os
+import re
+import shutil
+import struct
 import threading
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
-_BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory")
-_LOCK = threading.Lock()
+from logger_config import job_id_var
+from memory_index import BM25Index
 
+_BASE_DIR = os.getenv("AURA_MEMORY_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory")
 
-def _ensure_dir() -> None:
-    os.makedirs(_BASE_DIR, exist_ok=True)
+# Streams are namespaced: "<stream>" for explicitly shared (cross-job) streams
+# and "jobs/<job_id>/<stream>" for the job in job_id_var. Every internal helper
+# below takes this resolved key as its `stream` argument.
+_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
 
+# Sidecar offset index: one fixed-width record per JSONL line holding the
+# byte offset of the line and its timestamp (epoch seconds). Record N of
+# "<stream>.idx" describes line N of "<stream>.jsonl", so tail and
+# timestamp lookups never have to parse the whole stream.
+_INDEX_RECORD = struct.Struct("<Qd")
 
-def append_memory(stream: str, payload: Dict[str, Any]) -> None:
+# Number of recent entries kept per stream for the rolling summary.
+ROLLING_WINDOW = 50
+
+# Durability modes for the background writer:
+#   fire_and_forget - append returns immediately, the writer drains as soon as it wakes.
+#   interval        - append returns immediately, the writer commits every flush interval.
+#   fsync           - append blocks until its batch is written and fsync'd (group commit).
+DURABILITY_MODES = ("fire_and_forget", "interval", "fsync")
+
+# The active segment of a stream is "<stream>.jsonl". Once it grows past
+# SEGMENT_BYTES it is sealed into "<stream>.segments/" and gzip-compressed in
+# the background; "<stream>.segments/manifest.json" lists sealed segments
+# oldest first with their entry count, on-disk size and timestamp range.
+SEGMENT_BYTES = int(os.getenv("AURA_MEMORY_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+
+
+class RetentionPolicy(NamedTuple):
     """
-    Append a structured memory entry to a JSONL stream.
-    Intended for long-horizon project history and agent decisions.
+    Limits applied to sealed segments of a stream; the oldest segments are
+    dropped until all limits hold. The active segment is never dropped, and a
+    segment is only dropped for max_entries while the newer entries still
+    number at least max_entries.
     """
-    _ensure_dir()
-    path = os.path.join(_BASE_DIR, f"{stream}.jsonl")
-    entry: Dict[str, Any] = dict(payload)
-    entry.setdefault("ts", datetime.datetime.utcnow().isoformat() + "Z")
-    with _LOCK, open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
+    max_age_days: Optional[float] = None
+    max_entries: Optional[int] = None
+    max_bytes: Optional[int] = None
+
+
+_RETENTION: Dict[str, RetentionPolicy] = {
+    "runs": RetentionPolicy(max_age_days=180),
+    "file_events": RetentionPolicy(max_age_days=30, max_bytes=64 * 1024 * 1024),
+}
+
+# Streams whose sidecar index has been reconciled with the data file in this process.
+_SYNCED: Dict[str, int] = {}
+# Parsed segment manifests, guarded by the stream's io lock.
+_MANIFESTS: Dict[str, Dict[str, Any]] = {}
+# Rolling summary per stream: recent (ts, kind, summary) triples.
+_ROLLING: Dict[str, Deque[Tuple[str, str, str]]] = {}
+# Relevance index per stream, built on first search and then kept current by
+# append_memory. Guarded by the stream's mem lock, like the rolling windows.
+_SEARCH: Dict[str, BM25Index] = {}
 
-def load_memory(stream: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+
+class _StreamLocks:
     """
-    Load entries from a JSONL memory stream.
-    If limit is provided, only the most recent N entries are returned.
+    Per-stream locks. `mem` guards the rolling window and search index and is
+    held only briefly by appenders; `io` guards the data/index/segment files
+    and is held by the writer, readers and compaction.
     """
-    _ensure_dir()
-    path = os.path.join(_BASE_DIR, f"{stream}.jsonl")
-    if not os.path.exists(path):
-        return []
 
-    items: List[Dict[str, Any]] = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
+    __slots__ = ("mem", "io")
+
+    def __init__(self) -> None:
+        self.mem = threading.Lock()
+        self.io = threading.Lock()
+
+
+_LOCKS: Dict[str, _StreamLocks] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _locks_for(stream: str) -> _StreamLocks:
+    locks = _LOCKS.get(stream)
+    if locks is None:
+        with _LOCKS_GUARD:
+            locks = _LOCKS.setdefault(stream, _StreamLocks())
+    return locks
+
+
+def _safe_name(name: str) -> str:
+    return _NAME_RE.sub("_", str(name)).strip(".") or "_"
+
+
+def _stream_key(stream: str, shared: bool = False) -> str:
+    """
+    Resolve a stream name to its namespaced key. Shared streams live at the top
+    level and everything else under the current job (or the top level when no
+    job is active).
+    """
+    name = _safe_name(stream)
+    if shared:
+        return name
+    job_id = job_id_var.get()
+    if not job_id or job_id == "global":
+        return name
+    return f"jobs/{_safe_name(job_id)}/{name}"
+
+
+def _stream_path(stream: str) -> str:
+    return os.path.join(_BASE_DIR, f"{stream}.jsonl")
+
+
+def _index_path(stream: str) -> str:
+    return os.path.join(_BASE_DIR, f"{stream}.idx")
+
+
+def _parse_ts(value: Any) -> float:
+    """
+    Convert an ISO-8601 timestamp (as written by append_memory) or a datetime
+    into epoch seconds. Unparseable values sort first.
+    """
+    if isinstance(value, datetime.datetime):
+        dt = value
+    else:
+        try:
+            text = str(value)
+            if text.endswith("Z"):
+                text = text[:-1]
+            dt = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+def _summary_fields(entry: Dict[str, Any]) -> Tuple[str, str, str]:
+    ts = entry.get("ts", "unknown_ts")
+    kind = entry.get("kind", "event")
+    summary = entry.get("summary") or entry.get("status") or entry.get("note") or ""
+    return ts, kind, summary
+
+
+def _search_text(fields: Tuple[str, str, str], entry: Dict[str, Any]) -> str:
+    _, kind, summary = fields
+    return f"{kind} {entry.get('path', '')} {summary}"
+
+
+def _format_lines(recent: List[Tuple[str, str, str]]) -> str:
+    lines: List[str] = []
+    for idx, (ts, kind, summary) in enumerate(recent, start=1):
+        lines.append(f"{idx}. [{ts}] ({kind}) {summary}")
+    return "\n".join(lines)
+
+
+def _parse_lines(
+    raw: bytes, tail: Optional[int] = None, after_ts: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Decode JSONL bytes. With tail and/or after_ts the lines are walked newest
+    first and decoding stops once `tail` entries are collected or an entry at
+    or before `after_ts` is reached, so tail reads of a large sealed segment
+    only decode the lines they return.
+    """
+    lines = raw.splitlines()
+    if tail is None and after_ts is None:
+        items: List[Dict[str, Any]] = []
+        for line in lines:
             line = line.strip()
             if not line:
                 continue
             try:
                 items.append(json.loads(line))
-            except json.JSONDecodeError:
+            except (json.JSONDecodeError, UnicodeDecodeError):
                 continue
+        return items
+
+    items = []
+    for line in reversed(lines):
+        if tail is not None and len(items) >= tail:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if after_ts is not None and _parse_ts(entry.get("ts")) <= after_ts:
+            break
+        items.append(entry)
+    items.reverse()
+    return items
+
+
+def _index_count(stream: str) -> int:
+    try:
+        return os.path.getsize(_index_path(stream)) // _INDEX_RECORD.size
+    except OSError:
+        return 0
+
+
+def _read_index(stream: str, start: int, stop: int) -> List[Tuple[int, float]]:
+    if stop <= start:
+        return []
+    with open(_index_path(stream), "rb") as f:
+        f.seek(start * _INDEX_RECORD.size)
+        raw = f.read((stop - start) * _INDEX_RECORD.size)
+    return list(_INDEX_RECORD.iter_unpack(raw))
+
+
+def _sync_index(stream: str) -> int:
+    """
+    Reconcile the sidecar index with the data file and return the entry count.
+    Only lines past the last indexed offset are scanned, so a stream written by
+    an older version (or interrupted between the two writes) is caught up
+    incrementally. Must be called with the stream's io lock held.
+    """
+    path = _stream_path(stream)
+    if stream in _SYNCED:
+        return _SYNCED[stream]
+    if not os.path.exists(path):
+        _SYNCED[stream] = 0
+        return 0
+
+    idx_path = _index_path(stream)
+    data_size = os.path.getsize(path)
+    count = _index_count(stream)
+
+    # Drop any partial trailing record and work out where indexing stops.
+    with open(idx_path, "ab") as idx:
+        idx.truncate(count * _INDEX_RECORD.size)
+
+    resume_at = 0
+    with open(path, "rb") as data:
+        if count:
+            last_offset, _ = _read_index(stream, count - 1, count)[0]
+            if last_offset >= data_size:
+                # Data file shrank underneath us: rebuild from scratch.
+                count = 0
+            else:
+                data.seek(last_offset)
+                data.readline()
+                resume_at = data.tell()
+        if count == 0:
+            with open(idx_path, "wb"):
+                pass
+
+        data.seek(resume_at)
+        records: List[bytes] = []
+        offset = resume_at
+        for line in data:
+            if line.strip():
+                try:
+                    ts = _parse_ts(json.loads(line).get("ts"))
+                except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                    ts = 0.0
+                records.append(_INDEX_RECORD.pack(offset, ts))
+            offset += len(line)
+
+    if records:
+        with open(idx_path, "ab") as idx:
+            idx.write(b"".join(records))
+    count += len(records)
+    _SYNCED[stream] = count
+    return count
+
+
+def _read_from(stream: str, start: int, count: int) -> List[Dict[str, Any]]:
+    """Parse entries [start, count) using the index to seek straight to them."""
+    if start >= count:
+        return []
+    offset, _ = _read_index(stream, start, start + 1)[0]
+    with open(_stream_path(stream), "rb") as f:
+        f.seek(offset)
+        raw = f.read()
+    return _parse_lines(raw)
+
+
+def _first_after(stream: str, count: int, since_ts: float) -> int:
+    """
+    Binary search the index for the first entry strictly newer than since_ts.
+    Entries are appended in time order, so index timestamps are non-decreasing.
+    """
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        _, ts = _read_index(stream, mid, mid + 1)[0]
+        if ts <= since_ts:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _segments_dir(stream: str) -> str:
+    return os.path.join(_BASE_DIR, f"{stream}.segments")
+
+
+def _load_manifest(stream: str) -> Dict[str, Any]:
+    manifest = _MANIFESTS.get(stream)
+    if manifest is None:
+        path = os.path.join(_segments_dir(stream), "manifest.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            manifest = {"next_id": 0, "segments": []}
+        _MANIFESTS[stream] = manifest
+    return manifest
+
+
+def _save_manifest(stream: str, manifest: Dict[str, Any]) -> None:
+    seg_dir = _segments_dir(stream)
+    os.makedirs(seg_dir, exist_ok=True)
+    path = os.path.join(seg_dir, "manifest.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+    _MANIFESTS[stream] = manifest
+
+
+def _read_segment(
+    stream: str, segment: Dict[str, Any], tail: Optional[int] = None, after_ts: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    path = os.path.join(_segments_dir(stream), segment["name"])
+    if not os.path.exists(path) and os.path.exists(path + ".gz"):
+        # Compressed since the caller read the manifest.
+        path += ".gz"
+    opener = gzip.open if path.endswith(".gz") else open
+    try:
+        with opener(path, "rb") as f:
+            return _parse_lines(f.read(), tail, after_ts)
+    except OSError:
+        return []
+
+
+def _seal_active(stream: str) -> None:
+    """
+    Move the active segment into the segments directory and start a fresh one.
+    Must be called with the stream's io lock held.
+    """
+    count = _sync_index(stream)
+    if count == 0:
+        return
+    first = _read_index(stream, 0, 1)[0]
+    last = _read_index(stream, count - 1, count)[0]
+    manifest = _load_manifest(stream)
+    name = f"{manifest['next_id']:08d}.jsonl"
+    os.makedirs(_segments_dir(stream), exist_ok=True)
+    path = _stream_path(stream)
+    size = os.path.getsize(path)
+    os.replace(path, os.path.join(_segments_dir(stream), name))
+    os.remove(_index_path(stream))
+    manifest["next_id"] += 1
+    manifest["segments"].append(
+        {"name": name, "count": count, "bytes": size, "first_ts": first[1], "last_ts": last[1]}
+    )
+    _save_manifest(stream, manifest)
+    _SYNCED[stream] = 0
+
+
+def set_retention(stream: str, policy: Optional[RetentionPolicy]) -> None:
+    """Set (or clear, with None) the retention policy of a stream name in every namespace."""
+    if policy is None:
+        _RETENTION.pop(stream, None)
+    else:
+        _RETENTION[stream] = policy
+
+
+def _apply_retention(stream: str) -> None:
+    """Drop the oldest sealed segments that violate the stream's policy. Needs the io lock."""
+    policy = _RETENTION.get(stream.rsplit("/", 1)[-1])
+    if policy is None:
+        return
+    manifest = _load_manifest(stream)
+    segments = manifest["segments"]
+    if not segments:
+        return
+    entries = sum(seg["count"] for seg in segments) + _sync_index(stream)
+    try:
+        total_bytes = sum(seg["bytes"] for seg in segments) + os.path.getsize(_stream_path(stream))
+    except OSError:
+        total_bytes = sum(seg["bytes"] for seg in segments)
+    cutoff = time.time() - policy.max_age_days * 86400 if policy.max_age_days is not None else None
 
+    dropped = 0
+    while dropped < len(segments):
+        seg = segments[dropped]
+        expired = cutoff is not None and seg["last_ts"] < cutoff
+        too_many = policy.max_entries is not None and entries - seg["count"] >= policy.max_entries
+        too_big = policy.max_bytes is not None and total_bytes > policy.max_bytes
+        if not (expired or too_many or too_big):
+            break
+        try:
+            os.remove(os.path.join(_segments_dir(stream), seg["name"]))
+        except OSError:
+            pass
+        entries -= seg["count"]
+        total_bytes -= seg["bytes"]
+        dropped += 1
+    if dropped:
+        manifest["segments"] = segments[dropped:]
+        _save_manifest(stream, manifest)
+
+
+def compact(stream: str, shared: bool = False) -> None:
+    """
+    Compress every uncompressed sealed segment of a stream and apply its
+    retention policy. Runs in the background after a seal; safe to call directly.
+    """
+    _compact(_stream_key(stream, shared))
+
+
+def _compact(stream: str) -> None:
+    io_lock = _locks_for(stream).io
+    with io_lock:
+        pending = [seg["name"] for seg in _load_manifest(stream)["segments"] if not seg["name"].endswith(".gz")]
+
+    seg_dir = _segments_dir(stream)
+    for name in pending:
+        src = os.path.join(seg_dir, name)
+        dst = src + ".gz"
+        with open(src, "rb") as fin, gzip.open(dst + ".tmp", "wb") as fout:
+            while True:
+                chunk = fin.read(1024 * 1024)
+                if not chunk:
+                    break
+                fout.write(chunk)
+        with io_lock:
+            os.replace(dst + ".tmp", dst)
+            manifest = _load_manifest(stream)
+            for seg in manifest["segments"]:
+                if seg["name"] == name:
+                    seg["name"] = name + ".gz"
+                    seg["bytes"] = os.path.getsize(dst)
+            _save_manifest(stream, manifest)
+            os.remove(src)
+
+    with io_lock:
+        _apply_retention(stream)
+
+
+_COMPACTING: Dict[str, threading.Thread] = {}
+
+
+def _schedule_compaction(stream: str) -> None:
+    """Compact a stream on a background thread unless one is already running."""
+    running = _COMPACTING.get(stream)
+    if running is not None and running.is_alive():
+        return
+
+    def _run() -> None:
+        try:
+            _compact(stream)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=_run, name=f"memory-compact-{stream}", daemon=True)
+    _COMPACTING[stream] = thread
+    thread.start()
+
+
+def _write_batch(batch: Dict[str, List[Tuple[bytes, float]]], sync: bool) -> None:
+    """
+    Append every pending (line, ts) pair of each stream with a single write to
+    the data file and a single write to its index per segment. A batch that
+    fills the active segment past SEGMENT_BYTES seals it and continues in a
+    fresh one, so segments stay within SEGMENT_BYTES plus one line.
+    """
+    for stream, items in batch.items():
+        with _locks_for(stream).io:
+            path = _stream_path(stream)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            sealed = False
+            start = 0
+            while start < len(items):
+                count = _sync_index(stream)
+                records: List[bytes] = []
+                with open(path, "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    end = start
+                    while end < len(items) and (end == start or offset < SEGMENT_BYTES):
+                        line, ts = items[end]
+                        records.append(_INDEX_RECORD.pack(offset, ts))
+                        offset += len(line)
+                        end += 1
+                    f.write(b"".join(line for line, _ in items[start:end]))
+                    if sync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                with open(_index_path(stream), "ab") as idx:
+                    idx.write(b"".join(records))
+                    if sync:
+                        idx.flush()
+                        os.fsync(idx.fileno())
+                _SYNCED[stream] = count + end - start
+                start = end
+                if offset >= SEGMENT_BYTES:
+                    _seal_active(stream)
+                    sealed = True
+            if sealed:
+                _schedule_compaction(stream)
+
+
+class _MemoryWriter:
+    """
+    Background group-commit writer. Appenders enqueue encoded lines per stream
+    and a daemon thread writes them out in batches, so callers never pay for
+    file open/close syscalls on the hot path. Streams are spread over
+    WRITER_SHARDS writers so unrelated jobs do not queue behind each other.
+    """
+
+    def __init__(self, durability: str, flush_interval: float):
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._pending: Dict[str, List[Tuple[bytes, float]]] = {}
+        self._enqueued = 0
+        self._committed = 0
+        self._force = False
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, stream: str, line: bytes, ts: float) -> None:
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+                self._thread.start()
+            was_idle = not self._pending
+            self._pending.setdefault(stream, []).append((line, ts))
+            self._enqueued += 1
+            ticket = self._enqueued
+            if was_idle or self.durability != "interval":
+                self._cond.notify_all()
+            if self.durability == "fsync":
+                while self._committed < ticket:
+                    self._cond.wait()
+
+    def drain(self) -> None:
+        """Commit everything enqueued so far and wait for it."""
+        with self._cond:
+            ticket = self._enqueued
+            if self._committed >= ticket:
+                return
+            self._force = True
+            self._cond.notify_all()
+            while self._committed < ticket:
+                self._cond.wait()
+
+    def take_error(self) -> Optional[BaseException]:
+        with self._cond:
+            error, self._error = self._error, None
+        return error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                if self.durability == "interval":
+                    deadline = time.monotonic() + self.flush_interval
+                    while not self._force:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                batch, self._pending = self._pending, {}
+                ticket = self._enqueued
+                self._force = False
+                sync = self.durability == "fsync"
+
+            error: Optional[BaseException] = None
+            try:
+                _write_batch(batch, sync)
+            except Exception as exc:
+                error = exc
+
+            with self._cond:
+                self._committed = ticket
+                if error is not None:
+                    self._error = error
+                self._cond.notify_all()
+
+
+WRITER_SHARDS = max(1, int(os.getenv("AURA_MEMORY_WRITER_SHARDS", "4")))
+
+_WRITERS = [
+    _MemoryWriter(
+        os.getenv("AURA_MEMORY_DURABILITY", "interval"),
+        float(os.getenv("AURA_MEMORY_FLUSH_INTERVAL", "0.2")),
+    )
+    for _ in range(WRITER_SHARDS)
+]
+
+
+def _writer_for(stream: str) -> _MemoryWriter:
+    return _WRITERS[hash(stream) % len(_WRITERS)]
+
+
+def configure_writer(durability: Optional[str] = None, flush_interval: Optional[float] = None) -> None:
+    """
+    Change the durability mode (one of DURABILITY_MODES) and/or the flush
+    interval in seconds used by the background writer.
+    """
+    if durability is not None and durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode '{durability}'. Expected one of {DURABILITY_MODES}.")
+    if flush_interval is not None and flush_interval < 0:
+        raise ValueError("flush_interval must be >= 0")
+    for writer in _WRITERS:
+        writer.drain()
+        with writer._cond:
+            if durability is not None:
+                writer.durability = durability
+            if flush_interval is not None:
+                writer.flush_interval = flush_interval
+
+
+def flush() -> None:
+    """
+    Block until every entry appended so far is on disk.
+    Re-raises the last error hit by the background writer, if any.
+    """
+    error: Optional[BaseException] = None
+    for writer in _WRITERS:
+        writer.drain()
+        error = writer.take_error() or error
+    if error is not None:
+        raise error
+
+
+def _drain_all() -> None:
+    for writer in _WRITERS:
+        writer.drain()
+
+
+atexit.register(_drain_all)
+
+
+def _rolling(stream: str) -> Deque[Tuple[str, str, str]]:
+    """
+    Return the rolling window for a stream, seeding it from the tail on first use.
+    Must be called with the stream's mem lock held.
+    """
+    window = _ROLLING.get(stream)
+    if window is None:
+        _writer_for(stream).drain()
+        window = collections.deque(maxlen=ROLLING_WINDOW)
+        with _locks_for(stream).io:
+            for e in _load_locked(stream, ROLLING_WINDOW, None):
+                window.append(_summary_fields(e))
+        _ROLLING[stream] = window
+    return window
+
+
+def append_memory(
+    stream: str,
+    payload: Dict[str, Any],
+    shared: bool = False,
+) -> None:
+    """
+    Append a structured memory entry to a JSONL stream.
+    Intended for long-horizon project history and agent decisions.
+    The stream is private to the current job unless shared=True opts into the
+    cross-job stream.
+    The entry is handed to the background writer; call flush() to wait for it.
+    """
+    key = _stream_key(stream, shared)
+    entry: Dict[str, Any] = dict(payload)
+    entry.setdefault("ts", datetime.datetime.utcnow().isoformat() + "Z")
+    line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+    fields = _summary_fields(entry)
+    with _locks_for(key).mem:
+        _rolling(key).append(fields)
+        index = _SEARCH.get(key)
+        if index is not None:
+            index.add(_search_text(fields, entry), fields)
+    _writer_for(key).submit(key, line, _parse_ts(entry["ts"]))
+
+
+def _load_locked(stream: str, limit: Optional[int], since_ts: Optional[float]) -> List[Dict[str, Any]]:
+    """Body of load_memory; must be called with the stream's io lock held."""
+    count = _sync_index(stream)
+    start = 0
+    if since_ts is not None:
+        start = _first_after(stream, count, since_ts)
     if limit is not None and limit > 0:
-        return items[-limit:]
+        start = max(start, count - limit)
+    items = _read_from(stream, start, count)
+    if start > 0:
+        return items
+
+    need = limit - len(items) if limit is not None and limit > 0 else None
+    for seg in reversed(_load_manifest(stream)["segments"]):
+        if need is not None and need <= 0:
+            break
+        if since_ts is not None and seg["last_ts"] <= since_ts:
+            break
+        after_ts = since_ts if since_ts is not None and seg["first_ts"] <= since_ts else None
+        seg_items = _read_segment(stream, seg, need, after_ts)
+        if need is not None:
+            need -= len(seg_items)
+        seg_items.extend(items)
+        items = seg_items
     return items
 
 
-def summarize_memory(stream: str, limit: int = 20) -> str:
+def load_memory(
+    stream: str,
+    limit: Optional[int] = None,
+    since: Optional[Union[str, datetime.datetime]] = None,
+    shared: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Load entries from a JSONL memory stream, across sealed segments.
+    If limit is provided, only the most recent N entries are returned.
+    If since is provided, only entries strictly newer than that timestamp are returned.
+    The active segment is read through its sidecar index and sealed segments
+    are only opened when the request reaches back into them.
+    """
+    key = _stream_key(stream, shared)
+    _writer_for(key).drain()
+    since_ts = _parse_ts(since) if since is not None else None
+    with _locks_for(key).io:
+        return _load_locked(key, limit, since_ts)
+
+
+def iter_memory(stream: str, shared: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every entry of a stream oldest first, one segment at a time, so
+    memory use stays bounded by SEGMENT_BYTES however long the history is.
+    """
+    return _iter_key(_stream_key(stream, shared))
+
+
+def _iter_key(stream: str) -> Iterator[Dict[str, Any]]:
+    io_lock = _locks_for(stream).io
+    _writer_for(stream).drain()
+    with io_lock:
+        segments = list(_load_manifest(stream)["segments"])
+    for seg in segments:
+        with io_lock:
+            seg_items = _read_segment(stream, seg)
+        yield from seg_items
+    with io_lock:
+        count = _sync_index(stream)
+        active = _read_from(stream, 0, count)
+    yield from active
+
+
+def get_rolling_summary(stream: str, shared: bool = False) -> Dict[str, Any]:
+    """
+    Incrementally maintained overview of a stream: total entry count, latest
+    timestamp and the most recent ROLLING_WINDOW (ts, kind, summary) triples.
+    """
+    key = _stream_key(stream, shared)
+    locks = _locks_for(key)
+    with locks.mem:
+        window = list(_rolling(key))
+    _writer_for(key).drain()
+    with locks.io:
+        count = _sync_index(key)
+        count += sum(seg["count"] for seg in _load_manifest(key)["segments"])
+    return {
+        "count": count,
+        "last_ts": window[-1][0] if window else None,
+        "recent": window,
+    }
+
+
+def search_memory(
+    stream: str,
+    query: str,
+    top_k: int = 5,
+    shared: bool = False,
+) -> List[Tuple[float, Tuple[str, str, str]]]:
+    """
+    Rank the entries of a stream against a free-text query with BM25 and
+    return up to top_k (score, (ts, kind, summary)) pairs, best first.
+    The index is built from the stream on first use and updated on every append.
+    """
+    key = _stream_key(stream, shared)
+    with _locks_for(key).mem:
+        index = _SEARCH.get(key)
+        if index is None:
+            index = BM25Index()
+            for e in _iter_key(key):
+                fields = _summary_fields(e)
+                index.add(_search_text(fields, e), fields)
+            _SEARCH[key] = index
+        return index.search(query, top_k)
+
+
+def summarize_memory(
+    stream: str,
+    limit: int = 20,
+    query: Optional[str] = None,
+    shared: bool = False,
+) -> str:
     """
     Lightweight textual view over recent memory entries.
     Agents can use this as a context primer before planning.
+    With a query, the `limit` most relevant entries are listed instead of the most recent.
     """
-    entries = load_memory(stream, limit=limit)
-    if not entries:
+    if query and query.strip():
+        hits = search_memory(stream, query, top_k=limit, shared=shared)
+        if not hits:
+            return f"No memory entries in this project stream match '{query.strip()}'."
+        return _format_lines([fields for _, fields in hits])
+
+    if 0 < limit <= ROLLING_WINDOW:
+        key = _stream_key(stream, shared)
+        with _locks_for(key).mem:
+            recent = list(_rolling(key))[-limit:]
+    else:
+        recent = [_summary_fields(e) for e in load_memory(stream, limit=limit, shared=shared)]
+    if not recent:
         return "No prior memory available for this project stream."
+    return _format_lines(recent)
 
-    lines: List[str] = []
-    for idx, e in enumerate(entries, start=1):
-        ts = e.get("ts", "unknown_ts")
-        kind = e.get("kind", "event")
-        summary = e.get("summary") or e.get("status") or e.get("note") or ""
-        lines.append(f"{idx}. [{ts}] ({kind}) {summary}")
-    return "\n".join(lines)
 
+def release_job(job_id: str) -> None:
+    """
+    Delete a finished job's private streams from disk and drop their rolling
+    windows, search indexes and cached state. Project and shared streams are
+    kept.
+    """
+    prefix = f"jobs/{_safe_name(job_id)}/"
+    _drain_all()
+    for key in [k for k in _COMPACTING if k.startswith(prefix)]:
+        _COMPACTING[key].join()
+    shutil.rmtree(os.path.join(_BASE_DIR, "jobs", _safe_name(job_id)), ignore_errors=True)
+    for cache in (_ROLLING, _SEARCH, _SYNCED, _MANIFESTS, _COMPACTING, _LOCKS):
+        for key in [k for k in cache if k.startswith(prefix)]:
+            cache.pop(key, None)
@@ -0,0 +1,534 @@
+import abc
+import argparse
+import asyncio
+import fnmatch
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import metrics
+
+# Job event pub/sub shared by every API worker. Log lines and status patches
+# of a job are published on per-job channels; WebSocket and SSE handlers
+# subscribe to the job they serve, so a viewer sees the job no matter which
+# worker or container runs it.
+#
+# AURA_PUBSUB_URL selects the transport:
+#   local:// (default)   in-process only, the single-worker behaviour
+#   redis://host:6379/0  a Redis server (or anything speaking its protocol)
+#   unix:///path.sock    the bundled broker over a Unix socket:
+#                        python pubsub.py --unix /tmp/aura-pubsub.sock
+#
+# The remote transports speak the RESP subset below with a stdlib client, so
+# no redis package is needed: PUBLISH, SUBSCRIBE, PSUBSCRIBE (and UN-), SET
+# with EX, GET, PING.
+
+PUBSUB_URL = os.getenv("AURA_PUBSUB_URL", "local://")
+# Seconds between reconnect attempts after the broker connection drops.
+RECONNECT_DELAY = float(os.getenv("AURA_PUBSUB_RECONNECT_DELAY", "1"))
+# Seconds a command (PUBLISH, SET, GET) may wait on the broker before it is
+# dropped; a hung broker then costs each publisher at most this once per
+# RECONNECT_DELAY.
+COMMAND_TIMEOUT = float(os.getenv("AURA_PUBSUB_TIMEOUT", "2"))
+
+PUBSUB_MESSAGES = metrics.Counter(
+    "aura_pubsub_messages_total", "Job event messages by direction (published, received) and outcome.", ["direction", "outcome"]
+)
+
+Callback = Callable[[str, str], None]
+
+
+def log_channel(job_id: str) -> str:
+    return f"aura:logs:{job_id}"
+
+
+def status_channel(job_id: str) -> str:
+    return f"aura:status:{job_id}"
+
+
+def status_snapshot_key(job_id: str) -> str:
+    return f"aura:status-snapshot:{job_id}"
+
+
+def trace_key(job_id: str) -> str:
+    return f"aura:trace:{job_id}"
+
+
+ALL_LOGS_PATTERN = log_channel("*")
+
+
+class Broker(abc.ABC):
+    """
+    Base class: keeps local callbacks per channel and pattern, and tells the
+    transport when the first callback for a key arrives or the last one leaves.
+    Callbacks run on the transport's thread and must not block. Transports
+    implement publish, set and get.
+    """
+
+    remote = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: Dict[Tuple[str, str], List[Callback]] = {}
+
+    @abc.abstractmethod
+    def publish(self, channel: str, message: str) -> int:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    def subscribe(self, channel: str, callback: Callback) -> Callable[[], None]:
+        """Call callback(channel, message) for every message; returns the unsubscribe function."""
+        return self._add(("channel", channel), callback)
+
+    def psubscribe(self, pattern: str, callback: Callback) -> Callable[[], None]:
+        """Like subscribe, for every channel matching a glob pattern."""
+        return self._add(("pattern", pattern), callback)
+
+    def close(self) -> None:
+        pass
+
+    def _add(self, key: Tuple[str, str], callback: Callback) -> Callable[[], None]:
+        with self._lock:
+            callbacks = self._callbacks.setdefault(key, [])
+            callbacks.append(callback)
+            first = len(callbacks) == 1
+        if first:
+            self._listen(key)
+
+        def remove():
+            with self._lock:
+                callbacks = self._callbacks.get(key)
+                if not callbacks or callback not in callbacks:
+                    return
+                callbacks.remove(callback)
+                last = not callbacks
+                if last:
+                    del self._callbacks[key]
+            if last:
+                self._unlisten(key)
+        return remove
+
+    def _listen(self, key: Tuple[str, str]) -> None:
+        pass
+
+    def _unlisten(self, key: Tuple[str, str]) -> None:
+        pass
+
+    def _dispatch(self, key: Tuple[str, str], channel: str, message: str) -> int:
+        with self._lock:
+            callbacks = list(self._callbacks.get(key, ()))
+        for callback in callbacks:
+            try:
+                callback(channel, message)
+            except Exception:
+                PUBSUB_MESSAGES.inc("received", "callback_error")
+        return len(callbacks)
+
+
+class LocalBroker(Broker):
+    """In-process delivery for single-worker deployments."""
+
+    def __init__(self):
+        super().__init__()
+        self._values: Dict[str, Tuple[str, float]] = {}
+
+    def publish(self, channel: str, message: str) -> int:
+        with self._lock:
+            keys = [k for k in self._callbacks if (k[0] == "channel" and k[1] == channel)
+                    or (k[0] == "pattern" and fnmatch.fnmatchcase(channel, k[1]))]
+        delivered = sum(self._dispatch(key, channel, message) for key in keys)
+        PUBSUB_MESSAGES.inc("published", "ok")
+        return delivered
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl if ttl else float("inf"))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._values.pop(key, None)
+                return None
+            return entry[0]
+
+
+# --- RESP ------------------------------------------------------------------
+
+def encode_command(*args: str) -> bytes:
+    out = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+class RespError(Exception):
+    pass
+
+
+class _RespReader:
+    """Incremental RESP reply parser over a blocking socket."""
+
+    def __init__(self, sock: socket.socket):
+        self._file = sock.makefile("rb")
+
+    def read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("broker closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2].decode("utf-8", "replace")
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self.read() for _ in range(length)]
+        raise RespError(f"unexpected reply {line!r}")
+
+    def close(self):
+        self._file.close()
+
+
+def _connect(url: str, timeout: Optional[float]) -> socket.socket:
+    """Connected socket whose connect, sends and reads give up after `timeout` seconds (None blocks)."""
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(parsed.path)
+    else:
+        sock = socket.create_connection((parsed.hostname or "127.0.0.1", parsed.port or 6379), timeout=timeout or 5)
+        sock.settimeout(timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+class RespBroker(Broker):
+    """
+    Redis-protocol transport: one connection for commands, one for
+    subscriptions read by a daemon thread that reconnects and resubscribes.
+    Publishing never blocks on a dead or hung broker for long: commands time
+    out after COMMAND_TIMEOUT, the message is dropped rather than raised into
+    the caller (a log handler or the job thread), and commands fail fast
+    until RECONNECT_DELAY has passed and a new connection is tried.
+    """
+
+    remote = True
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        parsed = urlparse(url)
+        self._db = parsed.path.lstrip("/") if parsed.scheme == "redis" and parsed.path.strip("/") else None
+        self._password = parsed.password
+        self._cmd_lock = threading.Lock()
+        self._cmd_sock: Optional[socket.socket] = None
+        self._cmd_reader: Optional[_RespReader] = None
+        self._cmd_retry_at = 0.0
+        self._sub_lock = threading.Lock()
+        self._sub_sock: Optional[socket.socket] = None
+        self._closed = threading.Event()
+        self._sub_thread: Optional[threading.Thread] = None
+
+    # Commands
+
+    def _open(self, blocking: bool = False) -> Tuple[socket.socket, _RespReader]:
+        """Connection with COMMAND_TIMEOUT on every operation; blocking=True lifts it once authenticated (subscribers idle)."""
+        sock = _connect(self.url, COMMAND_TIMEOUT)
+        reader = _RespReader(sock)
+        if self._password:
+            sock.sendall(encode_command("AUTH", self._password))
+            reader.read()
+        if self._db:
+            sock.sendall(encode_command("SELECT", self._db))
+            reader.read()
+        if blocking:
+            sock.settimeout(None)
+        return sock, reader
+
+    def _command(self, *args: str):
+        with self._cmd_lock:
+            for attempt in range(2):
+                if self._cmd_sock is None and time.monotonic() < self._cmd_retry_at:
+                    raise ConnectionError("broker unavailable")
+                try:
+                    if self._cmd_sock is None:
+                        self._cmd_sock, self._cmd_reader = self._open()
+                    self._cmd_sock.sendall(encode_command(*args))
+                    return self._cmd_reader.read()
+                except socket.timeout:
+                    # Hung broker: the reply may still arrive, so this connection is unusable.
+                    self._drop_command_connection()
+                    self._cmd_retry_at = time.monotonic() + RECONNECT_DELAY
+                    raise
+                except (OSError, ConnectionError):
+                    # A stale connection gets one immediate retry on a fresh one.
+                    self._drop_command_connection()
+                    if attempt:
+                        self._cmd_retry_at = time.monotonic() + RECONNECT_DELAY
+                        raise
+
+    def _drop_command_connection(self):
+        if self._cmd_sock is not None:
+            try:
+                self._cmd_reader.close()
+                self._cmd_sock.close()
+            except OSError:
+                pass
+        self._cmd_sock = self._cmd_reader = None
+
+    def publish(self, channel: str, message: str) -> int:
+        try:
+            receivers = self._command("PUBLISH", channel, message)
+        except (OSError, ConnectionError, RespError):
+            PUBSUB_MESSAGES.inc("published", "error")
+            return 0
+        PUBSUB_MESSAGES.inc("published", "ok")
+        return receivers
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        args = ("SET", key, value) + (("EX", str(int(ttl))) if ttl else ())
+        try:
+            self._command(*args)
+        except (OSError, ConnectionError, RespError):
+            PUBSUB_MESSAGES.inc("published", "error")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self._command("GET", key)
+        except (OSError, ConnectionError, RespError):
+            return None
+
+    # Subscriptions
+
+    def _listen(self, key: Tuple[str, str]) -> None:
+        self._ensure_subscriber()
+        self._send_sub(("SUBSCRIBE" if key[0] == "channel" else "PSUBSCRIBE"), key[1])
+
+    def _unlisten(self, key: Tuple[str, str]) -> None:
+        self._send_sub(("UNSUBSCRIBE" if key[0] == "channel" else "PUNSUBSCRIBE"), key[1])
+
+    def _send_sub(self, *args: str) -> None:
+        with self._sub_lock:
+            if self._sub_sock is None:
+                return  # the reader thread subscribes everything when it reconnects
+            try:
+                self._sub_sock.sendall(encode_command(*args))
+            except OSError:
+                pass
+
+    def _ensure_subscriber(self) -> None:
+        with self._sub_lock:
+            if self._sub_thread is None:
+                self._sub_thread = threading.Thread(target=self._read_loop, name="aura-pubsub", daemon=True)
+                self._sub_thread.start()
+
+    def _read_loop(self) -> None:
+        while not self._closed.is_set():
+            try:
+                sock, reader = self._open(blocking=True)
+            except (OSError, ConnectionError, RespError):
+                self._closed.wait(RECONNECT_DELAY)
+                continue
+            with self._sub_lock:
+                self._sub_sock = sock
+                with self._lock:
+                    keys = list(self._callbacks)
+                for kind, name in keys:
+                    sock.sendall(encode_command("SUBSCRIBE" if kind == "channel" else "PSUBSCRIBE", name))
+            try:
+                while True:
+                    reply = reader.read()
+                    if not isinstance(reply, list) or not reply:
+                        continue
+                    if reply[0] == "message":
+                        self._dispatch(("channel", reply[1]), reply[1], reply[2])
+                        PUBSUB_MESSAGES.inc("received", "ok")
+                    elif reply[0] == "pmessage":
+                        self._dispatch(("pattern", reply[1]), reply[2], reply[3])
+                        PUBSUB_MESSAGES.inc("received", "ok")
+            except (OSError, ConnectionError, RespError):
+                pass
+            finally:
+                with self._sub_lock:
+                    self._sub_sock = None
+                try:
+                    reader.close()
+                    sock.close()
+                except OSError:
+                    pass
+            self._closed.wait(RECONNECT_DELAY)
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._cmd_lock:
+            self._drop_command_connection()
+        with self._sub_lock:
+            if self._sub_sock is not None:
+                try:
+                    self._sub_sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+_broker: Optional[Broker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    """The process-wide broker for AURA_PUBSUB_URL."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            scheme = urlparse(PUBSUB_URL).scheme
+            if scheme in ("redis", "unix"):
+                _broker = RespBroker(PUBSUB_URL)
+            elif scheme in ("", "local"):
+                _broker = LocalBroker()
+            else:
+                raise ValueError(f"Unsupported AURA_PUBSUB_URL scheme: {scheme!r}")
+        return _broker
+
+
+# --- Bundled broker ---------------------------------------------------------
+
+class _BrokerServer:
+    """
+    The RESP subset above, for running without Redis. Single asyncio loop;
+    slow subscribers are disconnected rather than buffered without bound.
+    """
+
+    MAX_PENDING_BYTES = 8 * 2**20
+
+    def __init__(self):
+        self.channels: Dict[str, set] = {}
+        self.patterns: Dict[str, set] = {}
+        self.values: Dict[str, Tuple[str, float]] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscribed: List[Tuple[Dict[str, set], str]] = []
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    return
+                reply = self._execute(args, writer, subscribed)
+                if reply is not None:
+                    writer.write(reply)
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            for table, name in subscribed:
+                table.get(name, set()).discard(writer)
+            writer.close()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[str]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.decode().split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2].decode("utf-8", "replace"))
+        return args
+
+    def _execute(self, args: List[str], writer: asyncio.StreamWriter, subscribed) -> Optional[bytes]:
+        command = args[0].upper()
+        if command == "PING":
+            return b"+PONG\r\n"
+        if command == "PUBLISH":
+            return b":%d\r\n" % self._publish(args[1], args[2])
+        if command in ("SUBSCRIBE", "PSUBSCRIBE", "UNSUBSCRIBE", "PUNSUBSCRIBE"):
+            table = self.patterns if command.startswith("P") else self.channels
+            out = []
+            for name in args[1:]:
+                if command.endswith("UNSUBSCRIBE"):
+                    table.get(name, set()).discard(writer)
+                    if (table, name) in subscribed:
+                        subscribed.remove((table, name))
+                else:
+                    table.setdefault(name, set()).add(writer)
+                    subscribed.append((table, name))
+                kind = command.lower().encode()
+                out.append(b"*3\r\n$%d\r\n%s\r\n%s:%d\r\n" % (len(kind), kind, encode_command(name)[4:], len(subscribed)))
+            return b"".join(out)
+        if command == "SET":
+            ttl = float(args[4]) if len(args) >= 5 and args[3].upper() == "EX" else None
+            self.values[args[1]] = (args[2], time.monotonic() + ttl if ttl else float("inf"))
+            return b"+OK\r\n"
+        if command == "GET":
+            entry = self.values.get(args[1])
+            if entry is None or entry[1] < time.monotonic():
+                self.values.pop(args[1], None)
+                return b"$-1\r\n"
+            data = entry[0].encode("utf-8")
+            return b"$%d\r\n%s\r\n" % (len(data), data)
+        if command in ("AUTH", "SELECT"):
+            return b"+OK\r\n"
+        return f"-ERR unknown command '{command}'\r\n".encode()
+
+    def _publish(self, channel: str, message: str) -> int:
+        targets = [(w, encode_command("message", channel, message)) for w in self.channels.get(channel, ())]
+        for pattern, writers in self.patterns.items():
+            if fnmatch.fnmatchcase(channel, pattern):
+                frame = encode_command("pmessage", pattern, channel, message)
+                targets.extend((w, frame) for w in writers)
+        for writer, frame in targets:
+            if writer.transport.get_write_buffer_size() > self.MAX_PENDING_BYTES:
+                writer.close()
+                continue
+            writer.write(frame)
+        return len(targets)
+
+
+async def serve(unix_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 6390) -> None:
+    server_state = _BrokerServer()
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        server = await asyncio.start_unix_server(server_state.handle, path=unix_path)
+        print(f"📡 Aura pub/sub broker on unix://{unix_path}")
+    else:
+        server = await asyncio.start_server(server_state.handle, host=host, port=port)
+        print(f"📡 Aura pub/sub broker on redis://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local pub/sub broker for multi-worker Aura deployments")
+    parser.add_argument("--unix", help="Listen on this Unix socket path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@ from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from metrics import LLM_LATENCY, LLM_REQUESTS, classify_llm_error
+from tracing import span
+from cancellation import current_token
 
 load_dotenv()
 
@@ -156,7 +159,9 @@ class ResilientLLM(BaseChatModel):
         for key in ["available_functions", "from_task", "from_agent", "response_model", "callbacks"]:
             kwargs.pop(key, None)
 
+        token = current_token()
         while attempts < 3: # Reduced from 8
+            token.raise_if_cancelled()
             is_openai = "gpt" in current_model.lower()
             is_openrouter = "openrouter" in current_model.lower() or "qwen" in current_model.lower()
             
@@ -165,17 +170,22 @@ class ResilientLLM(BaseChatModel):
                 try:
                     logger.info(f"[ATTEMPT] OpenRouter Model={raw_model}")
                     llm = ChatOpenAI(
-                        base_url="https://openrouter.ai/api/v1",
+                        base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
                         model=raw_model,
                         openai_api_key=os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY"),
                         temperature=kwargs.get("temperature", 0.7),
                         max_retries=0
                     )
-                    res = llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                    call_started = time.perf_counter()
+                    with span("llm.call", provider="openrouter", model=raw_model, key="-"):
+                        res = llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                    LLM_LATENCY.observe(time.perf_counter() - call_started, "resilient_engine", "openrouter", raw_model, "-")
+                    LLM_REQUESTS.inc("resilient_engine", "openrouter", raw_model, "-", "ok")
                     logger.info(f"_generate returned successfully via OpenRouter.")
                     self.current_key_idx = 0
                     return self._normalize_result(res)
                 except Exception as e:
+                    LLM_REQUESTS.inc("resilient_engine", "openrouter", raw_model, "-", classify_llm_error(e))
                     import sys
                     exc_type, exc_obj, exc_tb = sys.exc_info()
                     logger.info(f"[OpenRouter ERROR] {str(e)}")
@@ -186,7 +196,7 @@ class ResilientLLM(BaseChatModel):
                 for key in keys_to_try:
                     k_idx = self.google_keys.index(key) + 1
                     try:
-                        logger.info(f"[ATTEMPT] Model={current_model} | Key={k_idx}/8")
+                        logger.info(f"[ATTEMPT] Model={current_model} | Key={k_idx}/8", extra={"rate_limit": f"attempt:{current_model}"})
                         # Extract raw model name for the native SDK
                         raw_model = current_model
                         if current_model.startswith("gemini/"):
@@ -207,27 +217,33 @@ class ResilientLLM(BaseChatModel):
                              pass
                         
                         logger.info(f"Calling underlying _generate...")
-                        res = llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                        call_started = time.perf_counter()
+                        with span("llm.call", provider="google", model=current_model, key=str(k_idx)):
+                            res = llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                        LLM_LATENCY.observe(time.perf_counter() - call_started, "resilient_engine", "google", current_model, str(k_idx))
+                        LLM_REQUESTS.inc("resilient_engine", "google", current_model, str(k_idx), "ok")
                         logger.info(f"_generate returned successfully.")
                         self.current_key_idx = self.google_keys.index(key)
                         return self._normalize_result(res)
                     except Exception as e:
+                        LLM_REQUESTS.inc("resilient_engine", "google", current_model, str(k_idx), classify_llm_error(e))
                         import sys
                         exc_type, exc_obj, exc_tb = sys.exc_info()
-                        logger.info(f"[ERROR] Type={exc_type.__name__} | Msg={str(e)} | Line={exc_tb.tb_lineno}")
+                        logger.info(f"[ERROR] Type={exc_type.__name__} | Msg={str(e)} | Line={exc_tb.tb_lineno}", extra={"rate_limit": f"error:{current_model}"})
                         
                         err_msg = str(e).lower()
                         if any(x in err_msg for x in ["404", "not found", "not supported", "not exist"]):
                             break # Skip keys for this model
                         if any(x in err_msg for x in ["429", "resource_exhausted", "quota", "rate limit reached"]):
                             msg = f"🔄 Quota hit for key {k_idx}. Rotating to next key..."
-                            logger.info(f"{msg}")
+                            logger.info(f"{msg}", extra={"rate_limit": f"quota:{current_model}"})
                             continue # Try next key
                         # Handle transient 500s/503s
                         if any(x in err_msg for x in ["500", "503", "service unavailable", "internal error"]):
                             msg = f"⏳ Server error. Quick retry with next key..."
                             logger.info(f"{msg}")
-                            time.sleep(1) # Reduced from 5
+                            with span("backoff.sleep", reason="retry", model=current_model, seconds=1):
+                                token.sleep(1) # Reduced from 5
                             continue
                         raise e
             else:
@@ -238,9 +254,14 @@ class ResilientLLM(BaseChatModel):
                         temperature=kwargs.get("temperature", 0.7),
                         max_retries=0
                     )
-                    res = llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                    call_started = time.perf_counter()
+                    with span("llm.call", provider="openai", model=current_model, key="-"):
+                        res = llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                    LLM_LATENCY.observe(time.perf_counter() - call_started, "resilient_engine", "openai", current_model, "-")
+                    LLM_REQUESTS.inc("resilient_engine", "openai", current_model, "-", "ok")
                     return self._normalize_result(res)
                 except Exception as e:
+                    LLM_REQUESTS.inc("resilient_engine", "openai", current_model, "-", classify_llm_error(e))
                     if "quota" not in str(e).lower():
                         raise e
 
@@ -249,7 +270,8 @@ class ResilientLLM(BaseChatModel):
             self.current_key_idx = 0
             attempts += 1
             logger.info(f"Falling back to model {current_model} (Attempt {attempts}/3)")
-            time.sleep(1) # Reduced from 3
+            with span("backoff.sleep", reason="failover", model=current_model, seconds=1):
+                token.sleep(1) # Reduced from 3
 
         raise RuntimeError("CRITICAL FAILURE: Complete resource exhaustion after exhaustive rotation.")
 
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+# Time and peak Python memory of writing a multi-megabyte Developer Agent
+# output to disk: the previous split-based parser versus dev_output's
+# single-pass parser, fed the whole string or a token stream.
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dev_output import write_dev_output
+
+
+def legacy_write(dev_output, project_dir):
+    """The split-based parser run_direct_flow used before dev_output.py."""
+    files_created = []
+    if "---FILE_START---" in dev_output:
+        file_blocks = dev_output.split("---FILE_START---")[1:]
+        for block in file_blocks:
+            if "---FILE_END---" in block:
+                content_block = block.split("---FILE_END---")[0].strip()
+                if "|" in content_block:
+                    filename, code = content_block.split("|", 1)
+                    filename = filename.strip("`").strip()
+                    if code.startswith("```"):
+                        lines = code.splitlines()
+                        if len(lines) > 2: code = "\n".join(lines[1:-1])
+                    filepath = os.path.join(project_dir, filename)
+                    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+                    with open(filepath, "w", encoding="utf-8") as f:
+                        f.write(code)
+                    files_created.append(filename)
+    return files_created
+
+
+def make_output(target_bytes, lines_per_file=60):
+    body = "\n".join(f"    value_{j} = compute(state, {j})  # generated line {j}" for j in range(lines_per_file))
+    block_size = len(body) + 80
+    n_files = max(1, target_bytes // block_size)
+    blocks = [
+        f"---FILE_START---\nsrc/pkg_{i % 32}/module_{i}.py|```python\ndef main():\n{body}\n```\n---FILE_END---"
+        for i in range(n_files)
+    ]
+    return "Here is the complete codebase.\n\n" + "\n\n".join(blocks), n_files
+
+
+def measure(label, func):
+    out_dir = tempfile.mkdtemp(prefix="aura_dev_output_bench_")
+    try:
+        tracemalloc.start()
+        started = time.perf_counter()
+        func(out_dir)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    print(f"   {label:<28} {elapsed * 1000:>8.1f} ms   peak {peak / 2**20:>7.2f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Developer output parser: time and peak memory")
+    parser.add_argument("--sizes", default="1,4,16", help="Output sizes in MiB, comma separated")
+    parser.add_argument("--chunk", type=int, default=256, help="Characters per streamed chunk")
+    args = parser.parse_args()
+
+    print("🚀 Developer output parse + write (peak = Python allocations on top of the input string)")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        text, n_files = make_output(size * 2**20)
+        print(f"\n{size} MiB, {n_files} files")
+        measure("legacy split parser", lambda d: legacy_write(text, d))
+        measure("single-pass, whole string", lambda d: write_dev_output(text, d))
+        measure(
+            f"single-pass, {args.chunk}-char stream",
+            lambda d: write_dev_output((text[i:i + args.chunk] for i in range(0, len(text), args.chunk)), d),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+import urllib.error
+import urllib.parse
+import urllib.request
+import concurrent.futures
+
+# End-to-end throughput benchmark against scripts/mock_llm_server.py.
+#
+#   flow mode: runs N concurrent run_direct_flow jobs in-process (like BackgroundTasks)
+#   api mode:  drives a running backend through /api/auth, /api/run, /api/status, /api/trace
+#
+# Reports jobs/min, p50/p95/p99 latency per phase and retries per job.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ["vision", "architect", "developer", "debug", "optimization", "cognitive", "sustainability"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[idx]
+
+
+def summarize_spans(spans):
+    """Per-phase durations (seconds) and retry count from one job's spans."""
+    phases = {}
+    retries = 0
+    for s in spans:
+        name = s["name"]
+        if name.startswith("phase."):
+            phases[name[len("phase."):]] = s["dur"] / 1e6
+        elif name == "backoff.sleep":
+            retries += 1
+    return phases, retries
+
+
+def point_pipeline_at(mock_url):
+    """Route every provider at the mock and shrink backoff delays, before direct_flow is imported."""
+    base = mock_url.rstrip("/")
+    os.environ["OPENROUTER_BASE_URL"] = f"{base}/v1"
+    os.environ["OPENAI_BASE_URL"] = f"{base}/v1"
+    os.environ["GOOGLE_API_ENDPOINT"] = base
+    os.environ.setdefault("AURA_RETRY_BASE_DELAY", "0.05")
+    os.environ.setdefault("AURA_FAILOVER_DELAY", "0.05")
+    for var in ["GOOGLE_API_KEY", "GOOGLE_API_KEY_2", "OPENAI_API_KEY", "OPENROUTER_API_KEY"]:
+        os.environ.setdefault(var, f"mock-{var.lower()}")
+
+
+def run_flow_mode(args):
+    from direct_flow import run_direct_flow
+    from tracing import get_spans
+
+    def job(idx):
+        job_id = f"bench-{uuid.uuid4()}"
+        try:
+            for update in run_direct_flow(None, f"Benchmark project {idx}", "Standard limits", args.model, job_id=job_id):
+                if update.get("error"):
+                    return job_id, False
+            return job_id, True
+        except Exception as e:
+            print(f"[{job_id}] FAILED: {e}")
+            return job_id, False
+
+    results = []
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for job_id, ok in executor.map(job, range(args.jobs)):
+            phases, retries = summarize_spans(get_spans(job_id))
+            results.append({"ok": ok, "phases": phases, "retries": retries})
+    return results, time.perf_counter() - start
+
+
+def _request(method, url, data=None, token=None, form=False):
+    headers = {}
+    body = None
+    if data is not None:
+        if form:
+            body = urllib.parse.urlencode(data).encode("utf-8")
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read() or b"null")
+
+
+def run_api_mode(args):
+    base = args.api_url.rstrip("/")
+    # New accounts start with 50 credits, i.e. 5 runs each.
+    runs_per_user = 5
+    tokens = []
+    for _ in range((args.jobs + runs_per_user - 1) // runs_per_user):
+        email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+        _request("POST", f"{base}/api/auth/register", {"email": email, "password": "bench-password"})
+        token = _request("POST", f"{base}/api/auth/token", {"username": email, "password": "bench-password"}, form=True)
+        tokens.append(token["access_token"])
+
+    def job(idx):
+        token = tokens[idx // runs_per_user]
+        started = _request("POST", f"{base}/api/run", {
+            "user_desc": f"Benchmark project {idx}",
+            "voice_reqs": "Standard limits",
+            "model_id": args.model,
+        }, token=token)
+        job_id = started["job_id"]
+        status = {}
+        while True:
+            time.sleep(args.poll_interval)
+            status = _request("GET", f"{base}/api/status/{job_id}")
+            if not status.get("is_running") and (status.get("progress", 0) >= 100 or status.get("error")):
+                break
+        try:
+            events = _request("GET", f"{base}/api/trace/{job_id}")["traceEvents"]
+        except urllib.error.HTTPError:
+            events = []
+        spans = [e for e in events if e.get("ph") == "X"]
+        phases, retries = summarize_spans(spans)
+        return {"ok": not status.get("error"), "phases": phases, "retries": retries}
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(job, range(args.jobs)))
+    return results, time.perf_counter() - start
+
+
+def report(results, elapsed, mock_stats=None):
+    done = [r for r in results if r["ok"]]
+    print(f"\n📊 {len(done)}/{len(results)} jobs completed in {elapsed:.1f}s "
+          f"→ {len(done) / elapsed * 60:.1f} jobs/min")
+    print(f"{'phase':>15} | {'p50':>8} | {'p95':>8} | {'p99':>8}")
+    for phase in PHASES:
+        values = [r["phases"][phase] for r in results if phase in r["phases"]]
+        if values:
+            print(f"{phase:>15} | {percentile(values, 50):>7.2f}s | {percentile(values, 95):>7.2f}s | {percentile(values, 99):>7.2f}s")
+    retries = [r["retries"] for r in results]
+    print(f"retries/job: mean {statistics.mean(retries):.2f}, max {max(retries)}")
+    if mock_stats:
+        print(f"mock provider: {mock_stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline throughput against the mock LLM provider")
+    parser.add_argument("--mode", choices=["flow", "api"], default="flow")
+    parser.add_argument("--jobs", type=int, default=8, help="Total jobs to run")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs in flight at once")
+    parser.add_argument("--model", default="gemini-2.0-flash")
+    parser.add_argument("--mock-url", default=None, help="Use an already running mock instead of starting one")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000", help="Backend base URL (api mode)")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--latency", default="uniform:0.05,0.2", help="Mock latency distribution")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-503", type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock_url = args.mock_url
+    server = None
+    if mock_url is None:
+        import mock_llm_server
+        mock_args = mock_llm_server.build_arg_parser().parse_args([
+            "--port", "0", "--latency", args.latency,
+            "--rate-429", str(args.rate_429), "--rate-503", str(args.rate_503),
+        ])
+        server = mock_llm_server.start_server(mock_args)
+        mock_url = f"http://127.0.0.1:{server.server_port}"
+    point_pipeline_at(mock_url)
+
+    print(f"🚀 E2E throughput benchmark ({args.mode} mode, {args.jobs} jobs, concurrency {args.concurrency}) against {mock_url}")
+    if args.mode == "api":
+        print("   The backend must have been started with the same provider env vars pointing at this mock.")
+        results, elapsed = run_api_mode(args)
+    else:
+        results, elapsed = run_flow_mode(args)
+
+    try:
+        mock_stats = _request("GET", f"{mock_url.rstrip('/')}/stats")
+    except Exception:
+        mock_stats = None
+    report(results, elapsed, mock_stats)
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
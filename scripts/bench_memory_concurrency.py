@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+# Benchmark against a throwaway memory directory, never the real one.
+BENCH_DIR = tempfile.mkdtemp(prefix="aura_memory_bench_")
+os.environ["AURA_MEMORY_DIR"] = BENCH_DIR
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import memory_store
+from logger_config import set_job_id
+
+
+def run_round(n_jobs, appends_per_job, shared):
+    """Append from n_jobs threads at once and return entries per second."""
+    barrier = threading.Barrier(n_jobs + 1)
+
+    def job(idx):
+        set_job_id(f"bench-{n_jobs}-{idx}")
+        barrier.wait()
+        for i in range(appends_per_job):
+            memory_store.append_memory(
+                "file_events",
+                {"kind": "file_write", "path": f"src/file_{i}.py", "summary": f"Agent wrote file src/file_{i}.py"},
+                shared=shared,
+            )
+
+    threads = [threading.Thread(target=job, args=(i,)) for i in range(n_jobs)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    memory_store.flush()
+    elapsed = time.perf_counter() - start
+    return n_jobs * appends_per_job / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory store append throughput vs. concurrent jobs")
+    parser.add_argument("--jobs", default="1,2,4,8,16", help="Comma separated job counts")
+    parser.add_argument("--appends", type=int, default=5000, help="Appends per job")
+    parser.add_argument("--durability", default="interval", choices=memory_store.DURABILITY_MODES)
+    args = parser.parse_args()
+
+    memory_store.configure_writer(durability=args.durability)
+    print(f"🚀 Memory store concurrency benchmark ({args.durability}, {memory_store.WRITER_SHARDS} writer shards)")
+    print(f"{'jobs':>5} | {'per-job streams':>16} | {'one shared stream':>18}")
+    try:
+        for n_jobs in [int(j) for j in args.jobs.split(",")]:
+            namespaced = run_round(n_jobs, args.appends, shared=False)
+            shared = run_round(n_jobs, args.appends, shared=True)
+            print(f"{n_jobs:>5} | {namespaced:>12,.0f}/s | {shared:>14,.0f}/s")
+    finally:
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+
+# Microbenchmarks for the pure-Python hot paths, pyperf style: each benchmark
+# is calibrated to a minimum sample time, run for several samples and reported
+# as median ± stdev per call. Results can be saved as a baseline and later runs
+# compared against it; a slowdown beyond --threshold is flagged and exits 1.
+#
+#   python scripts/bench_micro.py --save-baseline
+#   python scripts/bench_micro.py --compare            # against the stored baseline
+#   python scripts/bench_micro.py -b memory --compare   # only benchmarks matching "memory"
+#
+# Benchmarks whose modules cannot be imported here (e.g. crewai, langchain or
+# google-generativeai missing) are reported as skipped.
+
+# Benchmark against throwaway directories, never the real memory store or jobs.
+BENCH_DIR = tempfile.mkdtemp(prefix="aura_micro_bench_")
+os.environ["AURA_MEMORY_DIR"] = os.path.join(BENCH_DIR, "memory")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines")
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "micro.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a setup function; it returns the zero-argument callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# --- Inputs -----------------------------------------------------------------
+
+def dev_output(n_files=500, lines_per_file=40):
+    blocks = []
+    for i in range(n_files):
+        body = "\n".join(f"    value_{j} = compute({i}, {j})  # line {j}" for j in range(lines_per_file))
+        blocks.append(f"---FILE_START---\nsrc/pkg_{i % 20}/module_{i}.py|```python\ndef main():\n{body}\n```\n---FILE_END---")
+    return "Here is the complete codebase.\n\n" + "\n\n".join(blocks) + "\n\nAll files generated."
+
+
+def tool_schema(depth=6, width=4):
+    """Nested JSON schema shaped like a CrewAI tool definition."""
+    if depth == 0:
+        return {"type": "string", "description": "leaf", "additionalProperties": False}
+    return {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": {f"field_{i}": tool_schema(depth - 1, width) for i in range(width)},
+        "required": [f"field_{i}" for i in range(width)],
+        "anyOf": [{"type": "null", "additionalProperties": True}],
+    }
+
+
+# --- Benchmarks -------------------------------------------------------------
+
+@benchmark("dev_output.parse_dev_output[500 files]")
+def bench_parse_dev_output():
+    from dev_output import parse_dev_output
+    text = dev_output()
+    return lambda: parse_dev_output(text)
+
+
+@benchmark("dev_output.parse_dev_output[500 files, 64-char token stream]")
+def bench_parse_dev_output_stream():
+    from dev_output import parse_dev_output
+    text = dev_output()
+    chunks = [text[i:i + 64] for i in range(0, len(text), 64)]
+    return lambda: parse_dev_output(chunks)
+
+
+@benchmark("tools.write_file_tool[sanitize+fence+write]")
+def bench_write_file_tool():
+    from tools import write_file_tool
+    from logger_config import set_job_id
+    func = getattr(write_file_tool, "func", write_file_tool)
+    os.chdir(BENCH_DIR)
+    set_job_id("bench-write-file")
+    data = "src/app/CON.py|```python\n" + "\n".join(f"print({i})" for i in range(200)) + "\n```"
+    return lambda: func(data)
+
+
+@benchmark("ResilientLLM._recursive_remove_additional_props[4^6 schema]")
+def bench_remove_additional_props():
+    from resilient_engine import ResilientLLM
+    llm = ResilientLLM.__new__(ResilientLLM)
+    schema = json.dumps(tool_schema())
+    return lambda: llm._recursive_remove_additional_props(json.loads(schema))
+
+
+@benchmark("ResilientLLM._normalize_result[200 content parts]")
+def bench_normalize_result():
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from resilient_engine import ResilientLLM
+    llm = ResilientLLM.__new__(ResilientLLM)
+    parts = [{"type": "text", "text": f"chunk {i} " * 20} if i % 3 else f"raw {i} " * 20 for i in range(200)]
+
+    def run():
+        res = ChatResult(generations=[ChatGeneration(message=AIMessage(content=list(parts)))])
+        return llm._normalize_result(res)
+    return run
+
+
+def _fill_memory_stream(stream, entries):
+    import memory_store
+    for i in range(entries):
+        memory_store.append_memory(stream, {
+            "kind": "file_write",
+            "path": f"src/pkg_{i % 50}/module_{i}.py",
+            "summary": f"Agent wrote file src/pkg_{i % 50}/module_{i}.py for feature {i % 97}",
+        }, shared=True)
+    memory_store.flush()
+
+
+_MEMORY_STREAM = "bench_events"
+_MEMORY_ENTRIES = 100_000
+
+
+def _memory_ready():
+    import memory_store
+    if not getattr(_memory_ready, "done", False):
+        _fill_memory_stream(_MEMORY_STREAM, _MEMORY_ENTRIES)
+        _memory_ready.done = True
+    return memory_store
+
+
+@benchmark("memory_store.load_memory[100k lines, limit=50]")
+def bench_load_memory_tail():
+    memory_store = _memory_ready()
+    return lambda: memory_store.load_memory(_MEMORY_STREAM, limit=50, shared=True)
+
+
+@benchmark("memory_store.load_memory[100k lines, since=last 1%]")
+def bench_load_memory_since():
+    memory_store = _memory_ready()
+    entries = memory_store.load_memory(_MEMORY_STREAM, limit=_MEMORY_ENTRIES // 100, shared=True)
+    since = entries[0]["ts"]
+    return lambda: memory_store.load_memory(_MEMORY_STREAM, since=since, shared=True)
+
+
+@benchmark("memory_store.summarize_memory[100k lines, recent]")
+def bench_summarize_memory():
+    memory_store = _memory_ready()
+    return lambda: memory_store.summarize_memory(_MEMORY_STREAM, limit=20, shared=True)
+
+
+@benchmark("memory_store.summarize_memory[100k lines, query]")
+def bench_summarize_memory_query():
+    memory_store = _memory_ready()
+    memory_store.summarize_memory(_MEMORY_STREAM, query="module feature", shared=True)  # build the index once
+    return lambda: memory_store.summarize_memory(_MEMORY_STREAM, limit=20, query="pkg_7 feature 42", shared=True)
+
+
+def _queue_handler_record():
+    from logger_config import QueueHandler
+    handler = QueueHandler()
+    handler.setFormatter(logging.Formatter('[%(name)s] %(message)s'))
+    record = logging.LogRecord("direct_flow", logging.INFO, __file__, 1, "[ROTATION] %s | Key %d/8...", ("models/gemini-2.0-flash", 3), None)
+    record.job_id = "bench-emit"
+    return handler, record
+
+
+@benchmark("logger_config.QueueHandler.emit[unwatched]")
+def bench_emit_unwatched():
+    handler, record = _queue_handler_record()
+    return lambda: handler.emit(record)
+
+
+@benchmark("logger_config.QueueHandler.emit[watched, drained]")
+def bench_emit_watched():
+    from logger_config import add_subscriber, log_queue
+    handler, record = _queue_handler_record()
+    add_subscriber("bench-emit")
+
+    def run():
+        handler.emit(record)
+        log_queue.get_nowait()
+    return run
+
+
+# --- Runner -----------------------------------------------------------------
+
+def measure(func, samples, min_time):
+    """Calibrate loops so one sample takes >= min_time, then return per-call seconds for each sample."""
+    func()  # warmup
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    values = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        values.append((time.perf_counter() - started) / loops)
+    return values, loops
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results, baseline, threshold):
+    """Print the change against the baseline medians and return the regressed benchmark names."""
+    regressions = []
+    print(f"\n🔎 Compared with baseline ({baseline.get('python', '?')}, {baseline.get('created', '?')}), threshold {threshold:.0%}")
+    for name, result in results.items():
+        old = baseline["benchmarks"].get(name)
+        if old is None:
+            print(f"   {name}: new benchmark")
+            continue
+        change = result["median"] / old["median"] - 1
+        if change > threshold:
+            regressions.append(name)
+            marker = "❌ slower"
+        elif change < -threshold:
+            marker = "✅ faster"
+        else:
+            marker = "   same"
+        print(f"{marker} {name}: {format_time(old['median'])} -> {format_time(result['median'])} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for Aura's pure-Python hot paths")
+    parser.add_argument("-b", "--bench", action="append", default=[], help="Only run benchmarks containing this text")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per sample")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Store results as the baseline ({os.path.relpath(DEFAULT_BASELINE, ROOT)})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare against a baseline JSON (default: stored baseline)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown fraction that counts as a regression")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args()
+
+    selected = [n for n in BENCHMARKS if not args.bench or any(b in n for b in args.bench)]
+    if args.list:
+        print("\n".join(selected))
+        return
+
+    cwd = os.getcwd()
+    results = {}
+    print(f"🚀 Microbenchmarks ({args.samples} samples, >= {args.min_time}s each)")
+    try:
+        for name in selected:
+            try:
+                func = BENCHMARKS[name]()
+            except ImportError as e:
+                print(f"⏭️  {name}: skipped ({e})")
+                continue
+            values, loops = measure(func, args.samples, args.min_time)
+            results[name] = {
+                "median": statistics.median(values),
+                "mean": statistics.mean(values),
+                "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+                "loops": loops,
+                "values": values,
+            }
+            print(f"{name}: {format_time(results[name]['median'])} ± {format_time(results[name]['stdev'])}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+    payload = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+    targets = [args.output] if args.output else []
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        targets.append(DEFAULT_BASELINE)
+    for target in targets:
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"💾 Results written to {target}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
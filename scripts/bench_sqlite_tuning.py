@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+# Concurrent write/read throughput of the backend's SQLite database with the
+# driver defaults (rollback journal, synchronous=FULL) versus the tuning that
+# backend/database.py applies to every connection (WAL, synchronous=NORMAL,
+# busy_timeout, mmap_size).
+#
+# The workload mirrors the API: writer threads commit project status updates
+# like run_aura_background does, reader threads poll projects like /api/projects.
+#
+#   python scripts/bench_sqlite_tuning.py --writers 8 --readers 8 --seconds 5
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bench_e2e_throughput import percentile
+
+# Same defaults as backend/database.SQLITE_PRAGMAS (which needs SQLAlchemy to import).
+TUNED = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 2**20,
+}
+CONFIGS = {"default": {}, "tuned": TUNED}
+
+SCHEMA = """
+CREATE TABLE users (id TEXT PRIMARY KEY, email TEXT UNIQUE, credit_balance INTEGER);
+CREATE TABLE projects (id TEXT PRIMARY KEY, user_id TEXT REFERENCES users(id), prompt_desc TEXT, status TEXT, created_at TEXT);
+CREATE INDEX ix_projects_user_id ON projects (user_id);
+"""
+
+
+def connect(path, pragmas):
+    # sqlite3's own 5 s timeout is what the untuned SQLAlchemy engine ends up with.
+    conn = sqlite3.connect(path, timeout=pragmas.get("busy_timeout", 5000) / 1000, check_same_thread=False)
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def seed(path, pragmas, users, projects_per_user):
+    conn = connect(path, pragmas)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO users VALUES (?, ?, 50)", [(f"u{i}", f"user{i}@example.com") for i in range(users)])
+    conn.executemany(
+        "INSERT INTO projects VALUES (?, ?, ?, 'Pending', datetime('now'))",
+        [(f"p{u}-{j}", f"u{u}", "Build a todo app " * 20) for u in range(users) for j in range(projects_per_user)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_config(name, pragmas, args):
+    work_dir = tempfile.mkdtemp(prefix="aura_sqlite_bench_")
+    path = os.path.join(work_dir, "aura_saas.db")
+    try:
+        seed(path, pragmas, args.users, args.projects)
+        stop = threading.Event()
+        lock = threading.Lock()
+        write_latencies, errors, reads = [], [0], [0]
+
+        def writer(idx):
+            conn = connect(path, pragmas)
+            n = 0
+            while not stop.is_set():
+                project = f"p{(idx + n) % args.users}-{n % args.projects}"
+                started = time.perf_counter()
+                try:
+                    conn.execute("UPDATE projects SET status = ? WHERE id = ?", (f"Running {n}", project))
+                    conn.commit()
+                except sqlite3.OperationalError:
+                    conn.rollback()
+                    with lock:
+                        errors[0] += 1
+                    continue
+                with lock:
+                    write_latencies.append(time.perf_counter() - started)
+                n += 1
+            conn.close()
+
+        def reader(idx):
+            conn = connect(path, pragmas)
+            n = 0
+            while not stop.is_set():
+                try:
+                    conn.execute(
+                        "SELECT id, status FROM projects WHERE user_id = ? ORDER BY created_at DESC", (f"u{(idx + n) % args.users}",)
+                    ).fetchall()
+                except sqlite3.OperationalError:
+                    with lock:
+                        errors[0] += 1
+                    continue
+                n += 1
+            with lock:
+                reads[0] += n
+            conn.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    writes = len(write_latencies)
+    print(
+        f"   {name:<8} writes {writes / elapsed:>8.0f}/s   reads {reads[0] / elapsed:>8.0f}/s   "
+        f"write p50 {percentile(write_latencies, 50) * 1000:>6.2f} ms   p99 {percentile(write_latencies, 99) * 1000:>7.2f} ms   "
+        f"locked errors {errors[0]}"
+    )
+    return writes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite write/read throughput: driver defaults vs backend tuning")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=20, help="Projects per user")
+    parser.add_argument("--config", action="append", choices=sorted(CONFIGS), help="Only run these configurations")
+    args = parser.parse_args()
+
+    print(f"🚀 SQLite {args.writers} writers + {args.readers} readers for {args.seconds:g}s (SQLite {sqlite3.sqlite_version})")
+    results = {name: run_config(name, CONFIGS[name], args) for name in (args.config or CONFIGS)}
+    if "default" in results and "tuned" in results and results["default"]:
+        print(f"\n   tuned / default write throughput: {results['tuned'] / results['default']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+import concurrent.futures
+
+# HTTP + WebSocket load generator for the backend API.
+#
+# Registers users through /api/auth, then for --duration seconds mixes
+# /api/run, /api/status, /api/projects and /api/projects/{id}/download traffic
+# from --workers concurrent clients while --ws-viewers clients hold
+# /api/ws/logs/{job_id} open. Reports throughput, p50/p95/p99 latency and
+# error rates per operation.
+#
+# Without --api-url it starts scripts/mock_llm_server.py and a backend
+# (uvicorn, throwaway SQLite DB) wired to the mock, so it runs fully offline.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_e2e_throughput import percentile, point_pipeline_at
+
+# New accounts start with 50 credits and a run costs 10.
+RUNS_PER_USER = 5
+PASSWORD = "load-test-password"
+
+
+def parse_mix(spec):
+    """'run=5,status=60,projects=25,download=10' -> ([ops], [weights])"""
+    ops, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        ops.append(name.strip())
+        weights.append(float(weight or 1))
+    return ops, weights
+
+
+def http(method, url, data=None, token=None, form=False, timeout=30):
+    """Blocking request returning (status, body bytes); HTTP errors are returned, not raised."""
+    headers = {}
+    body = None
+    if data is not None:
+        if form:
+            body = urllib.parse.urlencode(data).encode("utf-8")
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+    def record(self, op, status, elapsed):
+        self.latencies.setdefault(op, []).append(elapsed)
+        per_op = self.statuses.setdefault(op, {})
+        per_op[status] = per_op.get(status, 0) + 1
+
+
+class LoadTest:
+    def __init__(self, args, base_url, pool):
+        self.args = args
+        self.base = base_url.rstrip("/")
+        self.pool = pool
+        self.ops, self.weights = parse_mix(args.mix)
+        self.stats = Stats()
+        self.users = []  # [token, runs_left]
+        self.job_ids = []
+        self.owners = {}
+        self.finished_jobs = set()
+        self.ws = {"connected": 0, "failed": 0, "messages": 0, "bytes": 0, "connect_latencies": []}
+
+    async def call(self, op, method, path, **kwargs):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            status, body = await loop.run_in_executor(
+                self.pool, lambda: http(method, f"{self.base}{path}", **kwargs)
+            )
+        except Exception:
+            status, body = "conn_error", b""
+        self.stats.record(op, status, time.perf_counter() - started)
+        return status, body
+
+    async def setup_users(self):
+        async def one():
+            email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+            await self.call("register", "POST", "/api/auth/register", data={"email": email, "password": PASSWORD})
+            status, body = await self.call(
+                "login", "POST", "/api/auth/token", data={"username": email, "password": PASSWORD}, form=True
+            )
+            if status == 200:
+                self.users.append([json.loads(body)["access_token"], RUNS_PER_USER])
+
+        await asyncio.gather(*(one() for _ in range(self.args.users)))
+
+    async def op_run(self):
+        candidates = [u for u in self.users if u[1] > 0]
+        if not candidates:
+            return await self.op_projects()
+        user = random.choice(candidates)
+        user[1] -= 1
+        status, body = await self.call("run", "POST", "/api/run", token=user[0], data={
+            "user_desc": "Load test project",
+            "voice_reqs": "Standard limits",
+            "model_id": self.args.model,
+        })
+        if status == 200:
+            job_id = json.loads(body)["job_id"]
+            self.job_ids.append(job_id)
+            self.owners[job_id] = user[0]
+
+    async def op_status(self):
+        if not self.job_ids:
+            return await self.op_projects()
+        job_id = random.choice(self.job_ids)
+        status, body = await self.call("status", "GET", f"/api/status/{job_id}")
+        if status == 200:
+            state = json.loads(body)
+            if not state.get("is_running") and state.get("progress", 0) >= 100:
+                self.finished_jobs.add(job_id)
+
+    async def op_projects(self):
+        token = random.choice(self.users)[0]
+        await self.call("projects", "GET", "/api/projects", token=token)
+
+    async def op_download(self):
+        # Only the submitting user may download a project.
+        if not self.finished_jobs:
+            return await self.op_status()
+        job_id = random.choice(list(self.finished_jobs))
+        await self.call("download", "GET", f"/api/projects/{job_id}/download", token=self.owners[job_id])
+
+    async def worker(self, deadline):
+        handlers = {
+            "run": self.op_run,
+            "status": self.op_status,
+            "projects": self.op_projects,
+            "download": self.op_download,
+        }
+        while time.monotonic() < deadline:
+            op = random.choices(self.ops, self.weights)[0]
+            await handlers[op]()
+            if self.args.think_time:
+                await asyncio.sleep(random.expovariate(1.0 / self.args.think_time))
+
+    async def viewer(self, deadline):
+        # Watch a live job when there is one, otherwise the global stream.
+        await asyncio.sleep(random.uniform(0, min(2.0, self.args.duration / 4)))
+        job_id = random.choice(self.job_ids) if self.job_ids else "global"
+        parsed = urllib.parse.urlparse(self.base)
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(parsed.hostname, parsed.port or 80), timeout=10
+            )
+            key = base64.b64encode(os.urandom(16)).decode()
+            writer.write((
+                f"GET /api/ws/logs/{job_id} HTTP/1.1\r\nHost: {parsed.netloc}\r\n"
+                f"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+            ).encode())
+            await writer.drain()
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+            if b" 101 " not in head.split(b"\r\n", 1)[0]:
+                raise ConnectionError(head[:80])
+        except Exception:
+            self.ws["failed"] += 1
+            return
+        self.ws["connected"] += 1
+        self.ws["connect_latencies"].append(time.perf_counter() - started)
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    opcode, payload = await asyncio.wait_for(read_ws_frame(reader), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if opcode == 0x8:
+                    break
+                self.ws["messages"] += 1
+                self.ws["bytes"] += len(payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self):
+        await self.setup_users()
+        if not self.users:
+            raise SystemExit("❌ Could not register any load-test users")
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.args.duration
+        tasks = [self.worker(deadline) for _ in range(self.args.workers)]
+        tasks += [self.viewer(deadline) for _ in range(self.args.ws_viewers)]
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+
+async def read_ws_frame(reader):
+    """Read one unmasked server frame; returns (opcode, payload)."""
+    b1, b2 = await reader.readexactly(2)
+    length = b2 & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), "big")
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), "big")
+    return b1 & 0x0F, await reader.readexactly(length)
+
+
+def report(test, elapsed):
+    print(f"\n📊 Load test: {elapsed:.1f}s, {test.args.workers} HTTP workers, {test.args.ws_viewers} WebSocket viewers")
+    print(f"{'op':>10} | {'reqs':>6} | {'req/s':>7} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'errors':>7} | statuses")
+    for op, values in sorted(test.stats.latencies.items()):
+        statuses = test.stats.statuses[op]
+        errors = sum(n for s, n in statuses.items() if not (isinstance(s, int) and s < 400))
+        print(
+            f"{op:>10} | {len(values):>6} | {len(values) / elapsed:>7.1f} | "
+            f"{percentile(values, 50) * 1000:>6.1f}ms | {percentile(values, 95) * 1000:>6.1f}ms | "
+            f"{percentile(values, 99) * 1000:>6.1f}ms | {errors / len(values):>6.1%} | {statuses}"
+        )
+    ws = test.ws
+    print(
+        f"websocket  | connected {ws['connected']}, failed {ws['failed']}, "
+        f"{ws['messages']} messages ({ws['messages'] / elapsed:.1f}/s, {ws['bytes'] / 1024:.0f} KiB), "
+        f"connect p95 {percentile(ws['connect_latencies'], 95) * 1000:.1f}ms"
+    )
+    print(f"jobs submitted: {len(test.job_ids)}, seen finished: {len(test.finished_jobs)}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_local_stack(args):
+    """Start the mock provider in-process and a backend subprocess pointed at it."""
+    import mock_llm_server
+    mock_args = mock_llm_server.build_arg_parser().parse_args(
+        ["--port", "0", "--latency", args.latency, "--rate-429", str(args.rate_429)]
+    )
+    mock = mock_llm_server.start_server(mock_args)
+    point_pipeline_at(f"http://127.0.0.1:{mock.server_port}")
+
+    db_dir = tempfile.mkdtemp(prefix="aura_load_db_")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'load.db')}")
+    port = free_port()
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.join(ROOT, "backend"),
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        if backend.poll() is not None:
+            raise SystemExit("❌ Backend exited during startup")
+        try:
+            if http("GET", f"{base_url}/metrics", timeout=1)[0] == 200:
+                return base_url, mock, backend
+        except Exception:
+            pass
+        time.sleep(0.2)
+    backend.terminate()
+    raise SystemExit("❌ Backend did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/WebSocket load test for the Aura backend API")
+    parser.add_argument("--api-url", default=None, help="Target a running backend instead of starting one")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of mixed traffic")
+    parser.add_argument("--users", type=int, default=10, help="Users registered up front (5 runs each)")
+    parser.add_argument("--workers", type=int, default=20, help="Concurrent HTTP clients")
+    parser.add_argument("--ws-viewers", type=int, default=10, help="Concurrent WebSocket log viewers")
+    parser.add_argument("--mix", default="run=5,status=60,projects=25,download=10", help="Weighted operation mix")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a worker's requests (s)")
+    parser.add_argument("--model", default="gemini-2.0-flash")
+    parser.add_argument("--latency", default="uniform:0.05,0.2", help="Mock provider latency (local stack only)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Mock provider 429 rate (local stack only)")
+    args = parser.parse_args()
+
+    backend = None
+    base_url = args.api_url
+    if base_url is None:
+        base_url, _, backend = start_local_stack(args)
+    print(f"🚀 Load testing {base_url} for {args.duration:.0f}s (mix {args.mix})")
+
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=args.workers + args.users + 4)
+    test = LoadTest(args, base_url, pool)
+    try:
+        report(test, asyncio.run(test.run()))
+    finally:
+        pool.shutdown(wait=False)
+        if backend is not None:
+            backend.terminate()
+            backend.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the LLM providers used by direct_flow / resilient_engine.
+# Speaks the OpenAI/OpenRouter chat-completions protocol (POST /v1/chat/completions)
+# and the Gemini REST protocol (POST /v1beta/models/<model>:generateContent),
+# with configurable latency, 429/503 injection and canned FILE_START output.
+#
+# Point the pipeline at it with:
+#   OPENROUTER_BASE_URL=http://127.0.0.1:8900/v1
+#   OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+#   GOOGLE_API_ENDPOINT=http://127.0.0.1:8900
+
+GEMINI_PATH = re.compile(r"^/v1(?:beta)?/models/([^:]+):generateContent")
+
+
+def parse_latency(spec):
+    """
+    Build a latency sampler (seconds) from a spec:
+    'fixed:0.5', 'uniform:0.2,1.5', 'normal:1.0,0.3' or 'lognormal:0.0,0.5'.
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+
+def canned_dev_output(n_files, lines_per_file):
+    blocks = []
+    for i in range(n_files):
+        body = "\n".join(f"    print('module {i} line {j}')" for j in range(lines_per_file))
+        blocks.append(
+            f"---FILE_START---\nsrc/module_{i}.py|```python\ndef main():\n{body}\n```\n---FILE_END---"
+        )
+    return "Here is the generated codebase.\n\n" + "\n".join(blocks)
+
+
+class MockState:
+    def __init__(self, args):
+        self.latency = parse_latency(args.latency)
+        self.rate_429 = args.rate_429
+        self.rate_503 = args.rate_503
+        self.dev_output = canned_dev_output(args.files, args.lines_per_file)
+        self.report = "## Report\n\n" + "Everything looks reasonable. " * args.report_words
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "429": 0, "503": 0, "ok": 0}
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def reply_for(self, prompt):
+        if "ROLE: Developer Agent" in prompt:
+            return self.dev_output
+        return self.report
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _maybe_fail(self, gemini):
+        roll = random.random()
+        if roll < self.state.rate_429:
+            self.state.count("429")
+            status, message, gemini_status = 429, "Resource has been exhausted (e.g. check quota). RESOURCE_EXHAUSTED", "RESOURCE_EXHAUSTED"
+        elif roll < self.state.rate_429 + self.state.rate_503:
+            self.state.count("503")
+            status, message, gemini_status = 503, "The model is overloaded. Service Unavailable", "UNAVAILABLE"
+        else:
+            return False
+        if gemini:
+            self._send_json(status, {"error": {"code": status, "message": message, "status": gemini_status}})
+        else:
+            self._send_json(status, {"error": {"message": message, "type": "server_error", "code": status}})
+        return True
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.state.lock:
+                self._send_json(200, dict(self.state.counts))
+            return
+        self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+
+        gemini_match = GEMINI_PATH.match(self.path)
+        is_chat = self.path.rstrip("/").endswith("/chat/completions")
+        if not (gemini_match or is_chat):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path} not found"}})
+            return
+
+        self.state.count("requests")
+        time.sleep(self.state.latency())
+        if self._maybe_fail(gemini=bool(gemini_match)):
+            return
+        self.state.count("ok")
+
+        if gemini_match:
+            prompt = " ".join(
+                part.get("text", "")
+                for content in payload.get("contents", [])
+                for part in content.get("parts", [])
+            )
+            self._send_json(200, {
+                "candidates": [{
+                    "content": {"parts": [{"text": self.state.reply_for(prompt)}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 0},
+            })
+            return
+
+        prompt = ""
+        for message in payload.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, list):
+                prompt += " ".join(c.get("text", "") for c in content if isinstance(c, dict))
+            elif content:
+                prompt += str(content)
+        text = self.state.reply_for(prompt)
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{random.randint(0, 1 << 30)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": 0},
+        })
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Mock OpenAI/OpenRouter/Gemini provider for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="uniform:0.2,0.8", help="fixed:S | uniform:A,B | normal:MU,SD | lognormal:MU,SIGMA")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-503", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--files", type=int, default=20, help="Files in the canned developer output")
+    parser.add_argument("--lines-per-file", type=int, default=30)
+    parser.add_argument("--report-words", type=int, default=200, help="Size of canned non-developer replies")
+    return parser
+
+
+def start_server(args):
+    """Start the mock in a daemon thread and return the server (server.server_port holds the port)."""
+    handler = type("BoundMockHandler", (MockHandler,), {"state": MockState(args)})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    server = start_server(args)
+    print(f"🧪 Mock LLM provider listening on http://{args.host}:{server.server_port}")
+    print(f"   OPENROUTER_BASE_URL=http://{args.host}:{server.server_port}/v1")
+    print(f"   GOOGLE_API_ENDPOINT=http://{args.host}:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
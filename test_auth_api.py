@@ -0,0 +1,46 @@
+import uuid
+import crud
+import database
+import schemas
+
+
+def test_me_embeds_only_the_newest_page_of_projects(client, user, auth_headers, monkeypatch):
+    from routers import auth_router
+    monkeypatch.setattr(auth_router, "ME_PROJECTS_LIMIT", 2)
+    with database.SessionLocal() as db:
+        for _ in range(3):
+            crud.create_user_project(db, schemas.ProjectCreate(prompt_desc="todo app"), user.id, str(uuid.uuid4()))
+    response = client.get("/api/auth/me", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()["projects"]) == 2
+    rest = client.get("/api/projects", params={"cursor": response.headers["X-Next-Cursor"]}, headers=auth_headers)
+    assert len(rest.json()) == 1
+
+
+def _login(client, user, password="hunter22"):
+    return client.post("/api/auth/token", data={"username": user.email, "password": password})
+
+
+def test_repeated_failed_logins_are_throttled(client, user, monkeypatch):
+    import auth
+    monkeypatch.setattr(auth, "ip_login_throttle", auth.LoginThrottle(30, 300))
+    monkeypatch.setattr(auth, "account_login_throttle", auth.LoginThrottle(3, 300))
+    assert _login(client, user).status_code == 200
+    for _ in range(3):
+        assert _login(client, user, password="wrong").status_code == 401
+    throttled = _login(client, user)  # refused even with the right password
+    assert throttled.status_code == 429 and int(throttled.headers["Retry-After"]) > 0
+
+
+def test_login_is_refused_with_503_when_hashing_is_saturated(client, user, monkeypatch):
+    import threading
+    import auth
+    monkeypatch.setattr(auth, "ip_login_throttle", auth.LoginThrottle(30, 300))
+    monkeypatch.setattr(auth, "account_login_throttle", auth.LoginThrottle(3, 300))
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(auth, "_hash_slots", slots)
+    slots.acquire()  # every hashing slot is busy
+    busy = _login(client, user)
+    assert busy.status_code == 503 and busy.headers["Retry-After"] == "1"
+    slots.release()
+    assert _login(client, user).status_code == 200
@@ -0,0 +1,18 @@
+import auth
+
+
+def test_ttl_cache_is_bounded_and_pop_returns_the_value():
+    cache = auth._TTLCache("test_bounded", maxsize=2)
+    for i in range(5):
+        cache.set(f"user-{i}", f"user{i}@example.com", ttl=60)
+    assert len(cache._data) == 2
+    assert cache.pop("user-4") == "user4@example.com"
+    assert cache.pop("user-0") is None
+
+
+def test_invalidate_by_user_id_drops_the_cached_principal(client, user, auth_headers):
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
+    assert auth._user_cache.get(user.email)[0]
+    auth.invalidate_user(user_id=user.id)
+    assert not auth._user_cache.get(user.email)[0]
+    assert auth._subject_cache.pop(user.id) is None
@@ -0,0 +1,40 @@
+import pytest
+import cancellation
+from cancellation import JobCancelled
+
+
+def test_cancel_without_a_registered_run_is_a_no_op():
+    assert cancellation.cancel_job("never-started") is False
+    assert not cancellation.start("never-started").cancelled
+    cancellation.release("never-started")
+
+
+def test_lookups_of_unknown_jobs_do_not_register_tokens():
+    from logger_config import job_id_var
+    before = len(cancellation._TOKENS)
+    assert not cancellation.token_for("crew-flow").cancelled
+    assert job_id_var.get() == "global" and not cancellation.current_token().cancelled
+    assert len(cancellation._TOKENS) == before
+    token = cancellation.start("job-known")
+    assert cancellation.token_for("job-known") is token
+    cancellation.release("job-known")
+
+
+def test_late_cancel_does_not_leak_into_the_next_run():
+    token = cancellation.start("job-late")
+    cancellation.release("job-late")
+    # e.g. a lease heartbeat delivering a cancellation after the run finished
+    assert cancellation.cancel_job("job-late") is False
+    assert not token.cancelled
+    assert not cancellation.start("job-late").cancelled
+    cancellation.release("job-late")
+
+
+def test_start_replaces_a_stale_cancelled_token():
+    cancellation.start("job-stale").cancel()
+    token = cancellation.start("job-stale")
+    token.raise_if_cancelled()
+    assert cancellation.cancel_job("job-stale") is True
+    with pytest.raises(JobCancelled):
+        token.raise_if_cancelled()
+    cancellation.release("job-stale")
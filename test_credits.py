@@ -0,0 +1,39 @@
+import uuid
+import warnings
+import crud
+import database
+import models
+import schemas
+
+
+def test_refused_debit_leaves_the_callers_transaction_open(user):
+    job_id = str(uuid.uuid4())
+    with database.SessionLocal() as db:
+        crud.create_user_project(db, schemas.ProjectCreate(prompt_desc="todo app"), user.id, job_id, commit=False)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # no dialect deprecation warnings on the hot path
+            assert crud.debit_credits(db, user.id, user.credit_balance + 1, reason="run", commit=False) is None
+        db.commit()
+    with database.SessionLocal() as db:
+        assert db.get(models.Project, job_id) is not None
+        assert db.get(models.User, user.id).credit_balance == user.credit_balance
+
+
+def test_balances_are_recomputed_from_the_ledger(user):
+    with database.SessionLocal() as db:
+        crud.debit_credits(db, user.id, 10, reason="run")
+        db.get(models.User, user.id).credit_balance = 999  # drifted from the ledger
+        db.commit()
+        assert crud.recompute_credit_balances(db) >= 1
+        assert db.get(models.User, user.id).credit_balance == user.credit_balance - 10
+
+
+def test_accounts_without_a_ledger_get_an_opening_entry(user):
+    with database.SessionLocal() as db:
+        db.query(models.CreditLedger).filter_by(user_id=user.id).delete()
+        db.commit()
+        assert crud.open_credit_ledger(db) >= 1
+        crud.recompute_credit_balances(db)
+        assert db.get(models.User, user.id).credit_balance == user.credit_balance
+        entries = crud.get_credit_ledger(db, user.id)
+        assert [(e.reason, e.amount) for e in entries] == [("opening", user.credit_balance)]
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import pytest
+from dev_output import parse_dev_output, write_dev_output
+
+README = "# Demo\n\n```bash\npip install demo\n```\n"
+OUTPUT = (
+    "Here are the files.\n"
+    "---FILE_START---\n"
+    "app.py|```python\nprint('héllo')\n```\n"
+    "---FILE_END---\n"
+    "---FILE_START---\n"
+    "README.md|```markdown\n" + README + "```\n"
+    "---FILE_END---\n"
+)
+
+
+def test_only_the_outer_fence_is_stripped():
+    assert parse_dev_output(OUTPUT) == [("app.py", "print('héllo')\n"), ("README.md", README)]
+
+
+def test_markers_split_across_chunks_parse_like_the_whole_string():
+    for size in (1, 3, 7, 16):
+        chunks = (OUTPUT[i:i + size] for i in range(0, len(OUTPUT), size))
+        assert parse_dev_output(chunks) == parse_dev_output(OUTPUT)
+
+
+def test_paths_outside_the_project_are_refused(tmp_path):
+    project = tmp_path / "project"
+    output = "---FILE_START---\n../escape.py|x = 1\n---FILE_END---\n" + OUTPUT
+    manifest = write_dev_output(output, str(project))
+    assert [entry.path for entry in manifest] == ["app.py", "README.md"]
+    assert not (tmp_path / "escape.py").exists()
+
+
+def test_manifest_offsets_point_at_the_raw_bodies(tmp_path):
+    manifest = write_dev_output(OUTPUT, str(tmp_path))
+    raw = OUTPUT.encode("utf-8")
+    app, readme = manifest
+    assert raw[app.offset:app.offset + app.length].decode("utf-8") == "```python\nprint('héllo')\n```\n"
+    assert raw[readme.offset:readme.offset + readme.length].decode("utf-8") == "```markdown\n" + README + "```\n"
+    for entry in manifest:
+        data = (tmp_path / entry.path).read_bytes()
+        assert (entry.size, entry.sha256) == (len(data), hashlib.sha256(data).hexdigest())
+
+
+def test_a_failing_stream_leaves_no_temp_files(tmp_path):
+    def chunks():
+        yield "---FILE_START---\napp.py|```python\nprint(1)\n"
+        raise ConnectionError("stream dropped")
+
+    with pytest.raises(ConnectionError):
+        write_dev_output(chunks(), str(tmp_path))
+    assert os.listdir(tmp_path) == []
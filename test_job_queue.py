@@ -0,0 +1,206 @@
+import datetime
+import uuid
+import crud
+import database
+import job_queue
+import models
+import schemas
+from worker import QueueWorker
+
+PAYLOAD = {
+    "user_desc": "todo app", "voice_reqs": "", "model_id": "gemini-2.0-flash",
+    "resume": False, "reuse_checkpoints": False,
+}
+
+
+def _queue_job(user, sketch=None):
+    job_id = str(uuid.uuid4())
+    with database.SessionLocal() as db:
+        crud.create_user_project(db, schemas.ProjectCreate(prompt_desc="todo app"), user.id, job_id)
+        job_queue.enqueue(db, job_id, user.id, PAYLOAD, sketch=sketch)
+    return job_id
+
+
+def _entry(job_id):
+    with database.SessionLocal() as db:
+        entry = db.get(models.JobQueue, job_id)
+        db.expunge(entry)
+        return entry
+
+
+def _make_available(job_id):
+    with database.SessionLocal() as db:
+        db.get(models.JobQueue, job_id).available_at = datetime.datetime.utcnow()
+        db.commit()
+
+
+def test_failed_phase_is_retried_from_its_checkpoint(user, fake_llm, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 2)
+    fake_llm.failing.add("Debug Agent")
+    job_id = _queue_job(user)
+
+    assert QueueWorker().run_once()
+    entry = _entry(job_id)
+    assert entry.status == job_queue.QUEUED and entry.attempts == 1
+    assert "Debug Phase failed" in entry.last_error
+    assert entry.available_at > datetime.datetime.utcnow()
+
+    fake_llm.failing.clear()
+    fake_llm.clear()
+    _make_available(job_id)
+    assert QueueWorker().run_once()
+    assert _entry(job_id).status == job_queue.DONE
+    assert fake_llm[0] == "Debug Agent"  # vision, architect and developer came from checkpoints
+
+
+def test_failed_phase_fails_the_job_once_attempts_run_out(user, fake_llm, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 2)
+    fake_llm.failing.add("Vision Agent")
+    job_id = _queue_job(user)
+
+    assert QueueWorker().run_once()
+    _make_available(job_id)
+    assert QueueWorker().run_once()
+    entry = _entry(job_id)
+    assert entry.status == job_queue.FAILED and entry.attempts == 2
+    with database.SessionLocal() as db:
+        assert db.get(models.Project, job_id).status == "Failed"
+
+
+def test_spilled_error_is_stored_as_text(user, fake_llm, monkeypatch):
+    import job_blobs
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(job_blobs, "SPILL_THRESHOLD", 10)
+    fake_llm.failing.add("Vision Agent")
+    job_id = _queue_job(user)
+
+    assert QueueWorker().run_once()
+    entry = _entry(job_id)
+    assert entry.status == job_queue.FAILED
+    assert isinstance(entry.last_error, str) and "Vision Phase failed" in entry.last_error
+
+
+def _expire_lease(job_id):
+    with database.SessionLocal() as db:
+        db.get(models.JobQueue, job_id).lease_expires_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        db.commit()
+
+
+def test_lapsed_lease_is_reclaimed_and_the_old_worker_cannot_finish(user):
+    job_id = _queue_job(user)
+    with database.SessionLocal() as db:
+        assert job_queue.claim(db, "worker-a").id == job_id
+        assert job_queue.claim(db, "worker-b") is None  # leased and not expired
+    _expire_lease(job_id)
+    with database.SessionLocal() as db:
+        entry = job_queue.claim(db, "worker-b")
+        assert entry.id == job_id and entry.lease_owner == "worker-b" and entry.attempts == 2
+        assert job_queue.heartbeat(db, job_id, "worker-a") == (False, False)
+        assert job_queue.finish(db, job_id, "worker-a", job_queue.DONE) is False
+        assert job_queue.finish(db, job_id, "worker-b", job_queue.DONE) is True
+    assert _entry(job_id).status == job_queue.DONE
+
+
+def test_heartbeat_extends_the_lease(user):
+    job_id = _queue_job(user)
+    with database.SessionLocal() as db:
+        job_queue.claim(db, "worker-a")
+    _expire_lease(job_id)
+    with database.SessionLocal() as db:
+        assert job_queue.heartbeat(db, job_id, "worker-a") == (True, False)
+        assert job_queue.claim(db, "worker-b") is None
+
+
+def test_failed_attempts_are_requeued_until_they_run_out(user, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 3)
+    job_id = _queue_job(user)
+    for attempt in (1, 2):
+        with database.SessionLocal() as db:
+            assert job_queue.claim(db, "worker-a").attempts == attempt
+            assert job_queue.finish(db, job_id, "worker-a", job_queue.FAILED, error="boom")
+        entry = _entry(job_id)
+        assert entry.status == job_queue.QUEUED and entry.last_error == "boom"
+        with database.SessionLocal() as db:
+            assert job_queue.claim(db, "worker-a") is None  # waiting out the retry delay
+        _make_available(job_id)
+    with database.SessionLocal() as db:
+        job_queue.claim(db, "worker-a")
+        job_queue.finish(db, job_id, "worker-a", job_queue.FAILED, error="boom")
+        assert db.get(models.Project, job_id).status == "Failed"
+    assert _entry(job_id).status == job_queue.FAILED
+
+
+def test_lease_lapsing_on_the_last_attempt_fails_the_job(user, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 1)
+    job_id = _queue_job(user)
+    with database.SessionLocal() as db:
+        job_queue.claim(db, "worker-a")
+    _expire_lease(job_id)
+    with database.SessionLocal() as db:
+        assert job_queue.claim(db, "worker-b") is None
+    assert _entry(job_id).status == job_queue.FAILED
+
+
+def test_cancel_queued_and_leased_jobs(user):
+    queued = _queue_job(user)
+    with database.SessionLocal() as db:
+        assert job_queue.request_cancel(db, queued) == "cancelled"
+        assert job_queue.claim(db, "worker-a") is None
+        assert not job_queue.is_pending(db, queued)
+
+    leased = _queue_job(user)
+    with database.SessionLocal() as db:
+        job_queue.claim(db, "worker-a")
+        assert job_queue.request_cancel(db, leased) == "requested"
+        assert job_queue.heartbeat(db, leased, "worker-a") == (True, True)
+        # A cancelled run is not retried even though it failed with attempts left.
+        job_queue.finish(db, leased, "worker-a", job_queue.FAILED)
+        assert job_queue.request_cancel(db, leased) is None
+    assert _entry(leased).status == job_queue.FAILED
+
+
+def test_permanent_errors_are_not_retried(user, fake_llm, monkeypatch):
+    import direct_flow
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 3)
+
+    def missing_model(*args, **kwargs):
+        raise RuntimeError("MODEL_NOT_FOUND: gemini-0")
+
+    monkeypatch.setattr(direct_flow, "safe_generate", missing_model)
+    job_id = _queue_job(user)
+    assert QueueWorker().run_once()
+    entry = _entry(job_id)
+    assert entry.status == job_queue.FAILED and entry.attempts == 1
+    assert job_queue.is_retryable("Vision Phase failed: QUOTA_EXHAUSTED: gemini-2.0-flash")
+
+
+def test_the_sketch_travels_in_the_queue_row_and_survives_a_requeue(user, monkeypatch):
+    import worker
+    seen = []
+
+    def run(job_id, user_id, image_path, *args, **kwargs):
+        with open(image_path, "rb") as f:
+            seen.append(f.read())
+        return job_queue.FAILED
+
+    monkeypatch.setattr(worker, "run_aura_background", run)
+    job_id = _queue_job(user, sketch=b"\x89PNG sketch")
+    assert QueueWorker().run_once()
+    with database.SessionLocal() as db:
+        job_queue.enqueue(db, job_id, user.id, {**PAYLOAD, "resume": True})  # a resume brings no new sketch
+    assert QueueWorker().run_once()
+    assert seen == [b"\x89PNG sketch", b"\x89PNG sketch"]
+
+
+def test_the_worker_thread_leaves_no_job_id_behind(user, monkeypatch):
+    import worker
+    from logger_config import job_id_var, set_job_id
+
+    def run(job_id, *args, **kwargs):
+        set_job_id(job_id)  # as run_direct_flow does
+        return job_queue.DONE
+
+    monkeypatch.setattr(worker, "run_aura_background", run)
+    _queue_job(user)
+    assert QueueWorker().run_once()
+    assert job_id_var.get() == "global"
@@ -0,0 +1,153 @@
+import database
+import job_queue
+import pubsub
+from state import jobs
+
+RUN = {"user_desc": "todo app", "voice_reqs": "", "model_id": "gemini-2.0-flash"}
+
+
+def _start(client, auth_headers):
+    response = client.post("/api/run", json=RUN, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()["job_id"]
+
+
+def test_queued_job_is_reported_from_the_queue(client, auth_headers):
+    job_id = _start(client, auth_headers)
+    assert job_id not in jobs  # the API process does not own the job's state
+    body = client.get(f"/api/status/{job_id}").json()
+    assert body["status"] == "Queued..." and body["queue_status"] == job_queue.QUEUED
+    assert not body["done"] and body["version"] == 0
+
+
+def test_job_claimed_by_another_node_is_not_shown_as_queued(client, auth_headers):
+    job_id = _start(client, auth_headers)
+    with database.SessionLocal() as db:
+        assert job_queue.claim(db, "other-node-1").id == job_id
+    body = client.get(f"/api/status/{job_id}").json()
+    assert body["queue_status"] == job_queue.LEASED and body["is_running"]
+    assert client.get(f"/api/status/{job_id}/changes").json()["changes"]["is_running"]
+
+
+def test_stale_local_state_gives_way_to_a_requeued_run(client, auth_headers):
+    job_id = _start(client, auth_headers)
+    jobs[job_id] = {"status": "Failed", "error": "boom", "done": True}  # an earlier run on this node
+    with database.SessionLocal() as db:
+        job_queue.enqueue(db, job_id, "unused", {"resume": True})
+    assert client.get(f"/api/status/{job_id}").json()["status"] == "Queued to resume..."
+    jobs.pop(job_id)
+
+
+def test_events_of_a_job_cancelled_in_the_queue_end(client, auth_headers):
+    job_id = _start(client, auth_headers)
+    assert client.post(f"/api/projects/{job_id}/cancel", headers=auth_headers).status_code == 200
+    body = client.get(f"/api/status/{job_id}/events").text
+    assert "event: snapshot" in body and '"cancelled": true' in body
+    assert body.rstrip().endswith("event: end\ndata: {}")
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/status/no-such-job").status_code == 404
+
+
+def test_events_hand_over_from_the_queue_to_the_worker(client, auth_headers, fake_llm, monkeypatch):
+    import threading
+    from routers import project_router
+    from worker import QueueWorker
+    monkeypatch.setattr(project_router, "QUEUE_STATUS_POLL_SECONDS", 0.05)
+    job_id = _start(client, auth_headers)
+    threading.Timer(0.2, QueueWorker().run_once).start()
+    body = client.get(f"/api/status/{job_id}/events").text
+    assert body.index("Queued...") < body.index("Workflow Complete")
+    assert body.rstrip().endswith("event: end\ndata: {}")
+
+
+class _SharedBroker(pubsub.LocalBroker):
+    """ A LocalBroker standing in for redis shared between an API node and a worker node """
+    remote = True
+
+
+def test_spilled_field_published_by_another_worker_loads_from_the_shared_blob_dir(monkeypatch):
+    import os
+    import uuid
+    from fastapi.testclient import TestClient
+    import main
+    import state
+    broker = _SharedBroker()
+    monkeypatch.setattr(pubsub, "get_broker", lambda: broker)
+    monkeypatch.setattr(state, "_status_broker", broker)
+    job_id = str(uuid.uuid4())
+    report = "vision " * 1000
+    jobs[job_id] = {"status": "Running", "vision": report}  # the worker node's state
+    blob_dir = os.path.join(os.environ["AURA_JOB_BLOB_DIR"], job_id)
+    jobs.pop(job_id)  # the API node never ran the job
+    client = TestClient(main.app)
+
+    body = client.get(f"/api/status/{job_id}").json()
+    assert body["vision"] == {"spilled": True, "chars": len(report)}
+    assert client.get(f"/api/status/{job_id}", params={"fields": "vision"}).json()["vision"] == report
+
+    # A worker on another host whose blob directory is not shared: still a string the UI can render.
+    for name in os.listdir(blob_dir):
+        os.remove(os.path.join(blob_dir, name))
+    vision = client.get(f"/api/status/{job_id}", params={"fields": "vision"}).json()["vision"]
+    assert isinstance(vision, str) and str(len(report)) in vision
+
+
+def test_trace_of_a_job_run_on_a_worker_node_is_served_from_the_broker(client, auth_headers, fake_llm, monkeypatch):
+    import tracing
+    from worker import QueueWorker
+    broker = _SharedBroker()
+    monkeypatch.setattr(pubsub, "get_broker", lambda: broker)
+    job_id = _start(client, auth_headers)
+    assert QueueWorker().run_once()
+    tracing._TRACES.pop(job_id)  # the API node holds no spans of its own
+    trace = client.get(f"/api/trace/{job_id}").json()
+    assert any(event["name"] == "job.pipeline" for event in trace["traceEvents"])
+
+
+def _local_job(fields):
+    import uuid
+    job_id = str(uuid.uuid4())
+    jobs[job_id] = fields
+    return job_id
+
+
+def test_matching_etag_is_answered_with_304(client):
+    job_id = _local_job({"status": "Running", "done": False})
+    first = client.get(f"/api/status/{job_id}")
+    assert first.status_code == 200 and first.headers["ETag"] == f'W/"{first.json()["version"]}"'
+    again = client.get(f"/api/status/{job_id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.headers["ETag"] == first.headers["ETag"]
+    jobs[job_id]["status"] = "Developing"
+    changed = client.get(f"/api/status/{job_id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200 and changed.json()["status"] == "Developing"
+    jobs.pop(job_id)
+
+
+def test_wait_returns_as_soon_as_the_version_moves(client):
+    import threading
+    import time
+    job_id = _local_job({"status": "Running", "done": False})
+    etag = client.get(f"/api/status/{job_id}").headers["ETag"]
+    threading.Timer(0.2, jobs[job_id].__setitem__, ("status", "Developing")).start()
+    started = time.monotonic()
+    response = client.get(f"/api/status/{job_id}", params={"wait": 10}, headers={"If-None-Match": etag})
+    assert time.monotonic() - started < 5
+    assert response.status_code == 200 and response.json()["status"] == "Developing"
+    assert response.headers["ETag"] != etag
+    jobs.pop(job_id)
+
+
+def test_fields_loads_a_spilled_field_and_limits_the_response(client):
+    import job_blobs
+    report = "blueprint " * 1000
+    job_id = _local_job({"status": "Running", "done": False, "blueprint": report})
+    assert isinstance(dict.__getitem__(jobs[job_id], "blueprint"), job_blobs.SpilledText)
+    assert client.get(f"/api/status/{job_id}").json()["blueprint"] == {"spilled": True, "chars": len(report)}
+    body = client.get(f"/api/status/{job_id}", params={"fields": "blueprint"}).json()
+    assert body["blueprint"] == report and "status" not in body
+    assert client.get(f"/api/status/{job_id}", params={"fields": "*"}).json()["blueprint"] == report
+    changes = client.get(f"/api/status/{job_id}/changes", params={"fields": "blueprint"}).json()["changes"]
+    assert changes == {"blueprint": report}
+    jobs.pop(job_id)
@@ -0,0 +1,236 @@
+import datetime
+import json
+import os
+import time
+import uuid
+import pytest
+import memory_store
+from logger_config import job_id_var
+from memory_store import RetentionPolicy
+
+
+def _stream():
+    return f"test_{uuid.uuid4().hex[:12]}"
+
+
+def _append_in_one_batch(stream, count, **kwargs):
+    memory_store.configure_writer(durability="interval", flush_interval=60)
+    try:
+        for i in range(count):
+            memory_store.append_memory(stream, {"kind": "note", "summary": f"entry {i}", "n": i}, **kwargs)
+        memory_store.flush()
+    finally:
+        memory_store.configure_writer(flush_interval=0.2)
+
+
+def _wait_for_compaction(key):
+    thread = memory_store._COMPACTING.get(key)
+    if thread is not None:
+        thread.join()
+
+
+def test_a_large_batch_is_sealed_into_bounded_segments(monkeypatch):
+    monkeypatch.setattr(memory_store, "SEGMENT_BYTES", 2000)
+    stream = _stream()
+    _append_in_one_batch(stream, 200, shared=True)
+    _wait_for_compaction(stream)
+    segments = memory_store._load_manifest(stream)["segments"]
+    assert len(segments) > 1
+    for seg in segments:
+        sizes = [len(json.dumps(e, ensure_ascii=False)) + 1 for e in memory_store._read_segment(stream, seg)]
+        assert sum(sizes) - sizes[-1] < 2000  # only the line that crossed the limit goes past it
+    assert [e["n"] for e in memory_store.load_memory(stream, shared=True)] == list(range(200))
+
+
+def test_count_retention_keeps_at_least_max_entries(monkeypatch):
+    monkeypatch.setattr(memory_store, "SEGMENT_BYTES", 2000)
+    stream = _stream()
+    memory_store.set_retention(stream, RetentionPolicy(max_entries=50))
+    try:
+        _append_in_one_batch(stream, 200, shared=True)
+        _wait_for_compaction(stream)
+        memory_store.compact(stream, shared=True)
+        entries = memory_store.load_memory(stream, shared=True)
+        assert 50 <= len(entries) < 200
+        assert entries[-1]["n"] == 199
+        assert [e["n"] for e in entries] == list(range(200 - len(entries), 200))
+    finally:
+        memory_store.set_retention(stream, None)
+
+
+def test_release_job_deletes_the_jobs_streams():
+    job_id = uuid.uuid4().hex
+    token = job_id_var.set(job_id)
+    try:
+        memory_store.append_memory("notes", {"kind": "note", "summary": "private"})
+        memory_store.flush()
+    finally:
+        job_id_var.reset(token)
+    job_dir = os.path.join(memory_store._BASE_DIR, "jobs", job_id)
+    assert os.path.exists(os.path.join(job_dir, "notes.jsonl"))
+    memory_store.release_job(job_id)
+    assert not os.path.exists(job_dir)
+
+
+def _ts(i):
+    return datetime.datetime(2026, 1, 1) + datetime.timedelta(minutes=i)
+
+
+def _append_timed(stream, count, **kwargs):
+    for i in range(count):
+        memory_store.append_memory(stream, {"kind": "note", "summary": f"entry {i}", "n": i, "ts": _ts(i).isoformat() + "Z"}, **kwargs)
+    memory_store.flush()
+
+
+def test_tail_and_since_reads_use_the_index():
+    stream = _stream()
+    _append_timed(stream, 100, shared=True)
+    assert memory_store._index_count(stream) == 100
+    assert [e["n"] for e in memory_store.load_memory(stream, limit=5, shared=True)] == [95, 96, 97, 98, 99]
+    assert [e["n"] for e in memory_store.load_memory(stream, since=_ts(90), shared=True)] == list(range(91, 100))
+    assert [e["n"] for e in memory_store.load_memory(stream, limit=3, since=_ts(90), shared=True)] == [97, 98, 99]
+    assert memory_store.load_memory(stream, since=_ts(200), shared=True) == []
+
+
+def test_a_missing_index_is_rebuilt_from_the_data_file():
+    stream = _stream()
+    _append_timed(stream, 20, shared=True)
+    os.remove(memory_store._index_path(stream))
+    memory_store._SYNCED.pop(stream)
+    assert [e["n"] for e in memory_store.load_memory(stream, since=_ts(16), shared=True)] == [17, 18, 19]
+    assert memory_store._index_count(stream) == 20
+
+
+def test_tail_and_since_reads_reach_into_sealed_segments(monkeypatch):
+    monkeypatch.setattr(memory_store, "SEGMENT_BYTES", 1000)
+    stream = _stream()
+    _append_timed(stream, 60, shared=True)
+    _wait_for_compaction(stream)
+    assert len(memory_store._load_manifest(stream)["segments"]) > 1
+    assert [e["n"] for e in memory_store.load_memory(stream, limit=30, shared=True)] == list(range(30, 60))
+    assert [e["n"] for e in memory_store.load_memory(stream, since=_ts(9), shared=True)] == list(range(10, 60))
+
+
+@pytest.fixture
+def writer_mode():
+    yield memory_store.configure_writer
+    memory_store.configure_writer(durability="interval", flush_interval=0.2)
+
+
+def _on_disk(stream):
+    try:
+        with open(memory_store._stream_path(stream), "rb") as f:
+            return f.read().count(b"\n")
+    except OSError:
+        return 0
+
+
+def test_fsync_mode_returns_after_the_entry_is_written(writer_mode):
+    writer_mode(durability="fsync")
+    stream = _stream()
+    memory_store.append_memory(stream, {"summary": "durable"}, shared=True)
+    assert _on_disk(stream) == 1
+
+
+def test_interval_mode_commits_on_flush(writer_mode):
+    writer_mode(durability="interval", flush_interval=60)
+    stream = _stream()
+    for i in range(10):
+        memory_store.append_memory(stream, {"summary": f"entry {i}"}, shared=True)
+    assert _on_disk(stream) == 0  # waiting for the flush interval
+    memory_store.flush()
+    assert _on_disk(stream) == 10
+
+
+def test_fire_and_forget_mode_drains_without_waiting_for_an_interval(writer_mode):
+    writer_mode(durability="fire_and_forget", flush_interval=60)
+    stream = _stream()
+    memory_store.append_memory(stream, {"summary": "soon"}, shared=True)
+    for _ in range(100):
+        if _on_disk(stream):
+            break
+        time.sleep(0.01)
+    assert _on_disk(stream) == 1
+
+
+def test_flush_reraises_writer_errors(writer_mode, monkeypatch):
+    def broken(batch, sync):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(memory_store, "_write_batch", broken)
+    memory_store.append_memory(_stream(), {"summary": "lost"}, shared=True)
+    with pytest.raises(OSError):
+        memory_store.flush()
+
+
+def test_unknown_durability_mode_is_refused(writer_mode):
+    with pytest.raises(ValueError):
+        writer_mode(durability="sometimes")
+
+
+def test_search_ranks_the_most_relevant_entries_first():
+    stream = _stream()
+    for summary in (
+        "Database migration failed on the users table",
+        "Changed the button color on the landing page",
+        "Added an index to the database",
+        "Database migration retried and succeeded after the users table lock cleared",
+    ):
+        memory_store.append_memory(stream, {"kind": "note", "summary": summary}, shared=True)
+    hits = memory_store.search_memory(stream, "users table migration", top_k=2, shared=True)
+    assert [fields[2] for _, fields in hits] == [
+        "Database migration failed on the users table",
+        "Database migration retried and succeeded after the users table lock cleared",
+    ]
+    assert hits[0][0] >= hits[1][0]
+    assert memory_store.search_memory(stream, "kubernetes", shared=True) == []
+
+
+def test_search_index_follows_later_appends():
+    stream = _stream()
+    memory_store.append_memory(stream, {"kind": "note", "summary": "first note"}, shared=True)
+    assert memory_store.search_memory(stream, "websocket", shared=True) == []  # builds the index
+    memory_store.append_memory(stream, {"kind": "note", "summary": "websocket reconnect fixed"}, shared=True)
+    assert [fields[2] for _, fields in memory_store.search_memory(stream, "websocket", shared=True)] == ["websocket reconnect fixed"]
+    text = memory_store.summarize_memory(stream, query="websocket", shared=True)
+    assert "websocket reconnect fixed" in text and "first note" not in text
+
+
+def test_bm25_index_evicts_the_oldest_documents():
+    from memory_index import BM25Index
+    index = BM25Index(max_docs=2)
+    for i, text in enumerate(("alpha report", "beta report", "gamma report")):
+        index.add(text, i)
+    assert len(index) == 2
+    assert index.search("alpha") == []
+    assert [payload for _, payload in index.search("report")] == [2, 1]  # ties favour newer documents
+
+
+def _in_job(job_id, fn, *args, **kwargs):
+    token = job_id_var.set(job_id)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        job_id_var.reset(token)
+
+
+def test_stream_keys_resolve_to_the_job_or_the_shared_namespace():
+    assert _in_job("abc-123", memory_store._stream_key, "notes") == "jobs/abc-123/notes"
+    assert _in_job("abc-123", memory_store._stream_key, "notes", shared=True) == "notes"
+    assert _in_job("global", memory_store._stream_key, "notes") == "notes"
+    assert _in_job("", memory_store._stream_key, "notes") == "notes"
+    assert _in_job("../../etc", memory_store._stream_key, "../passwd") == "jobs/_.._etc/_passwd"
+
+
+def test_job_streams_are_private_and_shared_streams_are_not():
+    first, second, shared = uuid.uuid4().hex, uuid.uuid4().hex, _stream()
+    _in_job(first, memory_store.append_memory, "notes", {"summary": "first job"})
+    _in_job(first, memory_store.append_memory, shared, {"summary": "from the first job"}, shared=True)
+    _in_job(second, memory_store.append_memory, "notes", {"summary": "second job"})
+    assert [e["summary"] for e in _in_job(first, memory_store.load_memory, "notes")] == ["first job"]
+    assert [e["summary"] for e in _in_job(second, memory_store.load_memory, "notes")] == ["second job"]
+    assert [e["summary"] for e in _in_job(second, memory_store.load_memory, shared, shared=True)] == ["from the first job"]
+    assert os.path.exists(os.path.join(memory_store._BASE_DIR, "jobs", first, "notes.jsonl"))
+    assert os.path.exists(os.path.join(memory_store._BASE_DIR, shared + ".jsonl"))
+    for job_id in (first, second):
+        memory_store.release_job(job_id)
@@ -0,0 +1,68 @@
+import os
+import socket
+import threading
+import time
+import pubsub
+
+
+def _hung_broker():
+    """ A TCP server that accepts connections but never answers """
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(server.accept()), daemon=True).start()
+    return server, accepted
+
+
+def test_publish_to_a_hung_broker_is_dropped_quickly(monkeypatch):
+    monkeypatch.setattr(pubsub, "COMMAND_TIMEOUT", 0.2)
+    monkeypatch.setattr(pubsub, "RECONNECT_DELAY", 30)
+    server, _ = _hung_broker()
+    broker = pubsub.RespBroker(f"redis://127.0.0.1:{server.getsockname()[1]}")
+    try:
+        started = time.monotonic()
+        assert broker.publish("aura:logs:job", "line") == 0
+        assert time.monotonic() - started < 1.0
+        # Until the reconnect delay passes, further publishes fail fast instead of waiting again.
+        started = time.monotonic()
+        assert broker.publish("aura:logs:job", "line") == 0
+        assert time.monotonic() - started < 0.1
+    finally:
+        broker.close()
+        server.close()
+
+
+def test_subscriber_stays_connected_past_the_command_timeout(monkeypatch, tmp_path):
+    import asyncio
+    monkeypatch.setattr(pubsub, "COMMAND_TIMEOUT", 0.2)
+    path = str(tmp_path / "broker.sock")
+    threading.Thread(target=lambda: asyncio.run(pubsub.serve(unix_path=path)), daemon=True).start()
+    for _ in range(50):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+    broker = pubsub.RespBroker(f"unix://{path}")
+    received = threading.Event()
+    try:
+        broker.subscribe("aura:logs:job", lambda channel, message: received.set())
+        time.sleep(0.5)  # idle longer than the command timeout
+        for _ in range(20):
+            if broker.publish("aura:logs:job", "line") == 1:
+                break
+            time.sleep(0.05)
+        assert received.wait(2)
+    finally:
+        broker.close()
+
+
+def test_a_broker_missing_a_command_fails_at_construction():
+    import pytest
+
+    class PublishOnly(pubsub.Broker):
+        def publish(self, channel, message):
+            return 0
+
+    with pytest.raises(TypeError):
+        PublishOnly()
+    assert isinstance(pubsub.LocalBroker(), pubsub.Broker)
@@ -0,0 +1,53 @@
+import crud
+import database
+import job_queue
+import models
+import schemas
+import uuid
+from state import jobs
+from worker import QueueWorker
+
+
+def _queue_job(user):
+    job_id = str(uuid.uuid4())
+    with database.SessionLocal() as db:
+        crud.create_user_project(db, schemas.ProjectCreate(prompt_desc="todo app"), user.id, job_id)
+        job_queue.enqueue(db, job_id, user.id, {
+            "image_path": None, "user_desc": "todo app", "voice_reqs": "", "model_id": "gemini-2.0-flash",
+            "resume": False, "reuse_checkpoints": False,
+        })
+    return job_id
+
+
+def _project_status(job_id):
+    with database.SessionLocal() as db:
+        return db.get(models.Project, job_id).status
+
+
+def test_failed_phase_is_resumed_from_that_phase(client, user, auth_headers, fake_llm, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 1)  # no automatic retry: the user resumes
+    fake_llm.failing.add("Cognitive Load & Developer Experience Optimization Agent")
+    job_id = _queue_job(user)
+
+    assert QueueWorker().run_once()
+    assert "Cognitive Phase failed" in jobs[job_id]["error"]
+    assert jobs[job_id]["done"]
+    assert _project_status(job_id) == "Failed"
+
+    fake_llm.failing.clear()
+    fake_llm.clear()
+    response = client.post(f"/api/projects/{job_id}/resume", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["resume_from"] == "cognitive"
+
+    assert QueueWorker().run_once()
+    # Phases 1-5 come from checkpoints; only the failed phase and the ones after it call the provider.
+    assert fake_llm == ["Cognitive Load & Developer Experience Optimization Agent", "Sustainability Agent"]
+    assert _project_status(job_id) == "Completed"
+
+
+def test_completed_project_cannot_be_resumed(client, user, auth_headers, fake_llm):
+    job_id = _queue_job(user)
+    assert QueueWorker().run_once()
+    assert _project_status(job_id) == "Completed"
+    assert client.post(f"/api/projects/{job_id}/resume", headers=auth_headers).status_code == 409
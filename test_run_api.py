@@ -0,0 +1,64 @@
+import base64
+import pytest
+import auth
+import crud
+import database
+import job_queue
+import models
+
+
+def _balance(user_id):
+    with database.SessionLocal() as db:
+        return db.get(models.User, user_id).credit_balance
+
+
+def test_run_charges_creates_the_project_and_queues_the_job(client, user, auth_headers):
+    sketch = "data:image/png;base64," + base64.b64encode(b"\x89PNG fake sketch").decode()
+    response = client.post(
+        "/api/run",
+        json={"user_desc": "todo app", "voice_reqs": "", "model_id": "gemini-2.0-flash", "image_data": sketch},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["remaining_credits"] == user.credit_balance - 10
+    assert _balance(user.id) == user.credit_balance - 10
+    with database.SessionLocal() as db:
+        project = db.get(models.Project, body["job_id"])
+        assert project is not None and project.user_id == user.id
+        entry = db.get(models.JobQueue, body["job_id"])
+        assert entry.status == job_queue.QUEUED
+        assert entry.sketch == b"\x89PNG fake sketch"  # readable by worker nodes, not only this one
+
+
+def test_run_without_credits_is_refused(client, user, auth_headers):
+    with database.SessionLocal() as db:
+        db.get(models.User, user.id).credit_balance = 5
+        db.commit()
+    auth.invalidate_user(user_id=user.id)
+    response = client.post("/api/run", json={"user_desc": "todo app", "voice_reqs": "", "model_id": "gemini-2.0-flash"}, headers=auth_headers)
+    assert response.status_code == 402
+    assert _balance(user.id) == 5
+
+
+def test_failure_after_the_charge_keeps_the_credits(client, user, auth_headers, monkeypatch):
+    def broken_enqueue(*args, **kwargs):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(job_queue, "enqueue", broken_enqueue)
+    with pytest.raises(RuntimeError):
+        client.post("/api/run", json={"user_desc": "todo app", "voice_reqs": "", "model_id": "gemini-2.0-flash"}, headers=auth_headers)
+    assert _balance(user.id) == user.credit_balance
+    with database.SessionLocal() as db:
+        assert crud.get_user_projects(db, user.id) == []
+        assert db.query(models.CreditLedger).filter_by(user_id=user.id, reason="run").count() == 0
+
+
+def test_invalid_image_is_rejected_before_charging(client, user, auth_headers):
+    response = client.post(
+        "/api/run",
+        json={"user_desc": "todo app", "voice_reqs": "", "model_id": "gemini-2.0-flash", "image_data": "data:image/png;base64,@@@"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert _balance(user.id) == user.credit_balance
@@ -2,7 +2,7 @@ import os
 from crewai.tools import tool
 from logger_config import job_id_var
 
-from memory_store import append_memory, load_memory, summarize_memory
+from memory_store import append_memory, summarize_memory
 
 
 @tool("write_file_tool")
@@ -133,16 +133,24 @@ def list_generated_files(dummy: str = ""):
         return f"Error listing files: {str(e)}"
 
 
+def _split_shared(stream: str):
+    """Streams prefixed with 'shared:' opt into cross-job memory; others stay private to the job."""
+    if stream.startswith("shared:"):
+        return stream[len("shared:"):].strip() or "project", True
+    return stream, False
+
+
 @tool("write_memory")
 def write_memory(data: str) -> str:
     """
-    Append a short, structured memory entry.
+    Append a short, structured memory entry to this job's memory.
     Input format: 'stream_name|summary text describing the event'
+    Prefix the stream with 'shared:' to write to memory shared across jobs.
     """
     if "|" not in data:
         return "Error: Use the format 'stream|summary'"
     stream, summary = data.split("|", 1)
-    stream = stream.strip() or "project"
+    stream, shared = _split_shared(stream.strip() or "project")
     summary = summary.strip()
     append_memory(
         stream,
@@ -150,17 +158,28 @@ def write_memory(data: str) -> str:
             "kind": "note",
             "summary": summary,
         },
+        shared=shared,
     )
     return f"Memory appended to stream '{stream}'."
 
 
 @tool("read_memory")
-def read_memory(stream: str = "project") -> str:
+def read_memory(data: str = "project") -> str:
     """
-    Read a concise textual summary of recent memory for a stream.
+    Read a concise textual summary of memory for a stream.
+    Input format: 'stream_name' for the most recent entries, or
+    'stream_name|query|top_k' for the entries most relevant to the query (top_k defaults to 5).
+    Prefix the stream with 'shared:' to read memory shared across jobs.
     """
-    stream = (stream or "project").strip()
-    return summarize_memory(stream)
+    parts = (data or "project").split("|")
+    stream, shared = _split_shared(parts[0].strip() or "project")
+    query = parts[1].strip() if len(parts) > 1 else ""
+    if not query:
+        return summarize_memory(stream, shared=shared)
+    top_k = 5
+    if len(parts) > 2 and parts[2].strip().isdigit():
+        top_k = max(1, min(int(parts[2].strip()), 50))
+    return summarize_memory(stream, limit=top_k, query=query, shared=shared)
 
 
 class DevelopmentTools:
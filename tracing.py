@@ -0,0 +1,97 @@
+import collections
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from logger_config import job_id_var
+
+# Lightweight per-job tracing. Spans are kept in memory per job id and can be
+# exported as Chrome trace-event JSON (load it in chrome://tracing or Perfetto).
+
+# Jobs whose traces are retained; the least recently traced job is evicted first.
+MAX_TRACED_JOBS = int(os.getenv("AURA_TRACE_MAX_JOBS", "200"))
+# Spans kept per job; later spans are counted but not stored.
+MAX_SPANS_PER_JOB = int(os.getenv("AURA_TRACE_MAX_SPANS", "10000"))
+
+_TRACES: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _record(job_id: str, event: Dict[str, Any]) -> None:
+    with _LOCK:
+        trace = _TRACES.get(job_id)
+        if trace is None:
+            trace = _TRACES[job_id] = {"spans": [], "dropped": 0}
+            while len(_TRACES) > MAX_TRACED_JOBS:
+                _TRACES.popitem(last=False)
+        else:
+            _TRACES.move_to_end(job_id)
+        if len(trace["spans"]) < MAX_SPANS_PER_JOB:
+            trace["spans"].append(event)
+        else:
+            trace["dropped"] += 1
+
+
+@contextmanager
+def span(name: str, job_id: Optional[str] = None, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed block as a span of the given (or current) job.
+    The yielded dict can be updated with attributes known only at the end,
+    such as an outcome. Exceptions are recorded and re-raised.
+    """
+    job_id = job_id or job_id_var.get()
+    args: Dict[str, Any] = dict(attrs)
+    start_ns = time.time_ns()
+    started = time.perf_counter_ns()
+    try:
+        yield args
+    except BaseException as exc:
+        args.setdefault("error", f"{type(exc).__name__}: {str(exc)[:200]}")
+        raise
+    finally:
+        _record(
+            job_id,
+            {
+                "name": name,
+                "ts": start_ns // 1000,
+                "dur": (time.perf_counter_ns() - started) // 1000,
+                "tid": threading.get_ident(),
+                "args": args,
+            },
+        )
+
+
+def get_spans(job_id: str) -> List[Dict[str, Any]]:
+    with _LOCK:
+        trace = _TRACES.get(job_id)
+        return list(trace["spans"]) if trace else []
+
+
+def has_trace(job_id: str) -> bool:
+    with _LOCK:
+        return job_id in _TRACES
+
+
+def export_chrome_trace(job_id: str) -> Dict[str, Any]:
+    """Return the job's spans in the Chrome trace-event format ("X" complete events, microseconds)."""
+    with _LOCK:
+        trace = _TRACES.get(job_id)
+        spans = list(trace["spans"]) if trace else []
+        dropped = trace["dropped"] if trace else 0
+    events = [
+        {
+            "name": s["name"],
+            "cat": s["name"].split(".", 1)[0],
+            "ph": "X",
+            "ts": s["ts"],
+            "dur": s["dur"],
+            "pid": 1,
+            "tid": s["tid"],
+            "args": s["args"],
+        }
+        for s in spans
+    ]
+    events.append({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"job {job_id}"}})
+    return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"job_id": job_id, "dropped_spans": dropped}}